@@ -0,0 +1,86 @@
+# bench_autotune.py
+"""
+Auto-tuner benchmark against a local stand-in Ollama server (no models needed).
+
+The stand-in is configured with a known optimum (num_thread = --threads,
+num_batch = --best-batch, OLLAMA_NUM_PARALLEL = --parallel, with each extra
+request in flight slowing the others by --contention). The benchmark then
+  1. runs a bot-like folder of syntaxbot prompts with Ollama's defaults,
+  2. runs `ollamabots autotune` against the stand-in,
+  3. runs the same folder again, now with the saved profile applied by
+     stream_generate and the workers taken from the tuned parallelism,
+and reports both wall times and whether the tuner found the optimum.
+Profiles and model rates go to a temporary OLLAMABOTS_STATE.
+
+Usage: python benchmarks/bench_autotune.py [--files 12] [--latency 0.1] [--threads 8]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+os.environ["OLLAMABOTS_STATE"] = tempfile.mkdtemp(prefix="bench_autotune_")
+
+from ollamabots.autotune import autotune  # noqa: E402
+from ollamabots.common import tuning  # noqa: E402
+from ollamabots.common.pool import HostPool  # noqa: E402
+from ollamabots.common.streaming import stream_generate  # noqa: E402
+from standin_ollama import StandInOllama  # noqa: E402
+
+MODEL = "stand-in:latest"
+
+
+def folder_run(pool: HostPool, prompt: str, files: int) -> tuple:
+    """(wall seconds, workers) for `files` review requests with the bots' default worker count."""
+    workers = min(pool.parallelism(MODEL), files)
+
+    def one(i):
+        stream_generate({"model": MODEL, "prompt": f"-- file {i}\n{prompt}"}, pool=pool)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(one, range(files)))
+    return time.perf_counter() - start, workers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=12)
+    parser.add_argument("--latency", type=float, default=0.1, help="Seconds per request with Ollama's defaults")
+    parser.add_argument("--threads", type=int, default=8, help="Fastest num_thread of the stand-in")
+    parser.add_argument("--best-batch", type=int, default=1024, help="Fastest num_batch of the stand-in")
+    parser.add_argument("--parallel", type=int, default=4, help="Requests the stand-in runs at once")
+    parser.add_argument("--contention", type=float, default=0.3)
+    args = parser.parse_args()
+
+    server = StandInOllama(latency=args.latency, load_latency=0.3, prefill_rate=20000, threads=args.threads,
+                           default_threads=max(1, args.threads // 2), best_batch=args.best_batch,
+                           parallel=args.parallel, contention=args.contention, loaded=[MODEL]).start()
+    prompt = autotune.sql_workload().payload["prompt"]
+
+    before, workers = folder_run(HostPool([server.url]), prompt, args.files)
+    print(f"defaults: {args.files} files in {before:.2f}s with {workers} worker(s)\n")
+
+    autotune.main(["--hosts", server.url, "--model", MODEL, "--repeats", "1",
+                   "--threads", *map(str, sorted({max(1, args.threads // 4), max(1, args.threads // 2),
+                                                  args.threads, args.threads * 2}))])
+
+    after, workers = folder_run(HostPool([server.url]), prompt, args.files)
+    print(f"\ntuned:    {args.files} files in {after:.2f}s with {workers} worker(s) "
+          f"({before / after:.1f}x faster)")
+
+    options = (tuning.profiles.get(MODEL, server.url) or {}).get("options", {})
+    found = options.get("num_thread") == args.threads and options.get("num_batch") == args.best_batch
+    print(f"optimum num_thread={args.threads} num_batch={args.best_batch}: {'found' if found else 'missed'} "
+          f"(tuned {options})")
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
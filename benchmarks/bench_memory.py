@@ -0,0 +1,123 @@
+# bench_memory.py
+"""
+Peak-memory benchmark for the image request path of ollamabots.image2project.image2text.
+
+Sends 20-50 MB images to a local stand-in for the Ollama API (no model
+needed) and reports the peak RSS of a fresh process per run, comparing the
+old in-memory request (PNG bytes -> base64 bytes -> str -> JSON body) with
+the streamed ImageRequestBody reading a memory-mapped file.
+
+Usage: python benchmarks/bench_memory.py [--sizes 20 35 50]
+"""
+import argparse
+import base64
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Run from a checkout without installing the package
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+
+def peak_rss_mb() -> float:
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError:  # Windows
+        import psutil
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Accepts /api/generate, drains the body in small reads and returns a canned response."""
+
+    def do_GET(self):  # /api/ps health checks of the host pool
+        body = json.dumps({"models": []}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        remaining = int(self.headers.get("Content-Length", 0))
+        while remaining:
+            remaining -= len(self.rfile.read(min(remaining, 1 << 20)))
+        body = json.dumps({"response": "ok", "done": True}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def legacy_request(image_path: Path, host: str):
+    """The request path before streaming: every representation held in memory at once."""
+    import requests
+    from ollamabots.image2project import image2text
+    img_bytes = image_path.read_bytes()
+    img_b64 = base64.b64encode(img_bytes).decode("utf-8")
+    payload = {"model": image2text.MODEL, "prompt": image2text.OCR_PROMPT, "images": [img_b64],
+               "stream": False, "options": {"temperature": image2text.TEMPERATURE}}
+    resp = requests.post(f"{host}/api/generate", json=payload, timeout=1200)
+    resp.raise_for_status()
+
+
+def worker(mode: str, image_path: Path, host: str):
+    from ollamabots.common.pool import set_hosts
+    from ollamabots.image2project import image2text
+    set_hosts([host])
+    image2text.CLEANUP = False  # measure the request path, not OpenCV
+    baseline = peak_rss_mb()
+    if mode == "legacy":
+        legacy_request(image_path, host)
+    else:
+        image2text.transcribe_image(image_path)
+    print(json.dumps({"baseline_mb": baseline, "peak_mb": peak_rss_mb()}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20, 35, 50], help="Image sizes in MB")
+    parser.add_argument("--worker", nargs=3, metavar=("MODE", "IMAGE", "HOST"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        mode, image, host = args.worker
+        worker(mode, Path(image), host)
+        return
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host = f"http://127.0.0.1:{server.server_address[1]}"
+
+    print(f"{'size':>6}  {'mode':<10} {'peak RSS':>10} {'request overhead':>17}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            image_path = Path(tmp) / f"image_{size}mb.png"
+            with open(image_path, "wb") as f:
+                for _ in range(size):
+                    f.write(os.urandom(1 << 20))
+            for mode in ("legacy", "streaming"):
+                result = subprocess.run(
+                    [sys.executable, __file__, "--worker", mode, str(image_path), host],
+                    capture_output=True, text=True, cwd=ROOT, check=True,
+                )
+                stats = json.loads(result.stdout.strip().splitlines()[-1])
+                overhead = stats["peak_mb"] - stats["baseline_mb"]
+                print(f"{size:>4}MB  {mode:<10} {stats['peak_mb']:>8.1f}MB {overhead:>15.1f}MB")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
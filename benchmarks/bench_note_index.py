@@ -0,0 +1,116 @@
+# bench_note_index.py
+"""
+Search-index benchmark for noteBot's Markdown outputs (no models needed).
+
+Writes --notes synthetic enhanced notes (Zipf-distributed vocabulary, a few
+topic words each) to a temporary output folder and reports
+  1. the time to index them all from scratch (NoteIndex.refresh + save),
+  2. the time to re-index after editing --edits of them (only those are
+     read again and re-indexed; the rest are skipped by mtime/size),
+  3. query latency (p50/p95) of BM25 searches and of "Related notes" lookups.
+With --embed, the notes also get vectors from a local stand-in Ollama
+server's /api/embed, and queries fuse the BM25 and vector rankings.
+
+Usage: python benchmarks/bench_note_index.py [--notes 20000] [--queries 200] [--embed]
+"""
+import argparse
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from ollamabots.notebot.note_index import NoteIndex  # noqa: E402
+
+
+def vocabulary(size: int, rng: random.Random) -> list:
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return ["".join(rng.choice(letters) for _ in range(rng.randint(3, 9))) for _ in range(size)]
+
+
+def write_notes(folder: Path, count: int, words: list, rng: random.Random):
+    weights = [1 / (rank + 1) for rank in range(len(words))]
+    for i in range(count):
+        topic = rng.sample(words[2000:], 4)
+        body = rng.choices(words, weights=weights, k=rng.randint(150, 400)) + topic * 5
+        rng.shuffle(body)
+        lines = [" ".join(body[j:j + 14]) for j in range(0, len(body), 14)]
+        text = f"# Meeting {i}: {topic[0]} {topic[1]}\n\n## Notes\n" + "\n".join(f"- {line}" for line in lines)
+        (folder / f"note_{i:05}.md").write_text(text, encoding="utf-8")
+
+
+def percentiles(samples: list) -> str:
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1] if len(samples) > 1 else samples[0]
+    return f"p50 {statistics.median(samples):.2f} ms, p95 {p95:.2f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--notes", type=int, default=20000)
+    parser.add_argument("--edits", type=int, default=25)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--embed", action="store_true", help="Add vectors from a stand-in /api/embed")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    words = vocabulary(30000, rng)
+    folder = Path(tempfile.mkdtemp(prefix="bench_note_index_"))
+    server = None
+    if args.embed:
+        from standin_ollama import StandInOllama
+        from ollamabots.common.pool import set_hosts
+        server = StandInOllama(latency=0).start()
+        set_hosts([server.url])
+    embed_model = "stand-in-embed" if args.embed else None
+
+    write_notes(folder, args.notes, words, rng)
+    start = time.perf_counter()
+    index = NoteIndex(folder, embed_model=embed_model)
+    indexed, _ = index.refresh()
+    index.save()
+    size = sum(p.stat().st_size for p in index.dir.iterdir()) / 1e6
+    print(f"indexed {indexed} notes in {time.perf_counter() - start:.1f}s ({size:.1f} MB on disk)")
+
+    for path in rng.sample(sorted(folder.glob("*.md")), args.edits):
+        path.write_text(path.read_text(encoding="utf-8") + f"\n- follow up {rng.choice(words)}\n", encoding="utf-8")
+    start = time.perf_counter()
+    index = NoteIndex(folder, embed_model=embed_model)
+    loaded = time.perf_counter() - start
+    indexed, _ = index.refresh()
+    index.save()
+    print(f"re-indexed {indexed} edited notes in {time.perf_counter() - start:.2f}s (index loaded in {loaded:.2f}s)")
+
+    queries = [" ".join(rng.sample(words[2000:], 2) + rng.sample(words[:200], 1)) for _ in range(args.queries)]
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        index.search(query, 10, use_vectors=False)
+        timings.append((time.perf_counter() - start) * 1000)
+    print(f"BM25 search:   {percentiles(timings)}")
+
+    notes = [p.read_text(encoding="utf-8") for p in rng.sample(sorted(folder.glob("*.md")), min(50, args.notes))]
+    timings = []
+    for text in notes:
+        start = time.perf_counter()
+        index.related(text, 5)
+        timings.append((time.perf_counter() - start) * 1000)
+    print(f"related notes: {percentiles(timings)}")
+
+    if args.embed:
+        timings = []
+        for query in queries[:50]:
+            start = time.perf_counter()
+            index.search(query, 10)
+            timings.append((time.perf_counter() - start) * 1000)
+        print(f"hybrid search: {percentiles(timings)} (including the query embedding call)")
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
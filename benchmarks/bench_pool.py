@@ -0,0 +1,93 @@
+# bench_pool.py
+"""
+Host pool benchmark against local stand-in Ollama servers (no models needed).
+
+Runs the same batch of generate requests through
+  1. a single host,
+  2. a pool of --hosts hosts where only the first has the model loaded,
+  3. the same pool with one host stopped part-way through the batch,
+and reports wall time, requests served per host and failed requests.
+
+Usage: python benchmarks/bench_pool.py [--requests 24] [--hosts 3] [--latency 0.3]
+"""
+import argparse
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from ollamabots.common import pool as host_pool  # noqa: E402
+from standin_ollama import StandInOllama  # noqa: E402
+
+MODEL = "stand-in:latest"
+
+
+def run_batch(pool, requests: int, concurrency: int, on_progress=None) -> dict:
+    errors = []
+    done = [0]
+    lock = threading.Lock()
+
+    def one(i):
+        try:
+            resp = pool.post("/api/generate", MODEL, json={"model": MODEL, "prompt": f"job {i}", "stream": False},
+                             timeout=30)
+            resp.raise_for_status()
+        except Exception as e:
+            errors.append(e)
+        with lock:
+            done[0] += 1
+            if on_progress:
+                on_progress(done[0])
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(one, range(requests)))
+    return {"elapsed_s": time.perf_counter() - start, "errors": len(errors)}
+
+
+def report(label: str, result: dict, servers: list):
+    served = ", ".join(f":{s.url.rsplit(':', 1)[1]}={s.requests}" for s in servers)
+    print(f"{label:<26} {result['elapsed_s']:>6.2f}s  failed={result['errors']}  served: {served}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=24)
+    parser.add_argument("--hosts", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.3, help="Seconds per generate call")
+    parser.add_argument("--load-latency", type=float, default=1.0, help="Extra seconds on a cold host")
+    args = parser.parse_args()
+    host_pool.EJECT_SECONDS = 60  # keep the stopped host out for the whole run
+
+    def servers(count):
+        return [StandInOllama(latency=args.latency, load_latency=args.load_latency,
+                              loaded=[MODEL] if i == 0 else []).start() for i in range(count)]
+
+    single = servers(1)
+    report("single host", run_batch(host_pool.HostPool([s.url for s in single]), args.requests, args.hosts), single)
+
+    group = servers(args.hosts)
+    report(f"pool of {args.hosts}", run_batch(host_pool.HostPool([s.url for s in group]), args.requests,
+                                              args.hosts), group)
+
+    failing = servers(args.hosts)
+    victim = failing[0]  # the warm host, so its share has to move
+
+    def stop_victim(done):
+        if done == args.requests // 3 and victim.fail is False:
+            victim.fail = True  # answers 500 from now on
+
+    result = run_batch(host_pool.HostPool([s.url for s in failing]), args.requests, args.hosts, stop_victim)
+    report(f"pool of {args.hosts}, 1 failing", result, failing)
+
+    for server in single + group + failing:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
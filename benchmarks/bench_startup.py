@@ -0,0 +1,67 @@
+# bench_startup.py
+"""
+Startup benchmark for the `ollamabots` CLI.
+
+Times `ollamabots --help` and `ollamabots <command> --help` in fresh
+interpreters and reports the median wall time of each. Help output should
+only import the command being asked about, so every line is expected to stay
+well under 100 ms.
+
+Usage: python benchmarks/bench_startup.py [--runs 15]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from ollamabots.cli import COMMANDS  # noqa: E402
+
+TARGET_MS = 100
+
+
+def time_command(args, runs: int) -> float:
+    """Median wall time in ms of `python -m ollamabots <args>`."""
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-m", "ollamabots", *args], cwd=ROOT, env=env,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def time_python(runs: int) -> list:
+    """Wall times in ms of a bare interpreter, the floor every command pays."""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"], check=True)
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=15)
+    args = parser.parse_args()
+
+    python_only = statistics.median(time_python(args.runs))
+    print(f"{'command':<34} {'median':>8}  {'over python':>11}")
+    print(f"{'python -c pass':<34} {python_only:>6.1f}ms")
+    for name in [None, *COMMANDS]:
+        argv = ["--help"] if name is None else [name, "--help"]
+        ms = time_command(argv, args.runs)
+        flag = "" if ms < TARGET_MS else "  (over target)"
+        label = "ollamabots " + " ".join(argv)
+        print(f"{label:<34} {ms:>6.1f}ms  {ms - python_only:>9.1f}ms{flag}")
+
+
+if __name__ == "__main__":
+    main()
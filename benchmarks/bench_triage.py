@@ -0,0 +1,131 @@
+# bench_triage.py
+"""
+Agreement benchmark for syntaxbot's triage cascade.
+
+For every procedure in the folder that the deterministic rules do not clear,
+runs the triage model and the full review model and compares them: the full
+report counts as "suspect" when it lists any syntax error or rule violation
+(or does not follow the report format at all).
+For each threshold it reports how often the escalation decision agrees with
+the full review, how many suspect files the cascade would have missed, and
+the model time of the cascade (triage on every file + full review on the
+escalated ones) against the full review of every file.
+
+--reference reuses saved full-model reports and the "Model responded in" times
+from their run log instead of calling the full model, e.g. the bundled
+syntaxBot/SQL/SyntaxReports (note: produced with an older prompt).
+
+Usage: python benchmarks/bench_triage.py [syntaxBot/SQL] [--triage-model qwen3:4b] [--model codellama:7b-instruct]
+       python benchmarks/bench_triage.py --reference syntaxBot/SQL/SyntaxReports --thresholds 0.3 0.5 0.7
+"""
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from ollamabots.syntaxbot import syntaxbot  # noqa: E402
+from ollamabots.syntaxbot.findings_index import LLM_SECTIONS, parse_report_findings  # noqa: E402
+
+
+def full_verdict(report: str) -> str:
+    """
+    "suspect" if the full report lists any real syntax error or rule violation.
+
+    A report without those sections (free-form prose) counts as suspect too:
+    only the full review would have produced it.
+    """
+    headings = re.findall(r"^\s*#{1,6}\s*(.+)$", report, re.M)
+    if not any(key in h.lower() for h in headings for key in LLM_SECTIONS):
+        return "suspect"
+    issues = [f for f in parse_report_findings(report) if not re.match(r"(none|no )", f["message"], re.I)]
+    return "suspect" if issues else "pass"
+
+
+def reference_times(report_dir: Path) -> dict:
+    """Model time per file from the newest run log in a reports folder."""
+    logs = sorted(report_dir.glob("*.log"))
+    times, current = {}, None
+    for line in logs[-1].read_text(encoding="utf-8").splitlines() if logs else []:
+        processing = re.search(r"Processing (\S+)", line)
+        responded = re.search(r"Model responded in ([\d.]+)s", line)
+        if processing:
+            current = processing.group(1)
+        elif responded and current:
+            times[current] = float(responded.group(1))
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("folder", nargs="?", type=Path, default=ROOT / "syntaxBot" / "SQL")
+    parser.add_argument("--model", default=syntaxbot.MODEL_NAME, help="Full review model")
+    parser.add_argument("--triage-model", default="qwen3:4b")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.3, 0.5, 0.7])
+    parser.add_argument("--reference", type=Path, help="Saved full reports (+ run log) instead of the full model")
+    args = parser.parse_args()
+
+    syntaxbot.TRIAGE_MODEL = args.triage_model
+    project_logic = syntaxbot.load_project_prompt()
+    processes = syntaxbot.load_process_rules()
+    all_rules = syntaxbot.load_resultcode_rules(processes)
+    saved_times = reference_times(args.reference) if args.reference else {}
+
+    rows = []
+    for sql_file in sorted(args.folder.glob("*.sql")):
+        sql_code = sql_file.read_text(encoding="utf-8")
+        rule_check, rules = syntaxbot.check_rules(sql_code, all_rules, processes)
+        if rule_check is not None and rule_check.status == "pass":
+            print(f"{sql_file.name:<32} cleared by the rule checks (no model in either mode)")
+            continue
+        if rule_check is not None and rule_check.status == "fail":
+            print(f"{sql_file.name:<32} failed the rule checks (full review in either mode)")
+            continue
+        static_analysis = syntaxbot.analyze_sql(sql_code, rules)
+        if rule_check is not None:
+            static_analysis["findings"] += syntaxbot.rule_findings(rule_check)
+        ranges = syntaxbot.focus_ranges(sql_code, rule_check) if rule_check is not None else None
+
+        start = time.perf_counter()
+        verdict = syntaxbot.triage_file(sql_file.name, sql_code, project_logic, static_analysis,
+                                        [(first, last) for first, last, _ in ranges] if ranges else None)
+        triage_s = time.perf_counter() - start
+
+        if args.reference:
+            report = (args.reference / f"{sql_file.stem}_report.md").read_text(encoding="utf-8")
+            full_s = saved_times.get(sql_file.name, 0.0)
+        else:
+            prompt = syntaxbot.build_prompt(project_logic, sql_code, sql_file.name, static_analysis, rule_check)
+            start = time.perf_counter()
+            report = syntaxbot.ollama_query(args.model, prompt)
+            full_s = time.perf_counter() - start
+
+        row = {"file": sql_file.name, "suspicion": verdict.suspicion, "triage_s": triage_s,
+               "full_s": full_s, "full": full_verdict(report)}
+        rows.append(row)
+        print(f"{row['file']:<32} triage {verdict.verdict:<7} suspicion {verdict.suspicion:.2f} "
+              f"({triage_s:6.1f}s)   full review: {row['full']:<7} ({full_s:6.1f}s)")
+
+    if not rows:
+        print("No files reach the model; nothing to compare.")
+        return
+
+    baseline = sum(r["full_s"] for r in rows)
+    triage_total = sum(r["triage_s"] for r in rows)
+    print(f"\n{len(rows)} files, full review of every file: {baseline:.1f}s of model time")
+    print(f"{'threshold':>9} {'escalated':>10} {'agreement':>10} {'missed':>7} {'cascade time':>13} {'saved':>7}")
+    for threshold in args.thresholds:
+        escalated = [r for r in rows if r["suspicion"] >= threshold]
+        agree = sum((r["suspicion"] >= threshold) == (r["full"] == "suspect") for r in rows)
+        missed = sum(r["full"] == "suspect" and r["suspicion"] < threshold for r in rows)
+        cascade = triage_total + sum(r["full_s"] for r in escalated)
+        saved = 100 * (1 - cascade / baseline) if baseline else 0.0
+        print(f"{threshold:>9.2f} {len(escalated):>4}/{len(rows):<5} {agree / len(rows):>9.0%} {missed:>7} "
+              f"{cascade:>12.1f}s {saved:>6.0f}%")
+
+
+if __name__ == "__main__":
+    main()
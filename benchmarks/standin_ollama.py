@@ -0,0 +1,279 @@
+# standin_ollama.py
+"""
+Local stand-ins for Ollama servers, for exercising the host pool without models.
+
+Each server answers /api/generate, /api/chat, /api/ps, /api/tags, /api/pull and
+/api/embed. A generate call sleeps for `latency` seconds (plus `load_latency`
+the first time a model is used, after which /api/ps lists it as loaded) and
+returns Ollama-style timings. Like Ollama's default OLLAMA_NUM_PARALLEL=1,
+only `parallel` generations run at once and the rest queue. A server can be
+stopped or set to fail to test failover.
+
+Requests with "stream": true get NDJSON chunks spread over the latency, as
+Ollama sends them. `behaviours` lists what the next streamed requests do, one
+entry each ("ok", "loop": repeat a phrase until the client hangs up, "stall":
+go silent after a few tokens for `stall_seconds`), to exercise the streaming
+guard's aborts and retries. Requests also mimic Ollama's prompt
+cache: only the part of the prompt after the prefix shared with the previous
+request to the model is prefilled (at `prefill_rate` tokens/s) and counted
+in prompt_eval_count.
+
+For the auto-tuner, the runtime options scale those times (`latency` is the
+time with Ollama's defaults: `default_threads`, num_batch 512, num_ctx 4096).
+The fastest num_thread is `threads`; fewer threads are proportionally slower
+and more threads oversubscribe the cores. num_batch is fastest at
+`best_batch` (prefill only), and a larger num_ctx is slightly slower.
+Changing any of them reloads the model. Each request already running slows
+the others by a factor of `contention`.
+
+Usage: python benchmarks/standin_ollama.py --ports 11501 11502 11503 [--latency 0.5]
+       OLLAMA_HOSTS=localhost:11501,localhost:11502,localhost:11503 ollamabots notebot Notes/
+"""
+import argparse
+import json
+import math
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StandInOllama:
+    """One stand-in server on 127.0.0.1:port, run in a background thread."""
+
+    def __init__(self, port: int = 0, latency: float = 0.2, load_latency: float = 0.0,
+                 loaded=(), models=None, fail: bool = False, parallel: int = 1, behaviours=(),
+                 tokens: int = 20, stall_seconds: float = 30.0, prefill_rate: float = 2000.0,
+                 threads: int = 8, default_threads: int = 4, best_batch: int = 512, contention: float = 0.3):
+        self.latency = latency
+        self.load_latency = load_latency
+        self.loaded = set(loaded)
+        self.models = set(models) if models is not None else None  # None = any model exists
+        self.fail = fail
+        self.behaviours = list(behaviours)
+        self.tokens = tokens
+        self.stall_seconds = stall_seconds
+        self.prefill_rate = prefill_rate
+        self._last_prompt = {}  # model -> text of its previous request, for the prompt cache
+        self.threads = threads
+        self.default_threads = default_threads
+        self.best_batch = best_batch
+        self.contention = contention
+        self._load_options = {}  # model -> load-time options it was loaded with
+        self.requests = 0
+        self.active = 0
+        self.peak_active = 0
+        self._lock = threading.Lock()
+        self._slots = threading.Semaphore(parallel)
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def start(self) -> "StandInOllama":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ----- Behaviour -----
+    def _chunk(self, request: dict, text: str, **fields) -> dict:
+        if "messages" in request:
+            return {"model": request.get("model", ""), "message": {"role": "assistant", "content": text}, **fields}
+        return {"model": request.get("model", ""), "response": text, **fields}
+
+    def _timings(self, load: float, eval_count: int, prompt_tokens: int, prefill_s: float,
+                 decode_s: float) -> dict:
+        return {"load_duration": int(load * 1e9), "prompt_eval_count": prompt_tokens,
+                "prompt_eval_duration": int(prefill_s * 1e9), "eval_count": eval_count,
+                "eval_duration": int(decode_s * 1e9)}
+
+    def _slowdown(self, options: dict) -> tuple:
+        """(prefill, decode) time factors of the runtime options, relative to the defaults."""
+        def factors(threads, batch, ctx):
+            cores = self.threads / min(threads, self.threads) * (1 + 0.5 * max(0, threads - self.threads) / self.threads)
+            context = 1 + ctx / 32768
+            return cores * (1 + 0.25 * abs(math.log2(batch / self.best_batch))) * context, cores * context
+
+        tuned = factors(options.get("num_thread") or self.default_threads, options.get("num_batch") or 512,
+                        options.get("num_ctx") or 4096)
+        default = factors(self.default_threads, 512, 4096)
+        return tuned[0] / default[0], tuned[1] / default[1]
+
+    def _reserve(self, model: str, options: dict = None) -> tuple:
+        """Take a generation slot; returns the load time to simulate and the contention factor."""
+        loaded_with = {k: v for k, v in (options or {}).items() if k in ("num_thread", "num_batch", "num_ctx")}
+        self._slots.acquire()
+        with self._lock:
+            self.requests += 1
+            self.active += 1
+            self.peak_active = max(self.peak_active, self.active)
+            cold = model not in self.loaded or self._load_options.get(model, {}) != loaded_with
+            self.loaded.add(model)
+            self._load_options[model] = loaded_with
+            busy = 1 + self.contention * (self.active - 1)
+        return (self.load_latency if cold else 0.0), busy
+
+    def _phases(self, request: dict, busy: float) -> tuple:
+        """(prompt tokens, prefill seconds, decode seconds) for a request."""
+        prefill_factor, decode_factor = self._slowdown(request.get("options") or {})
+        prompt_tokens = self._prefill_tokens(request)
+        prefill_s = (self.latency * 0.2 + prompt_tokens / self.prefill_rate) * prefill_factor * busy
+        return prompt_tokens, prefill_s, self.latency * 0.8 * decode_factor * busy
+
+    def _prefill_tokens(self, request: dict) -> int:
+        """Tokens (about 4 characters each) after the prefix cached from the model's previous request."""
+        text = request.get("prompt") or json.dumps(request.get("messages", []))
+        with self._lock:
+            previous = self._last_prompt.get(request.get("model"), "")
+            self._last_prompt[request.get("model")] = text
+        shared = len(os.path.commonprefix([previous, text]))
+        return max(1, (len(text) - shared) // 4)
+
+    def _release(self):
+        with self._lock:
+            self.active -= 1
+        self._slots.release()
+
+    def generate(self, request: dict) -> tuple:
+        model = request.get("model", "")
+        if self.models is not None and model not in self.models:
+            return 404, {"error": f"model '{model}' not found"}
+        load, busy = self._reserve(model, request.get("options"))
+        try:
+            prompt_tokens, prefill_s, decode_s = self._phases(request, busy)
+            time.sleep(load + prefill_s + decode_s)
+        finally:
+            self._release()
+        return 200, self._chunk(request, f"stand-in response from {self.url}", done=True, done_reason="stop",
+                                **self._timings(load, self.tokens, prompt_tokens, prefill_s, decode_s))
+
+    def generate_stream(self, request: dict, write):
+        """Stream a generation through write(chunk); raises OSError once the client hangs up."""
+        model = request.get("model", "")
+        with self._lock:
+            behaviour = self.behaviours.pop(0) if self.behaviours else "ok"
+        load, busy = self._reserve(model, request.get("options"))
+        try:
+            prompt_tokens, prefill_s, decode_s = self._phases(request, busy)
+            time.sleep(load + prefill_s)
+            token_s = decode_s / self.tokens
+            count = 0
+            while behaviour == "loop" or count < self.tokens:
+                if behaviour == "stall" and count == 3:
+                    time.sleep(self.stall_seconds)
+                    return
+                word = "again and " if behaviour == "loop" else f"token{count} "
+                write(self._chunk(request, word, done=False))
+                count += 1
+                time.sleep(token_s)
+            write(self._chunk(request, "", done=True, done_reason="stop", **self._timings(load, count, prompt_tokens, prefill_s, token_s * count)))
+        finally:
+            self._release()
+
+    def _handler(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, and chunked streams like Ollama's
+
+            def _reply(self, status: int, data: dict):
+                body = json.dumps(data).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _stream(self, request: dict):
+                model = request.get("model", "")
+                if standin.models is not None and model not in standin.models:
+                    return self._reply(404, {"error": f"model '{model}' not found"})
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+
+                def write(chunk: dict):
+                    line = json.dumps(chunk).encode() + b"\n"
+                    self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+                    self.wfile.flush()
+
+                try:
+                    standin.generate_stream(request, write)
+                    self.wfile.write(b"0\r\n\r\n")
+                except OSError:
+                    self.close_connection = True  # client hung up
+
+            def do_GET(self):
+                if standin.fail:
+                    return self._reply(500, {"error": "stand-in failure"})
+                if self.path == "/api/ps":
+                    return self._reply(200, {"models": [{"name": m, "model": m} for m in sorted(standin.loaded)]})
+                if self.path == "/api/tags":
+                    names = standin.models if standin.models is not None else standin.loaded
+                    return self._reply(200, {"models": [{"name": m, "model": m} for m in sorted(names)]})
+                self._reply(404, {"error": "not found"})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                if standin.fail:
+                    return self._reply(500, {"error": "stand-in failure"})
+                if self.path in ("/api/generate", "/api/chat"):
+                    if request.get("stream", True):
+                        return self._stream(request)
+                    return self._reply(*standin.generate(request))
+                if self.path == "/api/pull":
+                    if standin.models is not None:
+                        standin.models.add(request.get("model"))
+                    return self._reply(200, {"status": "success"})
+                if self.path == "/api/embed":
+                    text = str(request.get("input", ""))
+                    vector = [float(text.count(c)) + 1.0 for c in "etaoinshrdlu"]
+                    return self._reply(200, {"embeddings": [vector]})
+                self._reply(404, {"error": "not found"})
+
+            def handle(self):
+                try:
+                    super().handle()
+                except ConnectionResetError:
+                    pass  # the client dropped a kept-alive connection after an abort
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run local stand-in Ollama servers")
+    parser.add_argument("--ports", type=int, nargs="+", default=[11501, 11502, 11503])
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds per generate call")
+    parser.add_argument("--load-latency", type=float, default=1.0, help="Extra seconds the first time a model is used")
+    args = parser.parse_args()
+
+    servers = [StandInOllama(port, args.latency, args.load_latency).start() for port in args.ports]
+    print("OLLAMA_HOSTS=" + ",".join(s.url for s in servers))
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        for server in servers:
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+"""
+ollamaBots - bots and coding tools built on a local Ollama server.
+
+Subcommands (see `ollamabots --help`) live in their own subpackages and are
+imported only when run, so importing this package is cheap.
+"""
+__version__ = "0.1.0"
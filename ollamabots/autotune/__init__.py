@@ -0,0 +1 @@
+"""Runtime-option auto-tuner for CPU inference."""
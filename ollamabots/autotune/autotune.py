@@ -0,0 +1,413 @@
+# autotune.py
+"""
+Runtime-option auto-tuner for CPU inference.
+
+Sweeps num_thread, num_batch and num_ctx one at a time, keeping the best
+value of each before moving to the next. It then sweeps the number of
+requests in flight. Every setting is measured with prompts built by the bots
+themselves:
+
+  sql    syntaxbot's review prompt for a procedure        (syntaxbot.MODEL_NAME)
+  notes  notebot's enhance prompt for a raw note           (notebot.MODEL_NAME)
+  ocr    image2text's transcription request for a page     (image2text.MODEL)
+  code   codegen's fix prompt for a source file            (the codegen model)
+
+Workloads that share a model are tuned together. Each setting reports prefill
+and decode throughput from Ollama's timings and the wall-clock latency per
+request; parallel levels also report requests per minute. Each prompt starts
+with a unique marker, so the prompt cache does not flatter repeats. Each
+setting gets a warm-up request first, because a changed load-time option
+reloads the model.
+
+The best profile per model and host is saved through common/tuning.py, and
+every bot applies it from then on.
+
+Usage:
+  ollamabots autotune                                    # every workload on every host in OLLAMA_HOSTS
+  ollamabots autotune --workloads sql code --threads 8 16 24 32
+  ollamabots autotune --show
+  python benchmarks/bench_autotune.py                    # against a local stand-in server
+"""
+import argparse
+import base64
+import os
+import statistics
+import struct
+import time
+import uuid
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+from ollamabots.common.config import OLLAMA_HOSTS
+from ollamabots.common.streaming import estimate_prompt_tokens
+from ollamabots.common.thinking import apply_thinking, parse_thinking
+from ollamabots.common.tuning import profiles
+
+# ===== Sweep =====
+WORKLOADS = ("sql", "notes", "ocr", "code")
+BATCH_CANDIDATES = (128, 256, 512, 1024)
+CONTEXT_CANDIDATES = (2048, 4096, 8192, 16384)
+PARALLEL_CANDIDATES = (1, 2, 4, 8)
+REPEATS = 2              # Requests per workload and setting (times the parallel level)
+OUTPUT_TOKENS = 128      # num_predict of measurement requests; the decode rate settles well before this
+CONTEXT_HEADROOM = 1024  # Output tokens a tuned num_ctx must leave room for after the largest prompt
+MIN_GAIN = 0.05          # A setting must beat the current best by this fraction to replace it
+LATENCY_LIMIT = 2.0      # A parallel level may raise the mean latency at most this much over one request
+REQUEST_TIMEOUT = 900
+
+SAMPLE_SQL = """-- Sample procedure used when no --sql file is given
+DECLARE @ResultCode INT;
+
+SELECT @ResultCode = ResultCode
+FROM FolderProcessAttempt
+WHERE ProcessRSN = @ProcessRSN AND AttemptRSN = @AttemptRSN;
+
+IF @ResultCode = 950
+BEGIN
+    IF dbo.cf_ProcessInfo_Process(@ProcessRSN, 34200) IS NULL
+    BEGIN
+        RAISERROR('A cancelled reason must be present before cancelling the application.', 16, 1);
+        RETURN;
+    END;
+    EXEC dbo.cp_UpdateFolder @FolderRSN = @FolderRSN, @StatusCode = 4;
+    EXEC dbo.cp_UpdateFolderProcess @ProcessRSN = @ProcessRSN, @StatusCode = 2;
+END
+
+IF @ResultCode = 1220
+BEGIN
+    EXEC dbo.cp_UpdateFolderProcess @ProcessRSN = @ProcessRSN, @StatusCode = 18040, @EndDateIsNULL = 1;
+END
+"""
+
+SAMPLE_NOTES = """standup 3/14
+- migration to new db server friday?? check w/ ops
+- Priya: invoice export broken for >1000 rows, timeout after 30s
+- need to bump api rate limit, customers complaining
+  pasted from the worker log:
+2025-03-14 09:12:01 INFO  export started job=8812 rows=1450
+2025-03-14 09:12:31 ERROR export timed out job=8812 after 30000ms
+2025-03-14 09:12:31 INFO  retry 1/3 job=8812
+2025-03-14 09:13:01 ERROR export timed out job=8812 after 30000ms
+todo: write up the retro, ask Sam about the budget for q2 hw
+"""
+
+SAMPLE_ERROR = "IndexError: list index out of range (raised for an empty list of line numbers)"
+
+
+@dataclass
+class Workload:
+    name: str
+    payload: dict    # the bot's own request: model, prompt, options, thinking, images
+    source: str = ""
+
+    @property
+    def model(self) -> str:
+        return self.payload["model"]
+
+
+@dataclass
+class Measurement:
+    options: dict
+    parallel: int = 1
+    latencies: list = field(default_factory=list)
+    prefill_tokens: int = 0
+    prefill_s: float = 0.0
+    decode_tokens: int = 0
+    decode_s: float = 0.0
+    wall_s: float = 0.0
+    load_s: float = 0.0
+    max_prompt_tokens: int = 0
+    errors: list = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return bool(self.latencies) and not self.errors
+
+    @property
+    def latency(self) -> float:
+        return statistics.mean(self.latencies) if self.latencies else float("inf")
+
+    @property
+    def prefill_tps(self) -> float:
+        return self.prefill_tokens / self.prefill_s if self.prefill_s else 0.0
+
+    @property
+    def decode_tps(self) -> float:
+        return self.decode_tokens / self.decode_s if self.decode_s else 0.0
+
+    @property
+    def requests_per_min(self) -> float:
+        return 60 * len(self.latencies) / self.wall_s if self.wall_s else 0.0
+
+    def label(self) -> str:
+        options = " ".join(f"{k}={v}" for k, v in self.options.items()) or "defaults"
+        return f"{options}, {self.parallel} in flight" if self.parallel > 1 else options
+
+    def row(self) -> str:
+        if not self.ok:
+            return f"{self.label():<44} failed: {self.errors[0] if self.errors else 'no requests'}"
+        return (f"{self.label():<44} {self.prefill_tps:>9.0f} {self.decode_tps:>8.1f} {self.latency:>9.2f}s "
+                f"{self.requests_per_min:>8.1f} {self.load_s:>7.1f}s")
+
+
+HEADER = f"{'setting':<44} {'prefill/s':>9} {'decode/s':>8} {'latency':>10} {'req/min':>8} {'load':>8}"
+
+
+# ===== Representative workloads =====
+def synthetic_page(width: int = 1240, height: int = 1754) -> bytes:
+    """A grayscale PNG of ruled 'text' lines (an A4 page at 150 dpi), standing in for a scan."""
+    text = bytes(0 if 100 <= x < width - 100 and (x // 9) % 7 != 6 else 255 for x in range(width))
+    blank = bytes([255]) * width
+    rows = b"".join(b"\x00" + (text if 120 <= y < height - 120 and y % 48 < 14 else blank) for y in range(height))
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(rows)) + chunk(b"IEND", b""))
+
+
+def sql_workload(path: Path = None) -> Workload:
+    from ollamabots.syntaxbot import syntaxbot
+    if path is None:
+        path = next(iter(sorted(syntaxbot.INPUT_FOLDER.glob("*.sql"))), None)
+    sql_code = path.read_text(encoding="utf-8") if path else SAMPLE_SQL
+    filename = path.name if path else "sample.sql"
+    processes = syntaxbot.load_process_rules()
+    rule_check, rules = syntaxbot.check_rules(sql_code, syntaxbot.load_resultcode_rules(processes), processes)
+    static_analysis = syntaxbot.analyze_sql(sql_code, rules)
+    if rule_check is not None:
+        static_analysis["findings"] += syntaxbot.rule_findings(rule_check)
+    prompt = syntaxbot.build_prompt(syntaxbot.load_project_prompt(), sql_code, filename, static_analysis, rule_check)
+    payload = {"model": syntaxbot.MODEL_NAME, "prompt": prompt}
+    apply_thinking(payload, parse_thinking(syntaxbot.THINKING))
+    return Workload("sql", payload, filename)
+
+
+def notes_workload(path: Path = None) -> Workload:
+    from ollamabots.common.compaction import compact_notes
+    from ollamabots.notebot import notebot
+    notes = path.read_text(encoding="utf-8") if path else SAMPLE_NOTES
+    if notebot.COMPACT_NOTES:
+        notes = compact_notes(notes).text
+    payload = {"model": notebot.MODEL_NAME, "prompt": notebot.build_prompt(notes), "options": {"temperature": 0.1}}
+    apply_thinking(payload, parse_thinking(notebot.THINKING))
+    return Workload("notes", payload, path.name if path else "sample note")
+
+
+def ocr_workload(path: Path = None) -> Workload:
+    from ollamabots.image2project import image2text
+    image = path.read_bytes() if path else synthetic_page()
+    payload = {"model": image2text.MODEL, "prompt": image2text.OCR_PROMPT,
+               "options": {"temperature": image2text.TEMPERATURE},
+               "images": [base64.b64encode(image).decode("ascii")]}
+    return Workload("ocr", payload, path.name if path else "synthetic page")
+
+
+def code_workload(path: Path = None) -> Workload:
+    from ollamabots.codegen.generator import GeneratorConfig, build_fix_prompt
+    from ollamabots.common import compaction
+    error_context = None if path else SAMPLE_ERROR
+    path = path or Path(compaction.__file__)
+    config = GeneratorConfig()
+    payload = {"model": config.model_name, "prompt": build_fix_prompt(path.read_text(encoding="utf-8"), error_context)}
+    apply_thinking(payload, parse_thinking(config.thinking))
+    return Workload("code", payload, path.name)
+
+
+def build_workloads(names: list, args) -> list:
+    builders = {"sql": (sql_workload, args.sql), "notes": (notes_workload, args.notes),
+                "ocr": (ocr_workload, args.image), "code": (code_workload, args.code)}
+    workloads = []
+    for name in names:
+        builder, path = builders[name]
+        workload = builder(path)
+        if args.model:
+            workload.payload["model"] = args.model
+        workloads.append(workload)
+    return workloads
+
+
+def thread_candidates() -> list:
+    """Thread counts to try, from this machine's CPUs (pass --threads when tuning a remote host)."""
+    cpus = os.cpu_count() or 4
+    return sorted({max(1, cpus * quarter // 4) for quarter in (1, 2, 3, 4)})
+
+
+# ===== Measurement =====
+def _post(pool, payload: dict) -> dict:
+    resp = pool.post("/api/generate", payload["model"], json=payload, timeout=REQUEST_TIMEOUT)
+    resp.raise_for_status()
+    return resp.json()
+
+
+def measure(pool, workloads: list, options: dict, parallel: int = 1, repeats: int = REPEATS) -> Measurement:
+    """Run every workload repeats * parallel times with `parallel` requests in flight."""
+    result = Measurement(dict(options), parallel)
+    model = workloads[0].model
+    try:
+        started = time.perf_counter()
+        _post(pool, {"model": model, "prompt": "Reply with OK.", "stream": False,
+                     "options": {**options, "num_predict": 1}})
+        result.load_s = time.perf_counter() - started
+    except Exception as e:
+        result.errors.append(f"warm-up: {e}")
+        return result
+
+    def one(workload: Workload):
+        payload = dict(workload.payload, stream=False,
+                       prompt=f"[autotune {uuid.uuid4().hex[:12]}]\n{workload.payload['prompt']}",
+                       options={**workload.payload.get("options", {}), **options, "num_predict": OUTPUT_TOKENS})
+        started = time.perf_counter()
+        try:
+            data = _post(pool, payload)
+        except Exception as e:
+            return e
+        return time.perf_counter() - started, data
+
+    jobs = [w for _ in range(repeats * parallel) for w in workloads]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=parallel) as executor:
+        outcomes = list(executor.map(one, jobs))
+    result.wall_s = time.perf_counter() - started
+
+    for outcome in outcomes:
+        if isinstance(outcome, Exception):
+            result.errors.append(str(outcome))
+            continue
+        latency, data = outcome
+        result.latencies.append(latency)
+        result.prefill_tokens += data.get("prompt_eval_count", 0)
+        result.prefill_s += data.get("prompt_eval_duration", 0) / 1e9
+        result.decode_tokens += data.get("eval_count", 0)
+        result.decode_s += data.get("eval_duration", 0) / 1e9
+        result.max_prompt_tokens = max(result.max_prompt_tokens, data.get("prompt_eval_count", 0))
+    return result
+
+
+def tune(pool, workloads: list, threads: list, batches: list, contexts: list, parallels: list,
+         repeats: int = REPEATS):
+    """Sweep the options on one host; returns (default measurement, best single, best parallel), or None."""
+    print(HEADER)
+    baseline = measure(pool, workloads, {}, repeats=repeats)
+    print(baseline.row())
+    if not baseline.ok:
+        return None
+
+    best = baseline
+    largest = max(max(estimate_prompt_tokens(w.payload) for w in workloads), baseline.max_prompt_tokens)
+    fitting = [c for c in contexts if c >= largest + CONTEXT_HEADROOM]
+    for option, candidates in (("num_thread", threads), ("num_batch", batches), ("num_ctx", fitting)):
+        current = best
+        for value in candidates:
+            trial = measure(pool, workloads, {**current.options, option: value}, repeats=repeats)
+            print(trial.row())
+            if trial.ok and trial.latency < best.latency * (1 - MIN_GAIN):
+                best = trial
+
+    best_parallel = best
+    for parallel in (p for p in parallels if p > 1):
+        trial = measure(pool, workloads, best.options, parallel, repeats)
+        print(trial.row())
+        if not trial.ok or trial.latency > LATENCY_LIMIT * best.latency:
+            break
+        if trial.requests_per_min <= best_parallel.requests_per_min * (1 + MIN_GAIN):
+            break
+        best_parallel = trial
+    return baseline, best, best_parallel
+
+
+def profile_from(baseline: Measurement, best: Measurement, best_parallel: Measurement, workloads: list) -> dict:
+    return {
+        "options": best.options,
+        "parallel": best_parallel.parallel,
+        "prefill_tps": round(best.prefill_tps, 1),
+        "decode_tps": round(best.decode_tps, 2),
+        "latency_s": round(best.latency, 2),
+        "requests_per_min": round(best_parallel.requests_per_min, 2),
+        "default_latency_s": round(baseline.latency, 2),
+        "default_requests_per_min": round(baseline.requests_per_min, 2),
+        "workloads": [f"{w.name} ({w.source})" for w in workloads],
+        "tuned_at": datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def summary(model: str, host: str, profile: dict) -> str:
+    options = " ".join(f"{k}={v}" for k, v in profile.get("options", {}).items()) or "Ollama defaults"
+    line = f"{model} @ {host}: {options}, {profile.get('parallel', 1)} in flight"
+    if not (profile.get("default_latency_s") and profile.get("default_requests_per_min")):
+        return line
+    faster = 1 - profile["latency_s"] / profile["default_latency_s"]
+    throughput = profile["requests_per_min"] / profile["default_requests_per_min"]
+    return f"{line} ({faster:.0%} lower latency, {throughput:.1f}x requests/min vs defaults)"
+
+
+def show_profiles():
+    saved = profiles.all()
+    if not saved:
+        print(f"No tuned profiles in {profiles.path}")
+        return
+    for key, profile in sorted(saved.items()):
+        model, _, host = key.partition("@")
+        print(f"{summary(model, host, profile)}; tuned {profile.get('tuned_at', '?')}")
+
+
+# ===== CLI =====
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="ollamabots autotune", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workloads", nargs="+", choices=WORKLOADS, default=list(WORKLOADS))
+    parser.add_argument("--model", help="Tune this model on every workload instead of each bot's model")
+    parser.add_argument("--hosts", nargs="+", help="Hosts to tune (default: OLLAMA_HOSTS)")
+    parser.add_argument("--threads", type=int, nargs="+", help="num_thread values (default: from this machine's CPUs)")
+    parser.add_argument("--batches", type=int, nargs="+", default=list(BATCH_CANDIDATES))
+    parser.add_argument("--contexts", type=int, nargs="+", default=list(CONTEXT_CANDIDATES))
+    parser.add_argument("--parallel", type=int, nargs="+", default=list(PARALLEL_CANDIDATES))
+    parser.add_argument("--repeats", type=int, default=REPEATS)
+    parser.add_argument("--sql", type=Path, help="Procedure for the sql workload")
+    parser.add_argument("--notes", type=Path, help="Raw note for the notes workload")
+    parser.add_argument("--image", type=Path, help="Page image for the ocr workload (default: a synthetic page)")
+    parser.add_argument("--code", type=Path, help="Source file for the code workload")
+    parser.add_argument("--no-save", action="store_true", help="Report the best settings without saving them")
+    parser.add_argument("--show", action="store_true", help="List the saved profiles and exit")
+    args = parser.parse_args(argv)
+
+    if args.show:
+        show_profiles()
+        return
+
+    from ollamabots.common.pool import HostPool
+    workloads = build_workloads(args.workloads, args)
+    by_model = {}
+    for workload in workloads:
+        by_model.setdefault(workload.model, []).append(workload)
+    threads = args.threads or thread_candidates()
+
+    results = []
+    for host in args.hosts or OLLAMA_HOSTS:
+        pool = HostPool([host])
+        if not pool.check(pool.hosts[0]):
+            print(f"{pool.hosts[0].url} does not answer; skipped")
+            continue
+        for model, group in by_model.items():
+            names = ", ".join(f"{w.name} ({w.source}, ~{estimate_prompt_tokens(w.payload)} tokens)" for w in group)
+            print(f"\n=== {model} @ {pool.hosts[0].url}: {names}")
+            tuned = tune(pool, group, threads, args.batches, args.contexts, args.parallel, args.repeats)
+            if tuned is None:
+                print(f"{model} did not answer on {pool.hosts[0].url} (is it pulled?); skipped")
+                continue
+            profile = profile_from(*tuned, group)
+            if not args.no_save:
+                profiles.save(model, pool.hosts[0].url, profile)
+            results.append(summary(model, pool.hosts[0].url, profile))
+
+    if results:
+        print("\n" + "\n".join(results))
+        print("(not saved)" if args.no_save else f"Profiles saved to {profiles.path}")
+
+
+if __name__ == "__main__":
+    main()
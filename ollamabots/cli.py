@@ -0,0 +1,84 @@
+# cli.py
+"""
+Single `ollamabots` entry point.
+
+Each subcommand lives in its own module, which is imported only when that
+subcommand runs; `ollamabots --help` imports nothing but this file.
+
+--profile FILE and --trace FILE work with every command and may be given
+before or after it (see common/profiling.py).
+"""
+import importlib
+import sys
+
+# name -> (module with a main(argv) function, one-line help)
+COMMANDS = {
+    "codegen": ("ollamabots.codegen.generator", "Generate code from a prompt, fix files, or run JSONL batches"),
+    "notebot": ("ollamabots.notebot.notebot", "Enhance raw notes into Markdown"),
+    "syntaxbot": ("ollamabots.syntaxbot.syntaxbot", "Check SQL stored procedures against the project rules"),
+    "image2text": ("ollamabots.image2project.image2text", "Transcribe images, folders or PDFs with a vision model"),
+    "text2project": ("ollamabots.image2project.text2project", "Turn raw project notes into a project plan"),
+    "image2project": ("ollamabots.image2project.orchestrator", "Photo of notes -> OCR -> project plan"),
+    "autotune": ("ollamabots.autotune.autotune", "Tune num_thread/num_batch/num_ctx and parallelism per model and host"),
+}
+
+
+GLOBAL_OPTIONS = ("--profile", "--trace")
+
+
+def split_global_options(argv: list):
+    """Pull --profile/--trace (and their values) out of argv, wherever they appear."""
+    options, rest = {}, []
+    args = iter(argv)
+    for arg in args:
+        name, eq, value = arg.partition("=")
+        if name in GLOBAL_OPTIONS:
+            value = value if eq else next(args, None)
+            if not value:
+                print(f"ollamabots: {name} needs a file name", file=sys.stderr)
+                sys.exit(2)
+            options[name[2:]] = value
+        else:
+            rest.append(arg)
+    return options, rest
+
+
+def usage() -> str:
+    width = max(len(name) for name in COMMANDS)
+    lines = ["usage: ollamabots <command> [args...]", "", "commands:"]
+    lines += [f"  {name:<{width}}  {help_text}" for name, (_, help_text) in COMMANDS.items()]
+    lines += ["", "options for every command:",
+              "  --profile FILE  save cProfile stats to FILE and print the top functions",
+              "  --trace FILE    save per-file phase spans as Chrome trace events (chrome://tracing, Perfetto)",
+              "", "Run `ollamabots <command> --help` for the options of a command."]
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    options, argv = split_global_options(sys.argv[1:] if argv is None else argv)
+    if not argv or argv[0] in ("-h", "--help"):
+        print(usage())
+        sys.exit(0 if argv else 1)
+    if argv[0] == "--version":
+        from ollamabots import __version__
+        print(__version__)
+        return
+
+    command, rest = argv[0], argv[1:]
+    if command not in COMMANDS:
+        print(f"ollamabots: unknown command '{command}'\n\n{usage()}", file=sys.stderr)
+        sys.exit(2)
+
+    if not options:
+        importlib.import_module(COMMANDS[command][0]).main(rest)
+        return
+
+    from pathlib import Path
+    from ollamabots.common.profiling import session
+    with session(profile=Path(options["profile"]) if "profile" in options else None,
+                 trace=Path(options["trace"]) if "trace" in options else None):
+        importlib.import_module(COMMANDS[command][0]).main(rest)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Interactive Ollama code generator and fixer."""
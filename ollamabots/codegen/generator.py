@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+"""
+Interactive Ollama Code Generator and Fixer
+===========================================
+A streamlined and robust tool for generating code from prompts and fixing errors in files
+using a local Ollama model.
+
+Author: AI Assistant
+Version: 3.1.0
+License: MIT
+"""
+import subprocess
+import time
+import os
+import json
+import logging
+from pathlib import Path
+from dataclasses import dataclass, asdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+import sys
+from typing import Optional
+
+from ollamabots.common.config import OLLAMA_HOST, OLLAMA_PATH
+from ollamabots.common.profiling import model_spans, parse_verbose_timings, span, tracing
+from ollamabots.common.streaming import predict_timeout, stream_generate
+from ollamabots.common.thinking import apply_thinking, cli_flags, format_metrics, parse_thinking, thinking_metrics
+from ollamabots.common.tuning import profiles
+
+# ========= CONFIGURATION =========
+@dataclass
+class GeneratorConfig:
+    """Basic configuration for the generator."""
+    model_name: str = "qwen3:8b" #qwen2.5vl:7b (6gb) or qwen3:4B (2.5gb) or or codellama:7b (3.8gb) or qwen:8b (5.2gb)     8b times out after 15 minutes
+    output_dir: Path = Path("output")
+    timeout_minutes: int = 15  # Upper bound; each call is held to a deadline predicted for the model
+    host: str = OLLAMA_HOST  # Ollama API, used by batch and session mode
+    batch_concurrency: int = 4  # Parallel jobs (and pooled connections) in batch mode
+    thinking: str = "on"  # Reasoning: "off", "on" (hidden from the output) or a token budget like "1024"
+
+# ========= PROMPTS =========
+def build_fix_prompt(original_code: str, error_context: Optional[str] = None) -> str:
+    """
+    Builds the prompt asking the model for a corrected version of the code.
+    """
+    system_prompt = (
+        "You are an expert code debugger. Your task is to analyze the provided code, identify any errors or bugs, and provide a corrected, complete version of the code. "
+        "Do not provide explanations, just the full, fixed code."
+    )
+    user_message = f"Please fix this code:\n\n```\n{original_code}\n```"
+    if error_context:
+        user_message += f"\n\nHere is the error I'm getting or a description of the problem:\n{error_context}"
+    return f"System: {system_prompt}\n\nUser: {user_message}\n\nAssistant:"
+
+# ========= CORE GENERATOR =========
+class CodeGenerator:
+    """Handles the core logic of running Ollama and processing output."""
+
+    def __init__(self, config: GeneratorConfig):
+        self.config = config
+        self.logger = logging.getLogger("CodeGenerator")
+        self.config.output_dir.mkdir(parents=True, exist_ok=True)
+        self._pool = None  # Host pool with pooled connections, only set while a batch is running
+        self._tuned_pool = None  # Host pool for single queries of a tuned model, created on first use
+
+    def _query(self, full_prompt: str) -> str:
+        """
+        Routes a prompt to the batch's host pool when one is open, otherwise to the CLI.
+        The CLI cannot pass runtime options, so a host with a tuned profile
+        (ollamabots autotune) for the model is also queried through the API.
+        """
+        if self._pool is not None:
+            return self._query_api(full_prompt)
+        if profiles.get(self.config.model_name, self.config.host):
+            if self._tuned_pool is None:
+                from ollamabots.common.pool import HostPool
+                self._tuned_pool = HostPool([self.config.host])
+            return self._query_api(full_prompt, self._tuned_pool)
+        return self._run_ollama(full_prompt)
+
+    def close(self):
+        """Close the connections of the tuned-model host pool, if one was opened."""
+        if self._tuned_pool is not None:
+            self._tuned_pool.session.close()
+            self._tuned_pool = None
+
+    def _query_api(self, full_prompt: str, pool=None) -> str:
+        """
+        Streams a prompt through the Ollama HTTP API, aborting and retrying stalls and loops.
+        """
+        payload = {"model": self.config.model_name, "prompt": full_prompt}
+        apply_thinking(payload, parse_thinking(self.config.thinking))
+        data = stream_generate(payload, ceiling=self.config.timeout_minutes * 60, pool=pool or self._pool)
+        self.logger.info(format_metrics(thinking_metrics(data)))
+        return data.get("response", "").strip()
+
+    def _run_ollama(self, full_prompt: str) -> str:
+        """
+        Executes the Ollama process with a given prompt and captures the output.
+        """
+        cmd = [OLLAMA_PATH, "run", self.config.model_name, *cli_flags(parse_thinking(self.config.thinking))]
+        if tracing():
+            cmd.append("--verbose")  # timings on stderr for the prefill/decode spans
+        self.logger.info(f"Running model '{self.config.model_name}'...")
+
+        try:
+            process = subprocess.Popen(
+                cmd,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                encoding='utf-8',
+                errors='replace'
+            )
+
+            # Send the prompt to the model
+            with span("model", model=self.config.model_name, via="cli"):
+                timeout = predict_timeout({"model": self.config.model_name, "prompt": full_prompt},
+                                          ceiling=self.config.timeout_minutes * 60)
+                stdout, stderr = process.communicate(full_prompt, timeout=timeout)
+
+            if process.returncode != 0:
+                error_message = f"Ollama process failed with code {process.returncode}:\n{stderr}"
+                self.logger.error(error_message)
+                raise RuntimeError(error_message)
+
+            if tracing():
+                model_spans(parse_verbose_timings(stderr), model=self.config.model_name)
+            self.logger.info("Generation completed successfully.")
+            return stdout.strip()
+
+        except FileNotFoundError:
+            self.logger.error("'ollama' command not found. Is Ollama installed and in your PATH?")
+            raise
+        except subprocess.TimeoutExpired:
+            process.kill()
+            self.logger.error(f"Process timed out after {timeout:.0f}s.")
+            raise
+        except Exception as e:
+            self.logger.error(f"An unexpected error occurred: {e}")
+            raise
+
+    def generate_from_prompt(self, user_prompt: str, output_name: Optional[str] = None) -> str:
+        """
+        Generates code based on a user's text prompt.
+        """
+        self.logger.info("Starting code generation from prompt...")
+        system_prompt = (
+            "You are an expert programmer. Your task is to generate clean, efficient, and correct code based on the user's request. "
+            "Provide only the code, without any explanations, introductions, or markdown formatting."
+        )
+        full_prompt = f"System: {system_prompt}\n\nUser: {user_prompt}\n\nAssistant:"
+        
+        generated_code = self._query(full_prompt)
+        
+        # Save the output to a file
+        if output_name is None:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            output_name = f"generated_{timestamp}"
+        output_file = self.config.output_dir / f"{output_name}.py"
+        with span("write"), open(output_file, 'w', encoding='utf-8') as f:
+            f.write(generated_code)
+        self.logger.info(f"Output saved to {output_file}")
+        
+        return generated_code
+
+    def fix_from_file(self, file_path: Path, error_context: Optional[str] = None,
+                      output_name: Optional[str] = None) -> str:
+        """
+        Reads code from a file, identifies errors, and generates a fixed version,
+        optionally using provided error context.
+        """
+        self.logger.info(f"Starting code fixing for file: {file_path}...")
+        if not file_path.exists():
+            raise FileNotFoundError(f"The file '{file_path}' was not found.")
+
+        try:
+            with span("read"):
+                original_code = file_path.read_text(encoding='utf-8')
+        except Exception as e:
+            self.logger.error(f"Could not read file '{file_path}': {e}")
+            raise
+
+        if error_context:
+            self.logger.info("Using provided error context to improve the fix.")
+        full_prompt = build_fix_prompt(original_code, error_context)
+        
+        fixed_code = self._query(full_prompt)
+        
+        # Save the fixed code to a new file
+        fixed_file_path = self.config.output_dir / f"{output_name or file_path.stem + '_fixed'}.py"
+        with span("write"), open(fixed_file_path, 'w', encoding='utf-8') as f:
+            f.write(fixed_code)
+        self.logger.info(f"Fixed code saved to {fixed_file_path}")
+        
+        return fixed_code
+
+    # ----- Batch mode -----
+    def run_job(self, job: dict) -> dict:
+        """
+        Runs a single batch job and returns its result record (never raises).
+        """
+        job_id = str(job["id"])
+        command = job.get("command", "generate")
+        record = {"id": job_id, "command": command, "status": "ok", "output_file": None, "error": None}
+        started = time.time()
+        record["started_at"] = datetime.now().isoformat(timespec="seconds")
+
+        try:
+            with span("job", cat="file", id=job_id, command=command):
+                if command == "generate":
+                    self.generate_from_prompt(job["prompt"], output_name=f"generated_{job_id}")
+                    record["output_file"] = str(self.config.output_dir / f"generated_{job_id}.py")
+                elif command == "fix":
+                    file_path = Path(job["file"])
+                    output_name = f"{file_path.stem}_{job_id}_fixed"
+                    self.fix_from_file(file_path, job.get("error"), output_name=output_name)
+                    record["output_file"] = str(self.config.output_dir / f"{output_name}.py")
+                else:
+                    raise ValueError(f"Unknown command '{command}'")
+        except Exception as e:
+            record["status"] = "error"
+            record["error"] = f"{type(e).__name__}: {e}"
+
+        record["elapsed_s"] = round(time.time() - started, 3)
+        return record
+
+    def run_batch(self, jobs_path: Path, results_path: Path, concurrency: Optional[int] = None) -> dict:
+        """
+        Runs every job in a JSONL file with bounded concurrency over one pooled set of connections.
+        Results are appended to a JSONL file as they finish; jobs already recorded there
+        with status "ok" are skipped, so an interrupted batch can simply be re-run.
+        """
+        from ollamabots.common.pool import HostPool
+
+        concurrency = concurrency or self.config.batch_concurrency
+        jobs = load_jobs(jobs_path)
+        done = completed_job_ids(results_path)
+        pending = [job for job in jobs if str(job["id"]) not in done]
+        self.logger.info(f"Batch: {len(jobs)} jobs, {len(jobs) - len(pending)} already done, "
+                         f"{len(pending)} to run with concurrency {concurrency}")
+
+        summary = {"total": len(jobs), "skipped": len(jobs) - len(pending), "ok": 0, "error": 0}
+        start_all = time.time()
+
+        # An interrupted run can leave a half-written last line; start on a fresh one
+        if results_path.exists() and results_path.stat().st_size:
+            with open(results_path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                needs_newline = f.read(1) != b"\n"
+            if needs_newline:
+                with open(results_path, "a", encoding="utf-8") as f:
+                    f.write("\n")
+
+        self._pool = HostPool([self.config.host], connections=concurrency)
+
+        try:
+            with ThreadPoolExecutor(max_workers=concurrency) as pool, \
+                    open(results_path, "a", encoding="utf-8") as out:
+                futures = [pool.submit(self.run_job, job) for job in pending]
+                for future in as_completed(futures):
+                    record = future.result()
+                    out.write(json.dumps(record) + "\n")
+                    out.flush()
+                    summary[record["status"]] += 1
+                    self.logger.info(f"Job {record['id']} {record['status']} in {record['elapsed_s']:.2f}s")
+        finally:
+            self._pool.session.close()
+            self._pool = None
+
+        summary["elapsed_s"] = round(time.time() - start_all, 3)
+        return summary
+
+def load_jobs(jobs_path: Path) -> list:
+    """
+    Reads batch jobs from a JSONL file. Jobs without an "id" are numbered by line.
+    """
+    jobs = []
+    with open(jobs_path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            job = json.loads(line)
+            job.setdefault("id", line_no)
+            jobs.append(job)
+    return jobs
+
+def completed_job_ids(results_path: Path) -> set:
+    """
+    Returns the ids of jobs that already succeeded in a (possibly partial) results file.
+    """
+    done = set()
+    if not results_path.exists():
+        return done
+    with open(results_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Truncated last line from an interrupted run
+            if record.get("status") == "ok":
+                done.add(str(record["id"]))
+    return done
+
+# ========= COMMAND LINE INTERFACE =========
+def main_cli(argv: Optional[list] = None):
+    """
+    Simple command-line interface to run the generator.
+    """
+    argv = ["codegen", *(sys.argv[1:] if argv is None else argv)]
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    if len(argv) > 1 and argv[1] == "session":
+        return session_cli(argv[2:])
+    
+    if len(argv) < 3:
+        print("Usage:")
+        print("  ollamabots codegen generate \"<your prompt>\"")
+        print("  ollamabots codegen fix <file_path> \"[optional error message or path to error_log.txt]\"")
+        print("  ollamabots codegen batch <jobs.jsonl> [results.jsonl] [concurrency]")
+        print("  ollamabots codegen session [session_id] [--file <file_path>] [--list]")
+        print()
+        print("Batch jobs are one JSON object per line, e.g.:")
+        print('  {"id": "a1", "command": "generate", "prompt": "..."}')
+        print('  {"id": "b2", "command": "fix", "file": "src/app.py", "error": "..."}')
+        sys.exit(0 if any(arg in ("-h", "--help") for arg in argv) else 1)
+
+    command = argv[1]
+    argument = argv[2]
+
+    config = GeneratorConfig()
+    generator = CodeGenerator(config)
+
+    try:
+        if command == "generate":
+            print("--- Generating Code ---")
+            result = generator.generate_from_prompt(argument)
+            print("\n--- Generated Code ---")
+            print(result)
+        elif command == "fix":
+            print(f"--- Fixing File: {argument} ---")
+            file_path = Path(argument)
+            error_context = None
+            
+            # Check for an optional third argument (error message or file path)
+            if len(argv) > 3:
+                context_arg = argv[3]
+                context_path = Path(context_arg)
+                if context_path.is_file():
+                    # It's a file, so read it
+                    print(f"--- Reading error context from: {context_path} ---")
+                    error_context = context_path.read_text(encoding='utf-8')
+                else:
+                    # It's not a file, so treat it as a string message
+                    print("--- Using provided error message as context ---")
+                    error_context = context_arg
+
+            result = generator.fix_from_file(file_path, error_context)
+            print("\n--- Fixed Code ---")
+            print(result)
+        elif command == "batch":
+            jobs_path = Path(argument)
+            results_path = Path(argv[3]) if len(argv) > 3 else jobs_path.with_name(jobs_path.stem + "_results.jsonl")
+            concurrency = int(argv[4]) if len(argv) > 4 else None
+            print(f"--- Running batch: {jobs_path} -> {results_path} ---")
+            summary = generator.run_batch(jobs_path, results_path, concurrency)
+            print("\n--- Batch Summary ---")
+            print(json.dumps(summary, indent=2))
+            if summary["error"]:
+                sys.exit(1)
+        else:
+            print(f"Error: Unknown command '{command}'")
+            sys.exit(1)
+            
+    except Exception as e:
+        logging.error(f"Operation failed: {e}", exc_info=False)
+        sys.exit(1)
+    finally:
+        generator.close()
+
+def session_cli(args: list):
+    """
+    Starts (or resumes) an interactive chat session; follow-up turns reuse the cached conversation.
+    """
+    from ollamabots.codegen.session import ChatSession, run_repl
+
+    config = GeneratorConfig()
+    first_file = None
+    if "--file" in args:
+        i = args.index("--file")
+        first_file = Path(args[i + 1]) if i + 1 < len(args) else None
+        args = args[:i] + args[i + 2:]
+        if first_file is None or not first_file.is_file():
+            print("Error: --file needs an existing file")
+            sys.exit(1)
+    if "--list" in args:
+        for saved in ChatSession.list_sessions():
+            print(f"{saved['session']}  {saved['model']:<24} {saved['turns']} turns")
+        return
+
+    logging.getLogger().setLevel(logging.WARNING)  # keep the REPL readable
+    config.output_dir.mkdir(parents=True, exist_ok=True)
+    try:
+        if args:
+            session = ChatSession.resume(args[0], config.host, config.thinking)
+        else:
+            session = ChatSession(config.model_name, config.host, config.thinking)
+    except FileNotFoundError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    run_repl(session, config.output_dir, first_file)
+
+main = main_cli
+
+# ========= MAIN BLOCK =========
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,244 @@
+# session.py
+"""
+Interactive codegen sessions on /api/chat.
+
+A session is one conversation with the model. Each turn sends the whole
+message history. The history only grows by appending, so every request
+starts with exactly the tokens of the previous one. The host keeps the model
+loaded (KEEP_ALIVE) and reuses its cache for that shared prefix, so a
+follow-up ("now add type hints", "fix this new error") only prefills the new
+message. That is also why a session is pinned to one host rather than routed
+through the pool.
+
+Transcripts are appended to SESSION_DIR/<id>.jsonl after every turn and can
+be resumed. When the history reaches HISTORY_BUDGET of the context window,
+turns older than the last KEEP_TURNS are summarized into the system message
+(or dropped if summarizing fails). This changes the prefix once, and later
+turns are incremental again.
+"""
+import json
+import logging
+import re
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from ollamabots.common.compaction import estimate_tokens
+from ollamabots.common.config import STATE_DIR
+from ollamabots.common.thinking import apply_thinking, parse_thinking
+
+SESSION_DIR = STATE_DIR / "codegen_sessions"
+CONTEXT_TOKENS = 8192   # num_ctx requested for session turns
+HISTORY_BUDGET = 0.75   # Share of the context the history may fill before old turns are summarized
+KEEP_TURNS = 2          # Latest exchanges always kept verbatim
+KEEP_ALIVE = "30m"      # How long the host keeps the model (and its prompt cache) loaded between turns
+SUMMARY_TOKENS = 400
+
+SYSTEM_PROMPT = (
+    "You are an expert programmer working iteratively with the user on their code. "
+    "When you change code, reply with the complete updated code in one fenced code block, "
+    "followed by at most two sentences on what changed."
+)
+SUMMARY_PROMPT = (
+    "Summarize the conversation so far for your own later reference: the user's goals, the requirements "
+    "and decisions made, and errors already fixed. Do not repeat code. At most 200 words."
+)
+
+logger = logging.getLogger("CodeGenerator.session")
+
+
+def extract_code(reply: str) -> str:
+    """The largest fenced code block of a reply, or the reply itself if it has none."""
+    blocks = re.findall(r"```[\w+-]*\n(.*?)```", reply, re.S)
+    return max(blocks, key=len).rstrip() + "\n" if blocks else reply.strip() + "\n"
+
+
+class ChatSession:
+    """A persisted /api/chat conversation with one model on one host."""
+
+    def __init__(self, model: str, host: str, thinking=None, session_id: Optional[str] = None,
+                 directory: Path = SESSION_DIR, num_ctx: int = CONTEXT_TOKENS):
+        from ollamabots.common.pool import HostPool
+        self.model = model
+        self.thinking = thinking
+        self.num_ctx = num_ctx
+        self.id = session_id or datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.path = Path(directory) / f"{self.id}.jsonl"
+        self.pool = HostPool([host])
+        self.summary = ""
+        self.messages = []   # user/assistant turns, each with optional stats keys
+        self.last_code = None
+
+    # ----- Persistence -----
+    @classmethod
+    def resume(cls, session_id: str, host: str, thinking=None, directory: Path = SESSION_DIR) -> "ChatSession":
+        path = Path(directory) / f"{session_id}.jsonl"
+        if not path.exists():
+            raise FileNotFoundError(f"No saved session '{session_id}' in {directory}")
+        lines = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines() if line.strip()]
+        header = lines[0]
+        session = cls(header["model"], host, thinking, session_id, directory, header.get("num_ctx", CONTEXT_TOKENS))
+        session.summary = header.get("summary", "")
+        session.messages = lines[1:]
+        replies = [m for m in session.messages if m["role"] == "assistant"]
+        session.last_code = extract_code(replies[-1]["content"]) if replies else None
+        return session
+
+    def _header(self) -> dict:
+        return {"session": self.id, "model": self.model, "num_ctx": self.num_ctx, "summary": self.summary}
+
+    def _save(self, appended: list = None):
+        """Append the new messages, or rewrite the transcript after the history was summarized."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if appended is not None and self.path.exists():
+            with self.path.open("a", encoding="utf-8") as f:
+                f.writelines(json.dumps(m, ensure_ascii=False) + "\n" for m in appended)
+            return
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text("".join(json.dumps(m, ensure_ascii=False) + "\n" for m in [self._header(), *self.messages]),
+                       encoding="utf-8")
+        tmp.replace(self.path)
+
+    @staticmethod
+    def list_sessions(directory: Path = SESSION_DIR) -> list:
+        sessions = []
+        for path in sorted(Path(directory).glob("*.jsonl")):
+            with path.open(encoding="utf-8") as f:
+                header = json.loads(f.readline())
+                turns = sum(1 for line in f if '"role": "user"' in line)
+            sessions.append({"session": header["session"], "model": header["model"], "turns": turns})
+        return sessions
+
+    # ----- Conversation -----
+    def _chat_messages(self) -> list:
+        system = SYSTEM_PROMPT + (f"\n\nEarlier in this session:\n{self.summary}" if self.summary else "")
+        return [{"role": "system", "content": system},
+                *({"role": m["role"], "content": m["content"]} for m in self.messages)]
+
+    def _chat(self, messages: list, **options) -> dict:
+        from ollamabots.common.streaming import stream_generate
+        payload = {"model": self.model, "messages": messages, "keep_alive": KEEP_ALIVE,
+                   "options": {"num_ctx": self.num_ctx, **options}}
+        apply_thinking(payload, parse_thinking(self.thinking))
+        return stream_generate(payload, path="/api/chat", pool=self.pool)
+
+    def history_tokens(self) -> int:
+        return sum(estimate_tokens(m["content"]) for m in self._chat_messages())
+
+    def _fit_history(self, incoming: str):
+        """Summarize (or drop) old turns when the history would crowd the context window."""
+        budget = self.num_ctx * HISTORY_BUDGET
+        if self.history_tokens() + estimate_tokens(incoming) <= budget:
+            return
+        keep = 2 * KEEP_TURNS
+        old, recent = self.messages[:-keep], self.messages[-keep:]
+        if not old:
+            return
+        try:
+            data = self._chat(self._chat_messages()[:len(old) + 1] + [{"role": "user", "content": SUMMARY_PROMPT}],
+                              num_predict=SUMMARY_TOKENS)
+            summary = data["message"]["content"].strip()
+            self.summary = f"{self.summary}\n{summary}".strip() if self.summary else summary
+            logger.info(f"Summarized {len(old) // 2} old turns into {estimate_tokens(summary)} tokens")
+        except Exception as e:
+            logger.warning(f"Could not summarize old turns ({e}); dropping them")
+        self.messages = recent
+        self._save()
+
+    def send(self, text: str) -> str:
+        """One turn: send only the new message on top of the (cached) history and return the reply."""
+        self._fit_history(text)
+        user = {"role": "user", "content": text}
+        started = time.time()
+        data = self._chat(self._chat_messages() + [user])
+        reply = data["message"]["content"]
+        assistant = {"role": "assistant", "content": reply,
+                     "prefill_tokens": data.get("prompt_eval_count"), "output_tokens": data.get("eval_count"),
+                     "elapsed_s": round(time.time() - started, 2)}
+        self.messages += [user, assistant]
+        self._save([user, assistant])
+        if "```" in reply:
+            self.last_code = extract_code(reply)
+        return reply
+
+    def turns(self) -> list:
+        return [m for m in self.messages if m["role"] == "assistant"]
+
+
+REPL_HELP = """Commands:
+  /file PATH      send a file as the code to work on
+  /error TEXT     report an error (TEXT or a path to a log file)
+  /save [PATH]    write the latest code to PATH (default: the session's output file)
+  /history        show turns with prefill tokens and time
+  /help           this list
+  /quit           leave (the session is saved; resume with: ollamabots codegen session ID)
+Anything else is sent as a message."""
+
+
+def run_repl(session: ChatSession, output_dir: Path, first_file: Optional[Path] = None):
+    """Read-eval-print loop over a ChatSession; the latest code is written to output_dir after each turn."""
+    output_file = Path(output_dir) / f"session_{session.id}.py"
+    print(f"--- Session {session.id} with {session.model} "
+          f"({len(session.turns())} earlier turns; /help for commands) ---")
+
+    def turn(message: str):
+        try:
+            reply = session.send(message)
+        except Exception as e:
+            print(f"Error: {e}")
+            return
+        print(f"\n{reply}\n")
+        stats = session.turns()[-1]
+        print(f"[prefilled {stats['prefill_tokens']} tokens, generated {stats['output_tokens']} "
+              f"in {stats['elapsed_s']:.1f}s; history ~{session.history_tokens()} of {session.num_ctx} tokens]")
+        if session.last_code and "```" in reply:
+            output_file.write_text(session.last_code, encoding="utf-8")
+            print(f"[code saved to {output_file}]")
+
+    def file_message(path: Path) -> str:
+        return f"Here is the current code of {path.name}:\n\n```\n{path.read_text(encoding='utf-8')}\n```"
+
+    if first_file:
+        turn(file_message(first_file))
+
+    while True:
+        try:
+            line = input("codegen> ").strip()
+        except (EOFError, KeyboardInterrupt):
+            print()
+            break
+        if not line:
+            continue
+        command, _, argument = line.partition(" ")
+        argument = argument.strip()
+        if command in ("/quit", "/exit"):
+            break
+        elif command == "/help":
+            print(REPL_HELP)
+        elif command == "/file":
+            path = Path(argument)
+            if path.is_file():
+                turn(file_message(path))
+            else:
+                print(f"Not a file: {argument}")
+        elif command == "/error":
+            context = Path(argument).read_text(encoding="utf-8") if Path(argument).is_file() else argument
+            turn(f"Running the latest code gives this error; fix it:\n\n{context}")
+        elif command == "/save":
+            if session.last_code is None:
+                print("No code in this session yet.")
+            else:
+                target = Path(argument) if argument else output_file
+                target.write_text(session.last_code, encoding="utf-8")
+                print(f"[code saved to {target}]")
+        elif command == "/history":
+            for n, stats in enumerate(session.turns(), start=1):
+                print(f"{n:>3}. prefilled {stats.get('prefill_tokens')} tokens, "
+                      f"generated {stats.get('output_tokens')} in {stats.get('elapsed_s', 0):.1f}s")
+            if session.summary:
+                print(f"Summary of older turns:\n{session.summary}")
+        else:
+            turn(line)
+    if session.path.exists():
+        print(f"Session saved: {session.path}")
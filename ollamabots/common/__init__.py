@@ -0,0 +1 @@
+"""Helpers shared by the bots (configuration, thinking control, semantic cache)."""
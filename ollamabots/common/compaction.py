@@ -0,0 +1,210 @@
+# compaction.py
+"""
+Prompt compaction shared by the bots.
+
+Inputs are shrunk before they are put into a prompt:
+  SQL    comments are abbreviated (decoration-only comments dropped, the rest
+         cut to COMMENT_MAX_CHARS), whitespace runs collapsed, blank lines
+         dropped, and every line prefixed with its original line number
+         ("27|...") so the model's line references stay valid
+  notes  whitespace runs collapsed, blank-line runs merged, and long runs of
+         pasted log lines cut to their first and last LOG_KEEP lines (error
+         lines are kept) with a marker naming the original lines left out
+  both   consecutive duplicate lines become one line plus a repeat count
+
+Every result carries a line map (compacted line -> original line).
+CompactionReport collects the token savings per file for the end-of-run table.
+"""
+import re
+import threading
+from dataclasses import dataclass, field
+
+from ollamabots.common.streaming import CHARS_PER_TOKEN
+
+COMMENT_MAX_CHARS = 80  # Longer comments are cut to this many characters
+LOG_RUN_MIN = 12        # Consecutive log-like lines before a run is truncated
+LOG_KEEP = 4            # Lines kept at each end of a truncated log run
+LOG_KEEP_ERRORS = 6     # Error lines kept from the middle of a truncated log run
+
+_SQL_TOKENS = re.compile(r"'(?:[^']|'')*'|--[^\n]*|/\*.*?\*/", re.S)
+_LOG_LINE = re.compile(
+    r"^\s*(\[?\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}|\[?\d{2}:\d{2}:\d{2}|\[?(TRACE|DEBUG|INFO|WARN(ING)?|ERROR|FATAL)\b"
+    r"|at [\w$.<>]+\(|File \".+\", line \d+|Traceback \(most recent call last\)|\w+(\.\w+)*(Error|Exception)\b)")
+_ERROR_LINE = re.compile(r"\b(ERROR|FATAL|Exception|Error|Traceback|failed)\b")
+
+
+def estimate_tokens(text: str) -> int:
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+@dataclass
+class Compacted:
+    text: str
+    line_map: list            # original line number of each compacted line
+    original_tokens: int
+    tokens: int
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.original_tokens - self.tokens
+
+    def original_line(self, line: int) -> int:
+        """Original line number for a 1-based line of the compacted text."""
+        return self.line_map[min(max(line, 1), len(self.line_map)) - 1] if self.line_map else line
+
+
+def _abbreviate_comment(match) -> str:
+    token = match.group(0)
+    if token.startswith("'"):
+        return token
+    newlines = token.count("\n")
+    body = token[2:-2] if token.startswith("/*") else token[2:]
+    body = " ".join(body.split())
+    if not re.search(r"[A-Za-z0-9]", body):
+        return "\n" * newlines  # decoration such as -- ======
+    if len(body) > COMMENT_MAX_CHARS:
+        body = body[:COMMENT_MAX_CHARS - 1].rstrip() + "…"
+    return f"-- {body}" + "\n" * newlines
+
+
+def _collapse_repeats(lines: list) -> list:
+    """[(line_no, text)] with consecutive duplicates folded into one entry."""
+    folded = []
+    for number, text in lines:
+        if folded and folded[-1][1] == text:
+            folded[-1][2] += 1
+        else:
+            folded.append([number, text, 1])
+    return [(n, f"{t}  [×{count}]" if count > 1 else t) for n, t, count in folded]
+
+
+def compact_sql(sql_text: str, ranges: list = None, number_lines: bool = True) -> Compacted:
+    """
+    Compact SQL for a prompt, keeping only the (first, last) line ranges given.
+
+    Left-out ranges are marked with a comment naming the original lines.
+    """
+    lines = _SQL_TOKENS.sub(_abbreviate_comment, sql_text).splitlines()
+    keep = [(1, len(lines))] if ranges is None else sorted(ranges)
+
+    out, line_map, previous_end = [], [], 0
+    for first, last in keep:
+        if first > previous_end + 1 and ranges is not None:
+            out.append(f"-- [lines {previous_end + 1}-{first - 1} omitted]")
+            line_map.append(first - 1)
+        kept = []
+        for number in range(first, min(last, len(lines)) + 1):
+            raw = lines[number - 1].expandtabs(4).rstrip()
+            if not raw:
+                continue
+            indent = (len(raw) - len(raw.lstrip())) // 4
+            kept.append((number, " " * indent + " ".join(raw.split())))
+        for number, text in _collapse_repeats(kept):
+            out.append(f"{number}|{text}" if number_lines else text)
+            line_map.append(number)
+        previous_end = max(previous_end, last)
+    if ranges is not None and previous_end < len(lines):
+        out.append(f"-- [lines {previous_end + 1}-{len(lines)} omitted]")
+        line_map.append(len(lines))
+
+    text = "\n".join(out)
+    return Compacted(text, line_map, estimate_tokens(sql_text), estimate_tokens(text))
+
+
+def _truncate_log_run(run: list) -> list:
+    if len(run) < LOG_RUN_MIN:
+        return run
+    head, middle, tail = run[:LOG_KEEP], run[LOG_KEEP:-LOG_KEEP], run[-LOG_KEEP:]
+    errors = [entry for entry in middle if _ERROR_LINE.search(entry[1])][:LOG_KEEP_ERRORS]
+    kept = "; the error lines among them follow" if errors else ""
+    marker = (middle[0][0], f"[… {len(middle) - len(errors)} log lines omitted "
+                            f"(original lines {middle[0][0]}-{middle[-1][0]}){kept} …]")
+    return head + [marker] + errors + tail
+
+
+def compact_notes(notes: str, keep_blank_lines: bool = True) -> Compacted:
+    """Compact free-form notes (Markdown, pasted logs) for a prompt; blank-line runs become one (or none)."""
+    entries, run, blank = [], [], False
+    for number, raw in enumerate(notes.splitlines(), start=1):
+        stripped = raw.rstrip()
+        indent = stripped[:len(stripped) - len(stripped.lstrip())]
+        text = indent + " ".join(stripped.split()) if stripped else ""
+        if _LOG_LINE.match(text):
+            run.append((number, text))
+            blank = False
+            continue
+        entries += _truncate_log_run(run)
+        run = []
+        if not text:
+            if entries and not blank and keep_blank_lines:
+                entries.append((number, ""))
+            blank = True
+            continue
+        blank = False
+        entries.append((number, text))
+    entries += _truncate_log_run(run)
+
+    folded = _collapse_repeats(entries)
+    while folded and not folded[-1][1]:
+        folded.pop()
+    text = "\n".join(t for _, t in folded)
+    return Compacted(text, [n for n, _ in folded], estimate_tokens(notes), estimate_tokens(text))
+
+
+def group_lines(pairs) -> str:
+    """[(line, value), ...] -> "value (lines 3, 9-11), other (line 40)" in first-seen order."""
+    grouped = {}
+    for line, value in pairs:
+        grouped.setdefault(value, []).append(line)
+    return ", ".join(f"{value} ({_line_ranges(lines)})" for value, lines in grouped.items()) or "none"
+
+
+def group_messages(messages: list) -> str:
+    """Group "Line N: message" strings by message; other messages are listed once each."""
+    pairs, plain = [], []
+    for message in messages:
+        message = message.replace("⚠️", "").strip()
+        match = re.match(r"Line (\d+):\s*(.+)", message)
+        if match:
+            pairs.append((int(match.group(1)), match.group(2)))
+        elif message not in plain:
+            plain.append(message)
+    parts = plain + ([group_lines(pairs)] if pairs else [])
+    return "; ".join(parts) or "none"
+
+
+def _line_ranges(lines: list) -> str:
+    lines = sorted(set(lines))
+    spans, start = [], lines[0]
+    for previous, current in zip(lines, lines[1:] + [None]):
+        if current != previous + 1:
+            spans.append(str(start) if start == previous else f"{start}-{previous}")
+            start = current
+    return ("line " if len(lines) == 1 else "lines ") + ", ".join(spans)
+
+
+@dataclass
+class CompactionReport:
+    """Token savings per file for one run."""
+    rows: list = field(default_factory=list)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, name: str, original_tokens: int, tokens: int):
+        with self._lock:
+            self.rows.append((name, original_tokens, tokens))
+
+    def format(self) -> str:
+        if not self.rows:
+            return ""
+        width = max(len(name) for name, _, _ in self.rows)
+        lines = [f"{'file':<{width}}  {'raw':>8}  {'compact':>8}  {'saved':>8}"]
+        for name, original, tokens in self.rows:
+            lines.append(f"{name:<{width}}  {original:>8}  {tokens:>8}  {_saved(original, tokens):>8}")
+        original = sum(r[1] for r in self.rows)
+        tokens = sum(r[2] for r in self.rows)
+        lines.append(f"{'total':<{width}}  {original:>8}  {tokens:>8}  {_saved(original, tokens):>8}")
+        return "\n".join(lines)
+
+
+def _saved(original: int, tokens: int) -> str:
+    return f"{(original - tokens) / original:.0%}" if original else "-"
@@ -0,0 +1,37 @@
+# config.py
+"""
+Environment-based defaults shared by the bots.
+
+OLLAMA_HOST   Ollama API base URL (Ollama's own "host:port" form is accepted)
+OLLAMA_HOSTS  Comma-separated pool of Ollama API URLs to spread requests over
+              (see pool.py); defaults to OLLAMA_HOST alone
+OLLAMA_PATH   ollama executable used for CLI fallbacks (default: "ollama" on PATH)
+OLLAMABOTS_STATE  Folder for state kept between runs (model rates, codegen
+              sessions); default ~/.ollamabots
+"""
+import os
+from pathlib import Path
+
+
+def normalize_host(host: str) -> str:
+    host = host.strip() or "http://localhost:11434"
+    if "://" not in host:
+        host = f"http://{host}"
+    if host.startswith("http://0.0.0.0"):
+        host = host.replace("0.0.0.0", "localhost", 1)  # bind address, not a destination
+    return host.rstrip("/")
+
+
+def ollama_host() -> str:
+    return normalize_host(os.environ.get("OLLAMA_HOST", ""))
+
+
+def ollama_hosts() -> list:
+    hosts = [h for h in os.environ.get("OLLAMA_HOSTS", "").replace(";", ",").split(",") if h.strip()]
+    return [normalize_host(h) for h in hosts] or [ollama_host()]
+
+
+OLLAMA_HOST = ollama_host()
+OLLAMA_HOSTS = ollama_hosts()
+OLLAMA_PATH = os.environ.get("OLLAMA_PATH", "ollama")
+STATE_DIR = Path(os.environ.get("OLLAMABOTS_STATE", Path.home() / ".ollamabots"))
@@ -0,0 +1,274 @@
+# pool.py
+"""
+Pool of Ollama hosts shared by the bots.
+
+Each request goes to the usable host with the fewest outstanding requests from
+this process, where a host that does not have the model loaded (GET /api/ps)
+counts COLD_PENALTY extra requests, so batch runs spread over several
+inference boxes without needlessly loading models. A host that fails
+(connection error, timeout, 5xx) is ejected for EJECT_SECONDS and the request
+is retried on the next host; a host answering 404 for a model is skipped for
+that model until its next health check.
+
+A request can carry a prepare(host_url) callback that builds its body for the
+host it is sent to, which is how tuned per-host options (tuning.py) are
+applied.
+
+Hosts come from OLLAMA_HOSTS (or OLLAMA_HOST). set_hosts() replaces the pool,
+e.g. to point a run at local stand-in servers.
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from ollamabots.common.config import OLLAMA_HOSTS, normalize_host
+
+HEALTH_INTERVAL = 15   # Seconds between /api/ps checks of a host in use
+EJECT_SECONDS = 30     # How long a failed host is left out before it is probed again
+PROBE_TIMEOUT = 3      # Seconds allowed for /api/ps and /api/tags
+COLD_PENALTY = 1       # Extra outstanding requests charged to a host without the model loaded
+CONNECTIONS_PER_HOST = 16
+
+logger = logging.getLogger("ollamabots.pool")
+
+
+class Host:
+    def __init__(self, url: str):
+        self.url = normalize_host(url)
+        self.outstanding = 0
+        self.served = 0
+        self.failures = 0
+        self.loaded = set()     # models in memory according to /api/ps
+        self.missing = set()    # models this host answered 404 for
+        self.checked_at = 0.0
+        self.ejected_until = 0.0
+        self.last_used = 0
+        self.probing = False
+
+    def usable(self, now: float) -> bool:
+        return self.ejected_until <= now
+
+    def __repr__(self):
+        return f"Host({self.url}, outstanding={self.outstanding})"
+
+
+class HostPool:
+    """Least-outstanding, model-aware routing over one or more Ollama hosts."""
+
+    def __init__(self, hosts: list, connections: int = CONNECTIONS_PER_HOST):
+        if not hosts:
+            raise ValueError("A host pool needs at least one host")
+        self.hosts = [Host(url) for url in hosts]
+        self.connections = connections
+        self._lock = threading.Lock()
+        self._sequence = 0
+        self._session = None
+
+    @property
+    def session(self):
+        """Shared keep-alive session, created on first use."""
+        if self._session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=len(self.hosts), pool_maxsize=self.connections)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            self._session = session
+        return self._session
+
+    # ----- Health -----
+    def check(self, host: Host) -> bool:
+        """Probe /api/ps: refresh the loaded models, or eject the host if it does not answer."""
+        try:
+            resp = self.session.get(f"{host.url}/api/ps", timeout=PROBE_TIMEOUT)
+            resp.raise_for_status()
+            loaded = {m.get("name") or m.get("model") for m in resp.json().get("models", [])}
+        except Exception as e:
+            self._eject(host, e)
+            return False
+        finally:
+            host.probing = False
+        with self._lock:
+            if host.ejected_until:
+                logger.info(f"{host.url} is back")
+            host.loaded = loaded - {None}
+            host.missing.clear()
+            host.checked_at = time.monotonic()
+            host.ejected_until = 0.0
+        return True
+
+    def _eject(self, host: Host, error):
+        with self._lock:
+            host.failures += 1
+            host.checked_at = time.monotonic()
+            host.ejected_until = host.checked_at + EJECT_SECONDS
+        logger.warning(f"Ejecting {host.url} for {EJECT_SECONDS}s: {error}")
+
+    def _refresh(self):
+        """Probe hosts whose last check is stale or whose ejection has expired."""
+        now = time.monotonic()
+        due = []
+        with self._lock:
+            for host in self.hosts:
+                if not host.probing and host.usable(now) and now - host.checked_at >= HEALTH_INTERVAL:
+                    host.probing = True
+                    due.append(host)
+        for host in due:
+            self.check(host)
+
+    # ----- Routing -----
+    def choose(self, model: str = None, exclude=()) -> Host:
+        """Reserve the cheapest host for a request (release it with finish())."""
+        self._refresh()
+        with self._lock:
+            now = time.monotonic()
+            candidates = [h for h in self.hosts if h not in exclude and model not in h.missing]
+            # With every host ejected, trying one beats failing without a request
+            usable = [h for h in candidates if h.usable(now)] or candidates
+            if not usable:
+                return None
+            host = min(usable, key=lambda h: (
+                h.outstanding + (COLD_PENALTY if model and model not in h.loaded else 0), h.last_used))
+            self._sequence += 1
+            host.last_used = self._sequence
+            host.outstanding += 1
+            return host
+
+    def finish(self, host: Host, model: str = None, ok: bool = True):
+        with self._lock:
+            host.outstanding -= 1
+            if ok:
+                host.served += 1
+                if model:
+                    host.loaded.add(model)  # a served request leaves the model loaded
+
+    def request(self, method: str, path: str, model: str = None, **kwargs):
+        """
+        Send a request to the best host, failing over to the others.
+
+        Returns the first response that is not a 5xx (or a 404 for the model);
+        raises the last error once every host has been tried.
+        """
+        host, resp = self._send(method, path, model, **kwargs)
+        self.finish(host, model)
+        return resp
+
+    @contextmanager
+    def stream(self, path: str, model: str = None, **kwargs):
+        """
+        POST with a streamed response, failing over like request().
+
+        The host counts as busy until the block exits, so routing sees
+        long-running generations.
+        """
+        host, resp = self._send("POST", path, model, stream=True, **kwargs)
+        ok = False
+        try:
+            yield resp
+            ok = True
+        finally:
+            resp.close()
+            self.finish(host, model, ok=ok)
+
+    def _send(self, method: str, path: str, model: str = None, prepare=None, **kwargs):
+        """
+        Send to hosts in routing order until one answers; the returned host is still reserved.
+
+        prepare(host_url), if given, returns request arguments (e.g. the body) for that host.
+        """
+        import requests
+
+        tried = []
+        last_error = None
+        while len(tried) < len(self.hosts):
+            host = self.choose(model, exclude=tried)
+            if host is None:
+                break
+            tried.append(host)
+            try:
+                extra = prepare(host.url) if prepare else {}
+                resp = self.session.request(method, host.url + path, **kwargs, **extra)
+            except requests.exceptions.RequestException as e:
+                self.finish(host, ok=False)
+                self._eject(host, e)
+                last_error = e
+                continue
+
+            if resp.status_code >= 500 or (resp.status_code == 404 and model):
+                self.finish(host, ok=False)
+                last_error = requests.exceptions.HTTPError(
+                    f"{resp.status_code} from {host.url}: {resp.text[:200]}", response=resp)
+                resp.close()
+                if resp.status_code == 404:
+                    with self._lock:
+                        host.missing.add(model)
+                else:
+                    self._eject(host, last_error)
+                continue
+
+            return host, resp
+        if last_error is None:
+            # No host was tried: each one has already answered 404 for the model
+            raise requests.exceptions.ConnectionError(
+                f"Model '{model}' was not found on any Ollama host ({', '.join(h.url for h in self.hosts)})")
+        raise last_error
+
+    def post(self, path: str, model: str = None, **kwargs):
+        return self.request("POST", path, model, **kwargs)
+
+    # ----- Models -----
+    def ensure_model(self, model: str, pull_timeout: int = 3600) -> dict:
+        """Pull the model on every reachable host that lacks it; returns {url: status}."""
+        wanted = {model, model if ":" in model else f"{model}:latest"}
+        status = {}
+        for host in self.hosts:
+            try:
+                resp = self.session.get(f"{host.url}/api/tags", timeout=PROBE_TIMEOUT)
+                resp.raise_for_status()
+                names = {m.get("name") or m.get("model") for m in resp.json().get("models", [])}
+                if wanted & names:
+                    status[host.url] = "present"
+                    continue
+                resp = self.session.post(f"{host.url}/api/pull", json={"model": model, "stream": False},
+                                         timeout=pull_timeout)
+                resp.raise_for_status()
+                status[host.url] = "pulled"
+            except Exception as e:
+                self._eject(host, e)
+                status[host.url] = "unreachable"
+        return status
+
+    def parallelism(self, model: str) -> int:
+        """Requests to keep in flight across the pool: each host's tuned parallelism for the model."""
+        from ollamabots.common.tuning import parallelism
+        return sum(parallelism(model, h.url) for h in self.hosts)
+
+    def stats(self) -> list:
+        now = time.monotonic()
+        with self._lock:
+            return [{"host": h.url, "healthy": h.usable(now), "outstanding": h.outstanding,
+                     "served": h.served, "failures": h.failures, "loaded": sorted(h.loaded)}
+                    for h in self.hosts]
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> HostPool:
+    """The process-wide pool, built from OLLAMA_HOSTS on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = HostPool(OLLAMA_HOSTS)
+        return _pool
+
+
+def set_hosts(hosts: list) -> HostPool:
+    """Replace the process-wide pool."""
+    global _pool
+    with _pool_lock:
+        _pool = HostPool(list(hosts))
+        return _pool
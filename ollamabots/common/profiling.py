@@ -0,0 +1,180 @@
+# profiling.py
+"""
+Opt-in profiling and phase tracing shared by the bots.
+
+  --profile FILE  run the command under cProfile, dump pstats to FILE and print
+                  the top functions by cumulative time (main thread only)
+  --trace FILE    record named spans (read, static analysis, prefill, decode,
+                  postprocess, write, ...) and save them as Chrome trace events,
+                  viewable in chrome://tracing or https://ui.perfetto.dev
+
+Both are handled by the ollamabots CLI for every command. When tracing is off,
+span() returns a shared no-op context manager, so instrumented code pays one
+global lookup per span.
+
+Model phases come from Ollama's own timings (load_duration,
+prompt_eval_duration, eval_duration) and are laid out backwards from the end of
+the request, since the server reports durations rather than timestamps.
+"""
+import json
+import os
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+PROFILE_TOP = 25  # functions printed after a --profile run
+
+_tracer = None
+_NO_SPAN = nullcontext()
+
+now_ns = time.perf_counter_ns  # monotonic and system-wide, so process-pool workers can report spans too
+
+
+class Tracer:
+    """Collects complete ("X") trace events in memory until save()."""
+
+    def __init__(self):
+        self.events = []
+        self.origin = now_ns()
+        self._lock = threading.Lock()
+        self._threads = set()
+
+    def record(self, name: str, start_ns: int, end_ns: int, cat: str = "phase", args: dict = None,
+               pid: int = None, tid: int = None):
+        event = {
+            "name": name,
+            "cat": cat,
+            "ph": "X",
+            "ts": (start_ns - self.origin) / 1000,
+            "dur": max(end_ns - start_ns, 0) / 1000,
+            "pid": pid if pid is not None else os.getpid(),
+            "tid": tid if tid is not None else threading.get_ident(),
+        }
+        if args:
+            event["args"] = args
+        with self._lock:
+            self.events.append(event)
+            if tid is None and event["tid"] not in self._threads:
+                self._threads.add(event["tid"])
+                self.events.append({"name": "thread_name", "ph": "M", "pid": event["pid"], "tid": event["tid"],
+                                    "args": {"name": threading.current_thread().name}})
+
+    def save(self, path: Path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            trace = {"traceEvents": list(self.events), "displayTimeUnit": "ms"}
+        path.write_text(json.dumps(trace), encoding="utf-8")
+        return path
+
+
+class _Span:
+    __slots__ = ("name", "cat", "args", "start")
+
+    def __init__(self, name: str, cat: str, args: dict):
+        self.name, self.cat, self.args = name, cat, args
+
+    def __enter__(self):
+        self.start = now_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        _tracer.record(self.name, self.start, now_ns(), self.cat, self.args)
+        return False
+
+
+def tracing() -> bool:
+    return _tracer is not None
+
+
+def span(name: str, cat: str = "phase", **args):
+    """Time a block as a trace span; a shared no-op when tracing is off."""
+    if _tracer is None:
+        return _NO_SPAN
+    return _Span(name, cat, args)
+
+
+def record(name: str, start_ns: int, end_ns: int, cat: str = "phase", pid: int = None, **args):
+    """Record a span measured elsewhere (e.g. in a worker process, with now_ns())."""
+    if _tracer is not None:
+        _tracer.record(name, start_ns, end_ns, cat, args, pid=pid, tid=0 if pid is not None else None)
+
+
+def model_spans(timings: dict, end_ns: int = None, **args):
+    """Record load/prefill/decode spans from Ollama's response timings (nanoseconds)."""
+    if _tracer is None or not timings:
+        return
+    end = end_ns if end_ns is not None else now_ns()
+    phases = [
+        ("decode", timings.get("eval_duration", 0), {"tokens": timings.get("eval_count")}),
+        ("prefill", timings.get("prompt_eval_duration", 0), {"tokens": timings.get("prompt_eval_count")}),
+        ("load", timings.get("load_duration", 0), {}),
+    ]
+    for name, duration, extra in phases:
+        if duration:
+            details = {**args, **{k: v for k, v in extra.items() if v is not None}}
+            _tracer.record(name, end - duration, end, "model", details)
+            end -= duration
+
+
+_VERBOSE_FIELDS = {
+    "load duration": "load_duration",
+    "prompt eval count": "prompt_eval_count",
+    "prompt eval duration": "prompt_eval_duration",
+    "eval count": "eval_count",
+    "eval duration": "eval_duration",
+}
+_DURATION_UNITS = {"h": 3600e9, "m": 60e9, "s": 1e9, "ms": 1e6, "µs": 1e3, "us": 1e3, "ns": 1}
+
+
+def _parse_duration(text: str) -> int:
+    """Parse a Go duration ("1m2.5s", "812.3ms") into nanoseconds."""
+    return int(sum(float(value) * _DURATION_UNITS[unit]
+                   for value, unit in re.findall(r"([\d.]+)(h|ms|µs|us|ns|m|s)", text)))
+
+
+def parse_verbose_timings(stderr: str) -> dict:
+    """Timings printed by `ollama run --verbose`, in the same keys/units as the API."""
+    timings = {}
+    for line in stderr.splitlines():
+        name, _, value = line.partition(":")
+        key = _VERBOSE_FIELDS.get(name.strip().lower())
+        if key:
+            value = value.strip()
+            timings[key] = _parse_duration(value) if key.endswith("duration") else int(value.split()[0])
+    return timings
+
+
+def print_profile(profiler, path: Path, top: int = PROFILE_TOP):
+    import pstats
+    profiler.dump_stats(str(path))
+    print(f"\n[profile] saved to {path} (top {top} by cumulative time)", file=sys.stderr)
+    pstats.Stats(profiler, stream=sys.stderr).sort_stats("cumulative").print_stats(top)
+
+
+@contextmanager
+def session(profile: Path = None, trace: Path = None):
+    """Profile and/or trace everything run inside the block, saving on exit (including sys.exit)."""
+    global _tracer
+    profiler = None
+    if trace:
+        _tracer = Tracer()
+    if profile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            print_profile(profiler, profile)
+        if _tracer is not None:
+            saved = _tracer.save(trace)
+            print(f"[trace] {len(_tracer.events)} events saved to {saved}", file=sys.stderr)
+            _tracer = None
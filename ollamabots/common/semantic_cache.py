@@ -0,0 +1,196 @@
+# semantic_cache.py
+"""
+Embedding-based response cache shared by the bots.
+
+Inputs are embedded through Ollama's /api/embed endpoint (routed by the host
+pool) and kept in a small NumPy matrix. A lookup returns the stored result of the most similar earlier
+input when its cosine similarity clears the threshold, so near-duplicate notes
+and cloned stored procedures reuse a previous answer instead of a model call.
+
+Entries live in <cache_dir>/<namespace>.npy (vectors) and <namespace>.json
+(results + metadata). The least recently used entries are evicted once
+max_entries is reached. Hits and new entries only change the cache in memory;
+save() writes it once, at the end of a run.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+import numpy as np
+import requests
+
+from ollamabots.common.pool import get_pool
+
+# ===== Defaults =====
+EMBED_MODEL = "nomic-embed-text"
+THRESHOLD = 0.97
+MAX_ENTRIES = 5000
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def cache_note(hit: dict) -> str:
+    """Markdown comment recording where a cached result came from."""
+    return (f"<!-- semantic-cache: reused result of '{hit['source']}' "
+            f"(similarity {hit['score']:.3f}) -->")
+
+
+class SemanticCache:
+    """Cosine-similarity cache over embedded inputs, persisted per namespace."""
+
+    def __init__(self, cache_dir: Path, namespace: str,
+                 threshold: float = THRESHOLD,
+                 embed_model: str = EMBED_MODEL,
+                 max_entries: int = MAX_ENTRIES,
+                 top_k: int = 3):
+        self.cache_dir = Path(cache_dir)
+        self.namespace = namespace.replace(":", "_").replace("/", "_")
+        self.threshold = threshold
+        self.embed_model = embed_model
+        self.max_entries = max_entries
+        self.top_k = top_k
+        self._lock = threading.Lock()
+        self._dirty = False  # entries changed since the last save()
+        self.vectors = np.zeros((0, 0), dtype=np.float32)
+        self.entries = []  # parallel to self.vectors rows
+        self._load()
+
+    # ----- Persistence -----
+    @property
+    def _vectors_path(self) -> Path:
+        return self.cache_dir / f"{self.namespace}.npy"
+
+    @property
+    def _entries_path(self) -> Path:
+        return self.cache_dir / f"{self.namespace}.json"
+
+    def _load(self):
+        if not (self._vectors_path.exists() and self._entries_path.exists()):
+            return
+        try:
+            vectors = np.load(self._vectors_path)
+            entries = json.loads(self._entries_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return  # Corrupt cache files are treated as an empty cache
+        if len(entries) == len(vectors):
+            self.vectors = vectors.astype(np.float32, copy=False)
+            self.entries = entries
+
+    def save(self):
+        """Atomically write vectors and entries to disk if they changed since the last save."""
+        with self._lock:
+            if not self._dirty:
+                return
+            self._dirty = False
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_vectors = self._vectors_path.with_suffix(".tmp.npy")
+            tmp_entries = self._entries_path.with_suffix(".tmp.json")
+            np.save(tmp_vectors, self.vectors)
+            tmp_entries.write_text(json.dumps(self.entries), encoding="utf-8")
+            os.replace(tmp_vectors, self._vectors_path)
+            os.replace(tmp_entries, self._entries_path)
+
+    # ----- Embedding -----
+    def embed(self, text: str) -> np.ndarray:
+        """Embed text with Ollama and return a unit-length float32 vector."""
+        resp = get_pool().post(
+            "/api/embed", self.embed_model,
+            json={"model": self.embed_model, "input": text},
+            timeout=120,
+        )
+        resp.raise_for_status()
+        vector = np.asarray(resp.json()["embeddings"][0], dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    # ----- Lookup / insert -----
+    def search(self, vector: np.ndarray) -> list:
+        """Return up to top_k (score, index) pairs, best first."""
+        if not self.entries or self.vectors.shape[1] != vector.shape[0]:
+            return []
+        scores = self.vectors @ vector
+        k = min(self.top_k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        return sorted(((float(scores[i]), int(i)) for i in top), reverse=True)
+
+    def lookup(self, text: str, adapt: Optional[Callable[[str, dict], str]] = None):
+        """
+        Find a cached result for text.
+
+        Returns (hit, vector). hit is None on a miss, otherwise a dict with
+        "result", "source", "score" and "exact". The vector can be passed to
+        add() so a miss does not embed the same input twice. adapt(result, entry)
+        may rewrite the reused result (e.g. swap file names).
+        """
+        key = content_hash(text)
+        hit = None
+        vector = None
+        with self._lock:
+            for entry in self.entries:
+                if entry["key"] == key:
+                    hit = self._hit(entry, 1.0, True, adapt)
+                    break
+
+        if hit is None:
+            try:
+                vector = self.embed(text)
+            except (requests.exceptions.RequestException, KeyError, ValueError) as e:
+                # The cache is an optimisation: without embeddings just fall through to the model
+                logging.warning(f"Semantic cache embedding failed ({e}); skipping cache")
+                return None, None
+            with self._lock:
+                for score, index in self.search(vector):
+                    if score >= self.threshold:
+                        hit = self._hit(self.entries[index], score, False, adapt)
+                    break
+
+        if hit is not None:
+            logging.info(f"Semantic cache hit: '{hit['source']}' (similarity {hit['score']:.3f})")
+        return hit, vector
+
+    def _hit(self, entry: dict, score: float, exact: bool, adapt) -> dict:
+        entry["last_used"] = time.time()  # for eviction
+        entry["hits"] = entry.get("hits", 0) + 1
+        self._dirty = True
+        result = entry["result"]
+        if adapt is not None:
+            result = adapt(result, entry)
+        return {"result": result, "source": entry["source"], "score": score, "exact": exact}
+
+    def add(self, text: str, result: str, source: str, vector: Optional[np.ndarray] = None):
+        """Store a fresh result for text (written to disk by the next save())."""
+        if vector is None:
+            try:
+                vector = self.embed(text)
+            except (requests.exceptions.RequestException, KeyError, ValueError) as e:
+                logging.warning(f"Semantic cache embedding failed ({e}); result not cached")
+                return
+        now = time.time()
+        entry = {"key": content_hash(text), "source": source, "result": result,
+                 "created": now, "last_used": now, "hits": 0}
+        with self._lock:
+            if self.vectors.shape[1] != vector.shape[0]:
+                # Embedding model changed: old vectors are not comparable
+                self.vectors = np.zeros((0, vector.shape[0]), dtype=np.float32)
+                self.entries = []
+            self.vectors = np.vstack([self.vectors, vector[None, :]])
+            self.entries.append(entry)
+            self._evict()
+            self._dirty = True
+
+    def _evict(self):
+        """Drop least recently used entries beyond max_entries."""
+        overflow = len(self.entries) - self.max_entries
+        if overflow <= 0:
+            return
+        order = sorted(range(len(self.entries)), key=lambda i: self.entries[i]["last_used"])
+        keep = sorted(order[overflow:])
+        self.vectors = self.vectors[keep]
+        self.entries = [self.entries[i] for i in keep]
@@ -0,0 +1,369 @@
+# streaming.py
+"""
+Guarded, streamed model calls shared by the bots.
+
+Instead of one fixed 20-minute timeout, every request streams its tokens and
+is watched against deadlines predicted from the prompt size and the prefill
+and decode rates previously measured for the model:
+
+  first token  load + prefill time, times PREDICT_SAFETY
+  stall        no new chunk for the time STALL_TOKENS tokens should take
+  total        first token + expected output tokens, times PREDICT_SAFETY
+
+Output that degenerates into a loop is cut off as soon as it is seen. An
+aborted request is retried (up to MAX_ATTEMPTS) with adjusted options: a
+stall or missed deadline gets twice the time, a loop gets a stronger
+repeat_penalty and a higher temperature. When every attempt fails,
+GenerationAborted carries the reason and the partial text (for a loop, the
+text before it), so a looped answer is never returned as a success.
+The result of a streamed call has
+the same shape as a non-streamed response, so callers are unchanged.
+Options tuned for the model on the chosen host (tuning.py) are filled in
+when the request is sent.
+
+Measured rates are kept per model in RATES_FILE. Until a model has history,
+the windows fall back to DEFAULT_FIRST_TOKEN / DEFAULT_STALL / MAX_DEADLINE.
+"""
+import json
+import logging
+import math
+import os
+import socket
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Optional
+
+from ollamabots.common.config import STATE_DIR
+from ollamabots.common.profiling import model_spans, now_ns, span
+from ollamabots.common.tuning import apply_profile
+
+# ===== Deadlines =====
+PREDICT_SAFETY = 3.0      # Predicted time is multiplied by this
+DEADLINE_SLACK = 20       # Seconds added to every predicted window
+MIN_DEADLINE = 30         # Shortest total deadline
+MAX_DEADLINE = 1200       # Longest total deadline (the old fixed timeout)
+DEFAULT_FIRST_TOKEN = 300 # First-token window for a model without history
+DEFAULT_STALL = 60        # Stall window for a model without history
+MIN_STALL = 10
+STALL_TOKENS = 50         # Stall window = time to decode this many tokens
+DEFAULT_OUTPUT_TOKENS = 1024
+CHARS_PER_TOKEN = 4       # Prompt size estimate
+IMAGE_TOKENS = 1300       # Prompt tokens per image for vision models
+CONNECT_TIMEOUT = 10
+
+# ===== Retries and repetition =====
+MAX_ATTEMPTS = 3
+REPEAT_MIN_CHARS = 400    # A loop must cover this much output ...
+REPEAT_MIN_COUNT = 4      # ... with at least this many repeats of its period
+REPEAT_MAX_PERIOD = 200   # Longest repeated unit looked for (characters)
+REPEAT_CHECK_EVERY = 200  # Characters of new output between checks
+
+RATES_FILE = STATE_DIR / "model_rates.json"
+RATE_SMOOTHING = 0.3      # Weight of the newest measurement
+
+logger = logging.getLogger("ollamabots.streaming")
+
+
+class GenerationAborted(RuntimeError):
+    """Raised when every attempt stalled, ran past its deadline or looped."""
+
+    def __init__(self, reason: str, text: str = ""):
+        super().__init__(reason)
+        self.reason = reason
+        self.text = text
+
+
+# ===== Rate history =====
+class ModelRates:
+    """Smoothed prefill/decode rates and output lengths per model, persisted as JSON."""
+
+    def __init__(self, path: Path = RATES_FILE):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._rates = None
+
+    def _load(self) -> dict:
+        if self._rates is None:
+            try:
+                self._rates = json.loads(self.path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                self._rates = {}
+        return self._rates
+
+    def get(self, model: str) -> Optional[dict]:
+        with self._lock:
+            return self._load().get(model)
+
+    def update(self, model: str, data: dict):
+        """Fold the timings of a finished response into the model's history."""
+        sample = {}
+        if data.get("prompt_eval_count") and data.get("prompt_eval_duration"):
+            sample["prefill_tps"] = data["prompt_eval_count"] / (data["prompt_eval_duration"] / 1e9)
+        if data.get("eval_count") and data.get("eval_duration"):
+            sample["decode_tps"] = data["eval_count"] / (data["eval_duration"] / 1e9)
+        if data.get("eval_count"):
+            sample["output_tokens"] = data["eval_count"]
+        if not sample:
+            return
+        sample["load_s"] = data.get("load_duration", 0) / 1e9
+
+        with self._lock:
+            rates = self._load()
+            current = rates.get(model)
+            if current is None:
+                current = dict(sample, max_output_tokens=sample.get("output_tokens", 0), samples=0)
+            else:
+                for key, value in sample.items():
+                    old = current.get(key)
+                    current[key] = value if old is None else old + RATE_SMOOTHING * (value - old)
+                current["max_output_tokens"] = max(current.get("max_output_tokens", 0),
+                                                   sample.get("output_tokens", 0))
+            current["samples"] += 1
+            rates[model] = current
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = self.path.with_suffix(".tmp")
+                tmp.write_text(json.dumps(rates, indent=1), encoding="utf-8")
+                os.replace(tmp, self.path)
+            except OSError as e:
+                logger.warning(f"Could not save model rates to {self.path}: {e}")
+
+
+rates = ModelRates()
+
+
+@dataclass
+class Deadlines:
+    first_token: float
+    stall: float
+    total: float
+
+    def scaled(self, factor: float, ceiling: float) -> "Deadlines":
+        return Deadlines(min(self.first_token * factor, ceiling), min(self.stall * factor, ceiling),
+                         min(self.total * factor, ceiling))
+
+
+def estimate_prompt_tokens(payload: dict, images: int = 0) -> int:
+    text = payload.get("prompt") or ""
+    text += "".join(str(m.get("content", "")) for m in payload.get("messages", []))
+    images += len(payload.get("images", []))
+    images += sum(len(m.get("images", [])) for m in payload.get("messages", []))
+    return math.ceil(len(text) / CHARS_PER_TOKEN) + images * IMAGE_TOKENS
+
+
+def predict_deadlines(model: str, prompt_tokens: int, max_tokens: int = None,
+                      ceiling: float = MAX_DEADLINE, history: ModelRates = None) -> Deadlines:
+    """Deadlines for one request from the model's measured rates (defaults without history)."""
+    measured = (history or rates).get(model)
+    if not measured or not measured.get("prefill_tps") or not measured.get("decode_tps"):
+        return Deadlines(min(DEFAULT_FIRST_TOKEN, ceiling), min(DEFAULT_STALL, ceiling), ceiling)
+
+    first_token = measured.get("load_s", 0) + prompt_tokens / measured["prefill_tps"]
+    token_s = 1 / measured["decode_tps"]
+    output_tokens = max_tokens or max(2 * measured.get("output_tokens", 0),
+                                      measured.get("max_output_tokens", 0), DEFAULT_OUTPUT_TOKENS)
+    first_token_window = PREDICT_SAFETY * first_token + DEADLINE_SLACK
+    total = PREDICT_SAFETY * (first_token + output_tokens * token_s) + DEADLINE_SLACK
+    return Deadlines(
+        first_token=min(first_token_window, ceiling),
+        stall=min(max(MIN_STALL, PREDICT_SAFETY * STALL_TOKENS * token_s), ceiling),
+        total=min(max(total, MIN_DEADLINE, first_token_window), ceiling),
+    )
+
+
+def predict_timeout(payload: dict, ceiling: float = MAX_DEADLINE, images: int = 0) -> float:
+    """Overall deadline for a non-streamed call (e.g. the CLI fallbacks)."""
+    options = payload.get("options", {})
+    return predict_deadlines(payload["model"], estimate_prompt_tokens(payload, images),
+                             options.get("num_predict"), ceiling).total
+
+
+# ===== Repetition =====
+def find_repetition(text: str, min_chars: int = REPEAT_MIN_CHARS, min_count: int = REPEAT_MIN_COUNT,
+                    max_period: int = REPEAT_MAX_PERIOD) -> Optional[int]:
+    """
+    If text ends in a loop (one unit repeated back to back), return where the
+    loop starts, keeping the first occurrence of the unit; otherwise None.
+    """
+    for period in range(1, min(max_period, len(text) // min_count) + 1):
+        repeats = max(min_count, math.ceil(min_chars / period))
+        span_chars = period * repeats
+        if span_chars > len(text):
+            continue
+        unit = text[-period:]
+        if text.endswith(unit * repeats):
+            start = len(text) - span_chars
+            while start >= period and text[start - period:start] == unit:
+                start -= period
+            return start + period
+    return None
+
+
+# ===== Watchdog =====
+def _shutdown(resp):
+    """Interrupt a blocked read on a streamed response from another thread."""
+    connection = getattr(resp.raw, "connection", None) or getattr(resp.raw, "_connection", None)
+    sock = getattr(connection, "sock", None)
+    try:
+        if sock is not None:
+            sock.shutdown(socket.SHUT_RDWR)
+        else:
+            resp.close()
+    except OSError:
+        pass
+
+
+class _Watchdog(threading.Thread):
+    TICK = 0.25
+
+    def __init__(self, resp, deadlines: Deadlines):
+        super().__init__(daemon=True)
+        self.resp = resp
+        self.deadlines = deadlines
+        self.started = self.last_chunk = time.monotonic()
+        self.first_token = False
+        self.reason = None
+        self._done = threading.Event()
+
+    def progress(self):
+        self.last_chunk = time.monotonic()
+        self.first_token = True
+
+    def run(self):
+        while not self._done.wait(self.TICK):
+            now = time.monotonic()
+            if now - self.started > self.deadlines.total:
+                self.reason = f"deadline of {self.deadlines.total:.0f}s exceeded"
+            elif not self.first_token and now - self.started > self.deadlines.first_token:
+                self.reason = f"no first token within {self.deadlines.first_token:.0f}s"
+            elif self.first_token and now - self.last_chunk > self.deadlines.stall:
+                self.reason = f"stalled for {self.deadlines.stall:.0f}s"
+            else:
+                continue
+            _shutdown(self.resp)
+            return
+
+    def stop(self):
+        self._done.set()
+
+
+# ===== Streamed generation =====
+def _read_stream(resp, watchdog: _Watchdog) -> tuple:
+    """Collect a streamed response; returns (final chunk, answer text, thinking text, loop start)."""
+    import requests
+
+    answer, thinking = [], []
+    answer_chars = thinking_chars = checked = 0
+    final = {}
+    try:
+        for line in resp.iter_lines(chunk_size=None):  # yield chunks as they arrive
+            if not line:
+                continue
+            chunk = json.loads(line)
+            if "error" in chunk:
+                raise requests.exceptions.HTTPError(chunk["error"], response=resp)
+            message = chunk.get("message") or {}
+            text = chunk.get("response") or message.get("content") or ""
+            thought = chunk.get("thinking") or message.get("thinking") or ""
+            if text or thought or chunk.get("done"):
+                watchdog.progress()
+            if text:
+                answer.append(text)
+                answer_chars += len(text)
+            if thought:
+                thinking.append(thought)
+                thinking_chars += len(thought)
+            if chunk.get("done"):
+                final = chunk
+                break
+            if answer_chars + thinking_chars - checked >= REPEAT_CHECK_EVERY:
+                checked = answer_chars + thinking_chars
+                for parts, which in ((answer, "answer"), (thinking, "thinking")):
+                    joined = "".join(parts)
+                    loop = find_repetition(joined)
+                    if loop is not None:
+                        parts[:] = [joined[:loop]]
+                        return final, "".join(answer), "".join(thinking), which
+    except (requests.exceptions.ChunkedEncodingError, requests.exceptions.ConnectionError, ValueError):
+        if watchdog.reason is None:
+            raise
+    return final, "".join(answer), "".join(thinking), None
+
+
+def _as_response(final: dict, answer: str, thinking: str, chat: bool) -> dict:
+    """Shape streamed output like a non-streamed /api/generate or /api/chat response."""
+    result = {k: v for k, v in final.items() if k not in ("response", "message", "thinking")}
+    if chat:
+        result["message"] = {"role": "assistant", "content": answer}
+        if thinking:
+            result["message"]["thinking"] = thinking
+    else:
+        result["response"] = answer
+        if thinking:
+            result["thinking"] = thinking
+    return result
+
+
+def _adjust_for_loop(payload: dict):
+    options = payload.setdefault("options", {})
+    options["repeat_penalty"] = round(options.get("repeat_penalty", 1.1) + 0.15, 2)
+    options["repeat_last_n"] = max(options.get("repeat_last_n", 64), 256)
+    options["temperature"] = round(max(options.get("temperature", 0.0) + 0.2, 0.3), 2)
+
+
+def stream_generate(payload: dict, path: str = "/api/generate",
+                    body_factory: Optional[Callable[[dict], object]] = None, images: int = 0,
+                    ceiling: float = MAX_DEADLINE, pool=None) -> dict:
+    """
+    Run a generate/chat request as a guarded stream and return it in non-streamed form.
+
+    body_factory(payload) builds the request body when it is not plain JSON
+    (e.g. streamed image bodies); it is called again for every attempt.
+    Raises GenerationAborted when every attempt fails, requests errors when
+    no host answers.
+    """
+    if pool is None:
+        from ollamabots.common.pool import get_pool
+        pool = get_pool()
+
+    payload = dict(payload, stream=True, options=dict(payload.get("options", {})))
+    model = payload["model"]
+    prompt_tokens = estimate_prompt_tokens(payload, images)
+    deadlines = predict_deadlines(model, prompt_tokens, payload["options"].get("num_predict"), ceiling)
+    chat = path.endswith("/chat")
+    reason, partial = None, ""
+
+    def body(host: str) -> dict:
+        tuned = apply_profile(payload, host, prompt_tokens)
+        if body_factory:
+            return {"data": body_factory(tuned), "headers": {"Content-Type": "application/json"}}
+        return {"json": tuned}
+
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        with span("model", model=model, attempt=attempt), \
+                pool.stream(path, model, timeout=(CONNECT_TIMEOUT, deadlines.total), prepare=body) as resp:
+            resp.raise_for_status()
+            watchdog = _Watchdog(resp, deadlines)
+            watchdog.start()
+            try:
+                final, answer, thinking, loop = _read_stream(resp, watchdog)
+            finally:
+                watchdog.stop()
+            received = now_ns()
+
+        if final.get("done") and loop is None:
+            rates.update(model, final)
+            model_spans(final, end_ns=received, model=model)
+            return _as_response(final, answer, thinking, chat)
+
+        partial = answer
+        reason = f"repetition loop in the {loop}" if loop else watchdog.reason or "stream ended early"
+        logger.warning(f"{model}: attempt {attempt}/{MAX_ATTEMPTS} aborted ({reason}) "
+                       f"after {len(answer)} chars")
+        if loop:
+            _adjust_for_loop(payload)
+        else:
+            deadlines = deadlines.scaled(2, ceiling)
+    raise GenerationAborted(reason, partial)
@@ -0,0 +1,88 @@
+# thinking.py
+"""
+Reasoning ("thinking") control shared by the bots.
+
+A setting is one of:
+  None / "default"  leave the server default alone (use for models without thinking)
+  "off"             think=false: no reasoning tokens are generated at all
+  "on"              think=true: reasoning is generated and returned separately
+  "<N>"             think=true, with num_predict capped at N reasoning tokens
+                    plus the answer allowance
+
+Ollama has no native reasoning budget, so a budget is enforced through the
+total num_predict limit. The CLI fallback can only hide or disable thinking.
+"""
+from typing import Union
+
+ThinkingSetting = Union[None, bool, int]
+
+ANSWER_TOKENS = 2048  # num_predict allowance for the answer on top of a thinking budget
+
+
+def parse_thinking(value) -> ThinkingSetting:
+    """Parse "off", "on", a token budget or None/"default" into a setting."""
+    if value is None or isinstance(value, (bool, int)):
+        return value
+    value = str(value).strip().lower()
+    if value in ("", "default"):
+        return None
+    if value in ("off", "false", "no"):
+        return False
+    if value in ("on", "true", "yes"):
+        return True
+    if value.isdigit():
+        return int(value)
+    raise ValueError(f"Invalid thinking setting '{value}' (use off, on or a token budget)")
+
+
+def apply_thinking(payload: dict, setting: ThinkingSetting, answer_tokens: int = ANSWER_TOKENS) -> dict:
+    """Set "think" (and num_predict for a budget) on an /api/generate or /api/chat payload."""
+    if setting is None:
+        return payload
+    if setting is False:
+        payload["think"] = False
+    elif setting is True:
+        payload["think"] = True
+    else:
+        payload["think"] = True
+        options = payload.setdefault("options", {})
+        options["num_predict"] = setting + answer_tokens
+    return payload
+
+
+def cli_flags(setting: ThinkingSetting) -> list:
+    """Equivalent flags for `ollama run` (budgets cannot be enforced there)."""
+    if setting is False:
+        return ["--think=false"]
+    return ["--hidethinking"]
+
+
+def thinking_metrics(data: dict) -> dict:
+    """
+    Split the generated tokens of a non-streamed response into thinking and answer.
+
+    Ollama only reports the total (eval_count), so the split is proportional to
+    the length of the returned "thinking" and "response" texts.
+    """
+    total = data.get("eval_count", 0)
+    thinking_text = data.get("thinking") or data.get("message", {}).get("thinking") or ""
+    answer_text = data.get("response") or data.get("message", {}).get("content") or ""
+    chars = len(thinking_text) + len(answer_text)
+    thinking_tokens = round(total * len(thinking_text) / chars) if chars else 0
+    eval_s = data.get("eval_duration", 0) / 1e9
+    return {
+        "eval_tokens": total,
+        "thinking_tokens": thinking_tokens,
+        "answer_tokens": total - thinking_tokens,
+        "eval_s": round(eval_s, 2),
+        "thinking_s": round(eval_s * thinking_tokens / total, 2) if total else 0.0,
+        "truncated": data.get("done_reason") == "length",
+    }
+
+
+def format_metrics(metrics: dict) -> str:
+    text = (f"{metrics['eval_tokens']} tokens generated: {metrics['thinking_tokens']} thinking "
+            f"(~{metrics['thinking_s']:.1f}s), {metrics['answer_tokens']} answer")
+    if metrics["truncated"]:
+        text += " [hit num_predict limit]"
+    return text
@@ -0,0 +1,98 @@
+# tuning.py
+"""
+Runtime profiles: Ollama options tuned per model and host.
+
+`ollamabots autotune` measures candidate values of num_thread, num_batch and
+num_ctx, and how many requests to keep in flight, then saves the best
+combination per model and host in PROFILES_FILE. Every streamed model call
+applies the profile of the host it is sent to (options the caller sets
+explicitly win), and folder runs default to the tuned number of requests in
+flight per host.
+
+All three options are load-time options: a request that changes them makes
+Ollama reload the model, so a profile is applied to every request the same
+way. The one exception is num_ctx. If a request's prompt and expected output
+would not fit the tuned context, the tuned num_ctx is left out. A reload is
+cheaper than a truncated prompt.
+"""
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Optional
+
+from ollamabots.common.config import STATE_DIR, normalize_host
+
+PROFILES_FILE = STATE_DIR / "runtime_profiles.json"
+TUNED_OPTIONS = ("num_thread", "num_batch", "num_ctx")
+OUTPUT_ALLOWANCE = 1024  # Output tokens assumed when checking a request fits the tuned num_ctx
+
+logger = logging.getLogger("ollamabots.tuning")
+
+
+class RuntimeProfiles:
+    """Tuned options and parallelism per model and host, persisted as JSON."""
+
+    def __init__(self, path: Path = PROFILES_FILE):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._profiles = None
+
+    @staticmethod
+    def key(model: str, host: str) -> str:
+        return f"{model}@{normalize_host(host)}"
+
+    def _load(self) -> dict:
+        if self._profiles is None:
+            try:
+                self._profiles = json.loads(self.path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                self._profiles = {}
+        return self._profiles
+
+    def get(self, model: str, host: str) -> Optional[dict]:
+        with self._lock:
+            return self._load().get(self.key(model, host))
+
+    def all(self) -> dict:
+        with self._lock:
+            return dict(self._load())
+
+    def save(self, model: str, host: str, profile: dict):
+        with self._lock:
+            profiles = self._load()
+            profiles[self.key(model, host)] = profile
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(profiles, indent=1), encoding="utf-8")
+            os.replace(tmp, self.path)
+
+
+profiles = RuntimeProfiles()
+
+
+def apply_profile(payload: dict, host: str, prompt_tokens: int = 0) -> dict:
+    """
+    The payload with the host's tuned options for its model filled in.
+
+    Returns the payload itself when there is no profile; never changes it in place.
+    """
+    profile = profiles.get(payload.get("model", ""), host)
+    if not profile:
+        return payload
+    options = dict(payload.get("options", {}))
+    for name, value in profile.get("options", {}).items():
+        if name == "num_ctx" and "num_ctx" not in options:
+            needed = prompt_tokens + (options.get("num_predict") or OUTPUT_ALLOWANCE)
+            if needed > value:
+                logger.debug(f"{payload.get('model')}: ~{needed} tokens exceed the tuned num_ctx {value}")
+                continue
+        options.setdefault(name, value)
+    return dict(payload, options=options)
+
+
+def parallelism(model: str, host: str) -> int:
+    """Requests to keep in flight on a host for a model (1 until it is tuned)."""
+    profile = profiles.get(model, host)
+    return max(1, int(profile.get("parallel", 1))) if profile else 1
@@ -0,0 +1 @@
+"""Image2Project - OCR of project notes and conversion into project plans."""
@@ -0,0 +1,562 @@
+# image2text.py
+import argparse
+import base64
+import difflib
+import glob
+import json
+import math
+import mmap
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from ollamabots.common.pool import get_pool
+from ollamabots.common.profiling import now_ns, record, span
+from ollamabots.common.streaming import stream_generate
+
+cv2 = None  # OpenCV (optional, for cleanup) is imported on first use by has_cv2()
+
+# ===== Config =====
+MODEL = "qwen2.5vl:7b"   # or "llama3.2-vision"
+TEMPERATURE = 0.0
+CLEANUP = True
+
+# Tiling (large whiteboard photos)
+TILE_SIZE = None        # Tile side in pixels; None = adapt to the image size
+TILE_TARGET = 1024      # Longest tile side sent to the model (keeps vision tokens per tile bounded)
+TILE_MAX_COUNT = 8      # Max tiles per image; grown tiles are downscaled to TILE_TARGET
+TILE_OVERLAP = 0.15     # Fraction of a tile shared with its neighbours
+TILE_WORKERS = 4        # Concurrent tile requests
+
+# Batch mode (folders, globs, multi-page PDF/TIFF)
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp", ".bmp", ".tif", ".tiff"}
+MULTIPAGE_EXTENSIONS = {".pdf", ".tif", ".tiff"}
+PREPROCESS_WORKERS = 2  # Processes running preprocess_page ahead of the model
+PREFETCH_PAGES = 4      # Max preprocessed pages waiting for the model (bounded queue)
+OCR_WORKERS = None      # Pages sent to the model at once; None = the tuned parallelism of each Ollama host (1 untuned)
+PDF_DPI = 200
+
+# Request bodies are streamed: images are base64-encoded in chunks of this many
+# bytes (a multiple of 3, so the encoded chunks concatenate into valid base64)
+B64_CHUNK = 3 * 64 * 1024
+
+OCR_PROMPT = (
+    "You are an OCR engine. Transcribe ALL legible text from the image.\n"
+    "- Preserve line breaks where they appear.\n"
+    "- Keep original spelling, punctuation, and casing.\n"
+    "- Do NOT add commentary, headers, or explanations.\n"
+    "- Output ONLY the transcription text."
+)
+TILE_PROMPT = OCR_PROMPT + (
+    "\n- The image is one tile of a larger page; lines cut off at the edges "
+    "should be transcribed as far as they are visible."
+)
+
+
+def has_cv2() -> bool:
+    """Import OpenCV on first use; it is optional and slow to import."""
+    global cv2
+    if cv2 is None:
+        try:
+            import cv2 as opencv
+        except Exception:
+            opencv = False
+        cv2 = opencv
+    return cv2 is not False
+
+
+def load_image(path: Path, cleanup: bool = CLEANUP):
+    """Read an image as an array, optionally cleaned up. Returns None without OpenCV."""
+    if not has_cv2():
+        return None
+
+    img = cv2.imread(str(path))
+    if img is None or not cleanup:
+        return img
+    return cleanup_image(img)
+
+
+def cleanup_image(img):
+    """Denoise and binarize an image array to help with messy handwriting."""
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+    denoised = cv2.fastNlMeansDenoising(
+        gray, None, h=15, templateWindowSize=7, searchWindowSize=21
+    )
+    thr = cv2.adaptiveThreshold(
+        denoised, 255,
+        cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+        cv2.THRESH_BINARY, 25, 15
+    )
+    return thr
+
+
+class ImageRequestBody:
+    """
+    JSON request body that base64-encodes its images chunk by chunk while it is sent.
+
+    Only one B64_CHUNK-sized slice of an image is encoded at a time, so the
+    full base64 text and the serialized JSON never exist in memory. Images can
+    be any buffer (bytes, numpy array, mmap); they are read through memoryviews.
+    The length is known up front so the request carries a Content-Length.
+    """
+
+    def __init__(self, payload: dict, images: list):
+        head = json.dumps(payload)[:-1]  # reopen the object to append "images"
+        self._head = (head + (', ' if payload else '') + '"images": [').encode("utf-8")
+        self._images = [memoryview(img).cast("B") for img in images]
+        encoded = sum(4 * math.ceil(len(img) / 3) + 2 for img in self._images)  # + quotes
+        self._length = len(self._head) + encoded + max(len(self._images) - 1, 0) + 2
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self):
+        yield self._head
+        for i, img in enumerate(self._images):
+            yield b'","' if i else b'"'
+            for offset in range(0, len(img), B64_CHUNK):
+                yield base64.b64encode(img[offset:offset + B64_CHUNK])
+        yield b'"]}' if self._images else b']}'
+
+
+def ocr_request(image, prompt: str = OCR_PROMPT) -> str:
+    """Send one image (any bytes-like buffer) to the vision model on the least busy host."""
+    payload = {
+        "model": MODEL,
+        "prompt": prompt,
+        "options": {"temperature": TEMPERATURE},
+    }
+    data = stream_generate(payload, body_factory=lambda p: ImageRequestBody(p, [image]), images=1)
+    return data.get("response", "").strip()
+
+
+def image_buffer(image_path: Path):
+    """The image to send, without extra copies: the cleaned-up PNG buffer, or the file memory-mapped."""
+    if CLEANUP:
+        img = load_image(image_path)
+        if img is not None:
+            success, buf = cv2.imencode(".png", img)
+            if success:
+                return buf
+    with open(image_path, "rb") as f:
+        if f.seek(0, 2) == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def transcribe_image(image_path: Path) -> str:
+    with span("preprocess", file=image_path.name):
+        image = image_buffer(image_path)
+    try:
+        return ocr_request(image)
+    finally:
+        if isinstance(image, mmap.mmap):
+            try:
+                image.close()  # unmap the file once the request is sent
+            except BufferError:
+                pass  # a failed request's traceback still holds the body; unmapped when it is freed
+
+
+# ===== Tiling =====
+def _tile_count(length: int, size: int, overlap: float) -> int:
+    if length <= size:
+        return 1
+    step = max(1, int(size * (1 - overlap)))
+    return math.ceil((length - size) / step) + 1
+
+
+def choose_tile_size(width: int, height: int, overlap: float = TILE_OVERLAP) -> int:
+    """Grow tiles from TILE_TARGET until the grid fits in TILE_MAX_COUNT tiles."""
+    size = TILE_TARGET
+    while _tile_count(width, size, overlap) * _tile_count(height, size, overlap) > TILE_MAX_COUNT:
+        size = int(size * 1.25)
+    return size
+
+
+def _spans(length: int, size: int, overlap: float) -> list:
+    """Start/end offsets of overlapping tiles along one axis; the last tile is flush with the edge."""
+    count = _tile_count(length, size, overlap)
+    if count == 1:
+        return [(0, length)]
+    step = (length - size) / (count - 1)
+    return [(round(i * step), round(i * step) + size) for i in range(count)]
+
+
+def plan_tiles(width: int, height: int, tile_size=None, overlap: float = TILE_OVERLAP) -> list:
+    """Return (row, col, x0, y0, x1, y1) for each tile in reading order."""
+    size = tile_size or choose_tile_size(width, height, overlap)
+    return [
+        (row, col, x0, y0, x1, y1)
+        for row, (y0, y1) in enumerate(_spans(height, size, overlap))
+        for col, (x0, x1) in enumerate(_spans(width, size, overlap))
+    ]
+
+
+def _normalize(line: str) -> str:
+    return " ".join(line.lower().split())
+
+
+def _lines_match(a: str, b: str) -> bool:
+    a, b = _normalize(a), _normalize(b)
+    if not a or not b:
+        return a == b
+    # A line cut at a tile edge may come back shortened
+    return a in b or b in a or difflib.SequenceMatcher(None, a, b).ratio() > 0.8
+
+
+def overlap_length(previous: list, current: list, max_lines: int = 6) -> int:
+    """Number of leading lines of current that repeat the tail of previous (the shared overlap)."""
+    for k in range(min(max_lines, len(previous), len(current)), 0, -1):
+        if all(_lines_match(p, c) for p, c in zip(previous[-k:], current[:k])):
+            return k
+    return 0
+
+
+def _words_match(left: str, right: str, first: bool, last: bool) -> bool:
+    """Words shared by side-by-side tiles; the edge words of the overlap may be cut short in one of them."""
+    left, right = left.lower(), right.lower()
+    if left == right:
+        return True
+    if first and last and min(len(left), len(right)) < 2:
+        return False  # a lone one-letter fragment is too weak a match
+    # The first overlapping word may be cut on its left in the right tile, the last on its right in the left tile
+    return (first and left.endswith(right)) or (last and right.startswith(left))
+
+
+def word_overlap(a: list, b: list) -> int:
+    """Number of trailing words of a that the leading words of b repeat."""
+    for k in range(min(len(a), len(b)), 0, -1):
+        if all(_words_match(x, y, i == 0, i == k - 1) for i, (x, y) in enumerate(zip(a[-k:], b[:k]))):
+            return k
+    return 0
+
+
+def join_across(left: str, right: str) -> str:
+    """Join one line read in two side-by-side tiles, dropping the words both tiles saw."""
+    a, b = left.split(), right.split()
+    k = word_overlap(a, b)
+    # Keep whichever copy of a word was cut off less
+    shared = [x if len(x) >= len(y) else y for x, y in zip(a[len(a) - k:], b[:k])]
+    return " ".join(a[:len(a) - k] + shared + b[k:])
+
+
+def align_lines(left: list, right: list) -> list:
+    """
+    (i, j) pairs of lines of side-by-side tiles that continue each other.
+
+    Short lines end before the right tile, so line counts differ and lines
+    cannot be paired by position. Pairs need shared words in the overlap strip
+    and keep reading order; the alignment shares the most words overall.
+    """
+    a, b = [line.split() for line in left], [line.split() for line in right]
+    overlaps = [[word_overlap(x, y) for y in b] for x in a]
+    best = [[0] * (len(b) + 1) for _ in range(len(a) + 1)]
+    for i in range(len(a) - 1, -1, -1):
+        for j in range(len(b) - 1, -1, -1):
+            paired = best[i + 1][j + 1] + overlaps[i][j] if overlaps[i][j] else 0
+            best[i][j] = max(best[i + 1][j], best[i][j + 1], paired)
+    pairs, i, j = [], 0, 0
+    while i < len(a) and j < len(b):
+        if overlaps[i][j] and best[i][j] == best[i + 1][j + 1] + overlaps[i][j]:
+            pairs.append((i, j))
+            i, j = i + 1, j + 1
+        elif best[i][j] == best[i + 1][j]:
+            i += 1
+        else:
+            j += 1
+    return pairs
+
+
+def merge_row(columns: list) -> list:
+    """Merge the lines of one row of tiles, left to right; unpaired lines keep their place in reading order."""
+    merged = columns[0]
+    for lines in columns[1:]:
+        out, i0, j0 = [], 0, 0
+        for i, j in align_lines(merged, lines) + [(len(merged), len(lines))]:
+            # Lines seen by only one tile, before the next pair
+            out.extend(merged[i0:i])
+            out.extend(lines[j0:j])
+            if i < len(merged):
+                out.append(join_across(merged[i], lines[j]))
+            i0, j0 = i + 1, j + 1
+        merged = out
+    return merged
+
+
+def stitch_tiles(tiles: list) -> str:
+    """Join tile transcriptions (row, col, text) in reading order, de-duplicating the overlaps."""
+    rows = {}
+    for row, col, text in sorted(tiles):
+        rows.setdefault(row, []).append([line for line in text.splitlines() if line.strip()])
+    out = []
+    previous = []  # indices in out of the lines of the row above
+    for row in sorted(rows):
+        lines = merge_row(rows[row])
+        k = overlap_length([out[i] for i in previous], lines)
+        # Keep whichever copy of a duplicated line was cut off less
+        for i, line in zip(previous[len(previous) - k:], lines[:k]):
+            if len(line) > len(out[i]):
+                out[i] = line
+        previous = previous[len(previous) - k:] + list(range(len(out), len(out) + len(lines) - k))
+        out.extend(lines[k:])
+    return "\n".join(out)
+
+
+def transcribe_tiled(image_path: Path, tile_size=None) -> str:
+    """Transcribe a large image as overlapping tiles sent concurrently, then stitch the text."""
+    with span("preprocess", file=image_path.name):
+        img = load_image(image_path)
+    if img is None:
+        print("[WARN] Tiling needs OpenCV; transcribing the whole image instead.")
+        return transcribe_image(image_path)
+
+    height, width = img.shape[:2]
+    tiles = plan_tiles(width, height, tile_size)
+    if len(tiles) == 1:
+        return transcribe_image(image_path)
+    print(f"[INFO] {width}x{height} image split into {len(tiles)} tiles")
+
+    def encode(x0, y0, x1, y1) -> bytes:
+        with span("encode tile", box=[x0, y0, x1, y1]):
+            tile = img[y0:y1, x0:x1]
+            scale = TILE_TARGET / max(tile.shape[:2])
+            if scale < 1:
+                tile = cv2.resize(tile, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+            success, buf = cv2.imencode(".png", tile)
+            if not success:
+                raise RuntimeError("Could not encode image tile")
+            return buf.tobytes()
+
+    with ThreadPoolExecutor(max_workers=TILE_WORKERS) as pool:
+        futures = {
+            (row, col): pool.submit(ocr_request, encode(x0, y0, x1, y1), TILE_PROMPT)
+            for row, col, x0, y0, x1, y1 in tiles
+        }
+        results = [(row, col, future.result()) for (row, col), future in futures.items()]
+    with span("postprocess"):
+        return stitch_tiles(results)
+
+
+# ===== Batch mode =====
+def is_batch_source(source: str) -> bool:
+    path = Path(source)
+    if path.is_dir() or glob.has_magic(source) or path.suffix.lower() == ".pdf":
+        return True
+    return path.suffix.lower() in MULTIPAGE_EXTENSIONS and page_count(path) > 1
+
+
+def page_count(path: Path) -> int:
+    """Number of pages in a PDF/TIFF (1 for plain images)."""
+    suffix = path.suffix.lower()
+    if suffix == ".pdf":
+        import fitz  # PyMuPDF, only needed for PDFs
+        with fitz.open(str(path)) as doc:
+            return len(doc)
+    if suffix in (".tif", ".tiff") and has_cv2():
+        return cv2.imcount(str(path))
+    return 1
+
+
+def collect_pages(source: str) -> list:
+    """Expand a folder, glob or multi-page document into (path, page_index) pairs in order."""
+    path = Path(source)
+    if path.is_dir():
+        files = sorted(p for p in path.iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS | {".pdf"})
+    elif glob.has_magic(source):
+        files = sorted(Path(p) for p in glob.glob(source))
+    else:
+        files = [path]
+
+    pages = []
+    for file in files:
+        count = page_count(file) if file.suffix.lower() in MULTIPAGE_EXTENSIONS else 1
+        pages.extend((file, index) for index in range(count))
+    return pages
+
+
+def load_page(path: Path, page_index: int = 0):
+    """Read one page of an image, TIFF or PDF as an array (OpenCV required)."""
+    suffix = path.suffix.lower()
+    if suffix == ".pdf":
+        import fitz
+        import numpy as np
+        with fitz.open(str(path)) as doc:
+            png = doc[page_index].get_pixmap(dpi=PDF_DPI).tobytes("png")
+        return cv2.imdecode(np.frombuffer(png, np.uint8), cv2.IMREAD_COLOR)
+    if suffix in (".tif", ".tiff") and page_index:
+        ok, pages = cv2.imreadmulti(str(path), start=page_index, count=1)
+        return pages[0] if ok and pages else None
+    return cv2.imread(str(path))
+
+
+def preprocess_page(path: Path, page_index: int = 0):
+    """
+    Process-pool worker: load and clean one page.
+
+    Returns (png_bytes, (start_ns, end_ns, pid)); the now_ns() times let the
+    parent trace the work done in this process.
+    """
+    start = now_ns()
+    if not has_cv2():
+        if page_index or path.suffix.lower() == ".pdf":
+            raise RuntimeError(f"OpenCV is required to read page {page_index + 1} of {path.name}")
+        return path.read_bytes(), (start, now_ns(), os.getpid())
+
+    img = load_page(path, page_index)
+    if img is None:
+        raise RuntimeError(f"Could not read page {page_index + 1} of {path.name}")
+    if CLEANUP:
+        img = cleanup_image(img)
+    success, buf = cv2.imencode(".png", img)
+    if not success:
+        raise RuntimeError(f"Could not encode page {page_index + 1} of {path.name}")
+    return buf.tobytes(), (start, now_ns(), os.getpid())
+
+
+def page_output_name(path: Path, page_index: int, multipage: bool) -> str:
+    return f"{path.stem}_p{page_index + 1:03d}.txt" if multipage else f"{path.stem}.txt"
+
+
+def timed_ocr(image) -> tuple:
+    start = time.time()
+    return ocr_request(image), time.time() - start
+
+
+def transcribe_batch(source: str, output_dir: Path, ocr_workers: int = None) -> list:
+    """
+    Transcribe every page of a folder/glob/document.
+
+    Preprocessing runs in a process pool at most PREFETCH_PAGES ahead, so the
+    next pages are cleaned up while the model works on the current ones. Up to
+    ocr_workers pages (default: the tuned parallelism of each Ollama host, one untuned) are transcribed at once.
+    Outputs and timings are written in page order, each timings.jsonl line as
+    soon as its page finishes. A page that fails to preprocess or transcribe is
+    recorded there with status "error" and the rest of the batch goes on.
+    """
+    pages = collect_pages(source)
+    if not pages:
+        raise FileNotFoundError(f"No images found for '{source}'")
+    output_dir.mkdir(parents=True, exist_ok=True)
+    multipage = {path for path, index in pages if index > 0}
+    ocr_workers = ocr_workers or OCR_WORKERS or get_pool().parallelism(MODEL)
+    print(f"[INFO] {len(pages)} page(s) to transcribe, {ocr_workers} at a time")
+
+    timings = []
+    start_all = time.time()
+    in_flight = deque()  # pages sent to the model (or failed before it), oldest first
+    log = open(output_dir / "timings.jsonl", "w", encoding="utf-8")
+
+    def write_timing(timing: dict):
+        timings.append(timing)
+        log.write(json.dumps(timing) + "\n")
+        log.flush()
+
+    def page_failed(path, index, stage, error):
+        name = page_output_name(path, index, path in multipage)
+        print(f"[ERROR] {name}: {stage} failed: {error}")
+        write_timing({"page": len(timings) + 1, "source": str(path), "page_index": index + 1,
+                      "output": None, "status": "error", "error": f"{stage}: {error}"})
+
+    def finish_oldest():
+        path, index, preprocess_s, waited_s, page_start, future, stage = in_flight.popleft()
+        name = page_output_name(path, index, path in multipage)
+        try:
+            text, ocr_s = future.result()
+            with span("write"):
+                (output_dir / name).write_text(text, encoding="utf-8")
+        except Exception as e:
+            page_failed(path, index, stage, e)
+            return
+        record("page", page_start, now_ns(), cat="file", file=path.name, page=index + 1)
+        write_timing({"page": len(timings) + 1, "source": str(path), "page_index": index + 1,
+                      "output": name, "status": "ok", "preprocess_s": round(preprocess_s, 3),
+                      "wait_s": round(waited_s, 3), "ocr_s": round(ocr_s, 3)})
+        print(f"[OK] {name}: preprocess {preprocess_s:.2f}s, OCR {ocr_s:.2f}s")
+
+    from concurrent.futures import ProcessPoolExecutor
+    with log, ProcessPoolExecutor(max_workers=PREPROCESS_WORKERS) as pool, \
+            ThreadPoolExecutor(max_workers=ocr_workers) as ocr_pool:
+        upcoming = iter(pages)
+        queue = deque()
+
+        def refill():
+            while len(queue) < max(PREFETCH_PAGES, ocr_workers):
+                page = next(upcoming, None)
+                if page is None:
+                    return
+                queue.append((page, pool.submit(preprocess_page, *page)))
+
+        refill()
+        while queue:
+            (path, index), future = queue.popleft()
+            wait_start = time.time()
+            page_start = now_ns()
+            try:
+                with span("wait preprocess"):
+                    img_bytes, (pre_start, pre_end, worker) = future.result()
+            except Exception:
+                # Queued with its failed future so it is still reported in page order
+                in_flight.append((path, index, 0.0, 0.0, page_start, future, "preprocessing"))
+                refill()
+                continue
+            waited_s = time.time() - wait_start
+            preprocess_s = (pre_end - pre_start) / 1e9
+            record("preprocess", pre_start, pre_end, pid=worker, file=path.name, page=index + 1)
+            refill()
+
+            in_flight.append((path, index, preprocess_s, waited_s, page_start,
+                              ocr_pool.submit(timed_ocr, img_bytes), "OCR"))
+            while len(in_flight) >= ocr_workers:
+                finish_oldest()
+        while in_flight:
+            finish_oldest()
+
+    failed = sum(1 for timing in timings if timing["status"] == "error")
+    print(f"[OK] {len(timings) - failed} page(s) transcribed in {time.time() - start_all:.2f}s")
+    if failed:
+        print(f"[WARNING] {failed} page(s) failed; see {output_dir / 'timings.jsonl'}")
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="ollamabots image2text", description="Transcribe an image with a local vision model")
+    parser.add_argument("image_path",
+                        help="Image file, folder, quoted glob (e.g. 'scans/*.jpg') or multi-page PDF/TIFF")
+    parser.add_argument("output_path", type=Path,
+                        help="Output text file, or output folder for batch inputs")
+    parser.add_argument("--tiles", action="store_true",
+                        help="Split large images into overlapping tiles transcribed concurrently")
+    parser.add_argument("--tile-size", type=int, default=TILE_SIZE,
+                        help="Tile side in pixels (default: adapt to the image size)")
+    parser.add_argument("-w", "--workers", type=int, default=OCR_WORKERS,
+                        help="Batch pages transcribed at once (default: one per host in OLLAMA_HOSTS, or its tuned parallelism)")
+    args = parser.parse_args(argv)
+
+    image_path = Path(args.image_path)
+    output_path = args.output_path
+
+    if not image_path.exists() and not glob.has_magic(args.image_path):
+        print(f"[ERROR] Image file '{image_path}' not found.")
+        sys.exit(1)
+
+    try:
+        if is_batch_source(args.image_path):
+            transcribe_batch(args.image_path, output_path, args.workers)
+            return
+        print(f"[INFO] Processing {image_path.name}...")
+        if args.tiles:
+            text = transcribe_tiled(image_path, args.tile_size)
+        else:
+            text = transcribe_image(image_path)
+        with span("write"):
+            output_path.write_text(text, encoding="utf-8")
+        print(f"[OK] Saved transcription to {output_path}")
+    except Exception as e:
+        print(f"[ERROR] Failed: {e}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+# orchestrator.py
+import argparse
+import sys
+from pathlib import Path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="ollamabots image2project", description="Turn a photo of project notes into a Markdown project plan")
+    parser.add_argument("image_file", type=Path)
+    parser.add_argument("output_md", type=Path)
+    args = parser.parse_args(argv)
+
+    image_file = args.image_file
+    output_md = args.output_md
+
+    if not image_file.exists():
+        print(f"[ERROR] Image file {image_file} not found.")
+        sys.exit(1)
+
+    from ollamabots.image2project import image2text, text2project
+
+    # Intermediate text file
+    temp_txt = Path(image_file.stem + "_transcribed.txt")
+
+    # Step 1: Run OCR (image2text)
+    print(f"[INFO] Running OCR on {image_file.name}...")
+    try:
+        text = image2text.transcribe_image(image_file)
+        temp_txt.write_text(text, encoding="utf-8")
+    except Exception as e:
+        print(f"[ERROR] OCR failed:\n {e}")
+        sys.exit(1)
+    print("[OK] OCR complete")
+
+    # Step 2: Analyze text into project plan (text2project)
+    print("[INFO] Creating project plan...")
+    try:
+        plan = text2project.analyze_project(text)
+        output_md.write_text(plan, encoding="utf-8")
+    except Exception as e:
+        print(f"[ERROR] Project analysis failed:\n {e}")
+        sys.exit(1)
+
+    print(f"[OK] Project plan saved to {output_md}")
+
+
+if __name__ == "__main__":
+    main()
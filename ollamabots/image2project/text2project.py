@@ -0,0 +1,328 @@
+# text2project.py
+import argparse
+import json
+import sys
+import re
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from ollamabots.common.profiling import now_ns, record, span
+from ollamabots.common.streaming import stream_generate
+from ollamabots.common.thinking import apply_thinking, format_metrics, parse_thinking, thinking_metrics
+
+# ===== Config =====
+MODEL = "qwen3:4b"  # Using a model you have installed
+TEMPERATURE = 0.1    # Lower temperature for more deterministic output
+THINKING = "off"     # Reasoning: "off", "on", or a token budget like "512"
+SEMANTIC_CACHE_DIR = None  # e.g. Path(".semantic_cache") to reuse plans for near-identical notes (set with --semantic-cache)
+SEMANTIC_CACHE_THRESHOLD = 0.97  # Cosine similarity needed to reuse a previous plan
+STRUCTURED_RETRIES = 2  # Extra attempts when a structured response is incomplete
+STRUCTURED_NUM_CTX = 4096       # Context window of the first structured attempt
+STRUCTURED_MAX_NUM_CTX = 16384  # Truncated responses are retried with twice the window, up to this
+STRUCTURED_RETRY_TEMPERATURE = 0.2  # Temperature added per retry after an invalid response
+
+
+def get_semantic_cache(output_format: str = "markdown", cache_dir: Path = SEMANTIC_CACHE_DIR,
+                       threshold: float = SEMANTIC_CACHE_THRESHOLD):
+    """Return the semantic cache if enabled (numpy is only needed when it is)."""
+    if cache_dir is None:
+        return None
+    from ollamabots.common.semantic_cache import SemanticCache
+    return SemanticCache(cache_dir, f"text2project-{MODEL}-{output_format}", threshold=threshold)
+
+
+# ===== Structured plan =====
+# (field, Markdown heading) for the eight plan sections, in order
+PLAN_SECTIONS = [
+    ("title", "Project Title"),
+    ("goals", "Goals / Objectives"),
+    ("deliverables", "Key Features or Deliverables"),
+    ("tasks", "Tasks and Steps"),
+    ("timeline", "Estimated Timeline / Deadlines"),
+    ("resources", "Resources / Tools Needed"),
+    ("risks", "Potential Risks / Challenges"),
+    ("next_actions", "Next Actions"),
+]
+
+PLAN_SCHEMA = {
+    "type": "object",
+    "properties": {
+        key: {"type": "string"} if key == "title" else {"type": "array", "items": {"type": "string"}}
+        for key, _ in PLAN_SECTIONS
+    },
+    "required": [key for key, _ in PLAN_SECTIONS],
+}
+
+
+@dataclass
+class ProjectPlan:
+    """The eight plan sections as returned by the model in structured mode."""
+    title: str
+    goals: list = field(default_factory=list)
+    deliverables: list = field(default_factory=list)
+    tasks: list = field(default_factory=list)
+    timeline: list = field(default_factory=list)
+    resources: list = field(default_factory=list)
+    risks: list = field(default_factory=list)
+    next_actions: list = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ProjectPlan":
+        """Validate a decoded response; raises ValueError if any section is missing or mistyped."""
+        if not isinstance(data, dict):
+            raise ValueError("plan is not a JSON object")
+        missing = [key for key, _ in PLAN_SECTIONS if key not in data]
+        if missing:
+            raise ValueError(f"missing sections: {', '.join(missing)}")
+        if not isinstance(data["title"], str) or not data["title"].strip():
+            raise ValueError("empty project title")
+        for key, _ in PLAN_SECTIONS[1:]:
+            if not isinstance(data[key], list) or not all(isinstance(item, str) for item in data[key]):
+                raise ValueError(f"section '{key}' is not a list of strings")
+        return cls(**{key: data[key] for key, _ in PLAN_SECTIONS})
+
+    def to_markdown(self) -> str:
+        parts = [f"# Project Title\n\n{self.title.strip()}"]
+        for key, heading in PLAN_SECTIONS[1:]:
+            items = [item.strip() for item in getattr(self, key) if item.strip()]
+            body = "\n".join(f"- {item}" for item in items) or "- [Information not specified in source]"
+            parts.append(f"## {heading}\n{body}")
+        return "\n\n".join(parts)
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), indent=2, ensure_ascii=False)
+
+
+def generate(payload: dict) -> dict:
+    """Stream /api/generate from the least busy host under predicted deadlines and return the response."""
+    data = stream_generate(payload)
+    print(f"[INFO] {format_metrics(thinking_metrics(data))}")
+    return data
+
+def analyze_project_structured(text: str, retries: int = STRUCTURED_RETRIES) -> ProjectPlan:
+    """
+    Ask for the plan as JSON constrained by PLAN_SCHEMA and parse it in one pass.
+
+    Truncated or invalid responses are rejected and retried rather than repaired.
+    A truncated response is retried with twice the context window (and token
+    limit); an invalid one with a new seed, a higher temperature and the
+    validation error added to the prompt.
+    """
+    prompt = (
+        "Convert these raw project notes into a structured project plan. "
+        "Fill every section; if information is missing, make professional assumptions. "
+        "Keep each list item to one concise line.\n\n"
+        f"{text}"
+    )
+    payload = {
+        "model": MODEL,
+        "prompt": prompt,
+        "format": PLAN_SCHEMA,
+        "options": {
+            "temperature": TEMPERATURE,
+            "num_ctx": STRUCTURED_NUM_CTX
+        },
+    }
+    apply_thinking(payload, parse_thinking(THINKING))
+    options = payload["options"]
+
+    last_error = None
+    for attempt in range(1, retries + 2):
+        data = generate(payload)
+        if data.get("done_reason") == "length":
+            last_error = ValueError("response truncated at the token limit")
+            print(f"[WARNING] Rejected structured response (attempt {attempt}): {last_error}")
+            options["num_ctx"] = min(options["num_ctx"] * 2, STRUCTURED_MAX_NUM_CTX)
+            if "num_predict" in options:
+                options["num_predict"] *= 2
+            continue
+        try:
+            with span("postprocess"):
+                return ProjectPlan.from_dict(json.loads(data.get("response", "")))
+        except ValueError as e:  # includes json.JSONDecodeError
+            last_error = e
+            print(f"[WARNING] Rejected structured response (attempt {attempt}): {e}")
+            options["seed"] = attempt
+            options["temperature"] = TEMPERATURE + STRUCTURED_RETRY_TEMPERATURE * attempt
+            payload["prompt"] = (f"{prompt}\n\nYour previous answer was rejected ({e}). "
+                                 "Return one JSON object with every section filled.")
+    raise ValueError(f"No valid structured plan after {retries + 1} attempts: {last_error}")
+
+def analyze_project(text: str) -> str:
+    """Send OCR text to Ollama to extract structured project management logic with guaranteed clean output."""
+    import requests
+    
+    # Qwen-specific prompt format with clear separation
+    prompt = f"""<|im_start|>system
+You are a project management assistant that outputs ONLY markdown project plans with no additional text.
+Follow these rules exactly:
+1. NEVER include thinking process, explanations, or commentary
+2. ALWAYS start with "# Project Title" exactly
+3. Include exactly these 8 sections in order:
+   - Project Title
+   - Goals / Objectives
+   - Key Features or Deliverables
+   - Tasks and Steps
+   - Estimated Timeline / Deadlines
+   - Resources / Tools Needed
+   - Potential Risks / Challenges
+   - Next Actions
+4. Use proper markdown formatting
+5. If information is missing, make professional assumptions
+<|im_end|>
+
+<|im_start|>user
+Convert this raw project notes into a structured project plan:
+
+{text}
+
+IMPORTANT: Output ONLY the project plan in markdown format. Start with "# Project Title" and nothing else.
+<|im_end|>
+
+<|im_start|>assistant
+"""
+
+    payload = {
+        "model": MODEL,
+        "prompt": prompt,
+        "options": {
+            "temperature": TEMPERATURE,
+            "num_ctx": 4096  # Ensure enough context for full response
+        },
+    }
+    apply_thinking(payload, parse_thinking(THINKING))
+
+    try:
+        data = generate(payload)
+        postprocess_start = now_ns()
+        response = data.get("response", "").strip()
+        
+        # DEBUG: Print raw response for troubleshooting
+        print(f"[DEBUG] Raw AI response: {response[:300]}{'...' if len(response) > 300 else ''}")
+        
+        # FIRST: Try to extract content after the assistant token
+        if "<|im_start|>assistant" in response:
+            response = response.split("<|im_start|>assistant")[1].strip()
+        
+        # SECOND: Look for the exact start of our expected format
+        title_match = re.search(r'(?:^|\n)#\s*Project\s+Title', response)
+        if title_match:
+            response = response[title_match.start():]
+        else:
+            # THIRD: If still not found, look for any section header
+            section_match = re.search(r'(?:^|\n)#{1,2}\s*[A-Z]', response)
+            if section_match:
+                response = response[section_match.start():]
+            else:
+                # FOURTH: As last resort, try to find markdown structure
+                markdown_match = re.search(r'(?:^|\n)#\s*\w', response)
+                if markdown_match:
+                    response = response[markdown_match.start():]
+                else:
+                    # FIFTH: If all else fails, return what we have but warn
+                    print("[WARNING] Could not find proper project plan format in response")
+        
+        # Validate we have the minimum required structure
+        if not re.search(r'(?:^|\n)#\s*Project\s+Title', response):
+            print("[WARNING] Response doesn't start with '# Project Title'")
+            # Force it to start correctly
+            response = "# Project Title\n\n[Title to be determined]\n\n" + response
+        
+        # Ensure we have at least some content in each section
+        required_sections = [
+            "Project Title",
+            "Goals / Objectives",
+            "Key Features or Deliverables",
+            "Tasks and Steps",
+            "Estimated Timeline / Deadlines",
+            "Resources / Tools Needed",
+            "Potential Risks / Challenges",
+            "Next Actions"
+        ]
+        
+        for section in required_sections:
+            if section not in response:
+                # Insert missing section with placeholder
+                response += f"\n\n## {section}\n- [Information not specified in source]"
+                print(f"[INFO] Added missing section: {section}")
+        
+        record("postprocess", postprocess_start, now_ns())
+        return response.strip()
+
+    except requests.exceptions.RequestException as e:
+        if e.response:
+            print(f"[ERROR] Ollama API error ({e.response.status_code}): {e.response.text}", file=sys.stderr)
+        else:
+            print(f"[ERROR] Connection error: {str(e)}", file=sys.stderr)
+        raise
+    except Exception as e:
+        print(f"[ERROR] Processing error: {str(e)}", file=sys.stderr)
+        raise
+
+def main(argv=None):
+    global THINKING
+
+    parser = argparse.ArgumentParser(prog="ollamabots text2project", description="Turn raw project notes into a structured project plan")
+    parser.add_argument("input_file", type=Path)
+    parser.add_argument("output_file", type=Path,
+                        help="Output plan; a .json file gets the plan as JSON (implies --structured)")
+    parser.add_argument("--structured", action="store_true",
+                        help="Use schema-constrained JSON output instead of free-text Markdown")
+    parser.add_argument("--think", default=THINKING, metavar="off|on|N",
+                        help="Model reasoning: off, on, or a thinking token budget (default: %(default)s)")
+    parser.add_argument("--semantic-cache", metavar="DIR", type=Path, default=SEMANTIC_CACHE_DIR,
+                        help="Reuse plans of near-identical notes, caching embeddings in DIR")
+    parser.add_argument("--cache-threshold", type=float, default=SEMANTIC_CACHE_THRESHOLD,
+                        help="Cosine similarity required for a cache hit (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    THINKING = args.think
+    input_file = args.input_file
+    output_file = args.output_file
+    output_format = "json" if output_file.suffix.lower() == ".json" else "markdown"
+    structured = args.structured or output_format == "json"
+
+    if not input_file.exists():
+        print(f"[ERROR] Input file {input_file} does not exist.")
+        sys.exit(1)
+
+    with span("read", file=input_file.name):
+        raw_text = input_file.read_text(encoding="utf-8")
+    print(f"[INFO] Analyzing project notes from {input_file.name}...")
+
+    try:
+        cache = get_semantic_cache(output_format, args.semantic_cache, args.cache_threshold)
+        with span("cache lookup"):
+            hit, vector = cache.lookup(raw_text) if cache else (None, None)
+        if hit:
+            from ollamabots.common.semantic_cache import cache_note
+            print(f"[INFO] Reusing plan of '{hit['source']}' (similarity {hit['score']:.3f})")
+            if output_format == "json":
+                data = json.loads(hit["result"])
+                data["cached_from"] = {"source": hit["source"], "similarity": round(hit["score"], 3)}
+                plan = json.dumps(data, indent=2, ensure_ascii=False)
+            else:
+                plan = f"{cache_note(hit)}\n{hit['result']}"
+        else:
+            if structured:
+                project_plan = analyze_project_structured(raw_text)
+                plan = project_plan.to_json() if output_format == "json" else project_plan.to_markdown()
+            else:
+                plan = analyze_project(raw_text)
+            if not plan.strip():
+                print("[ERROR] Empty response from AI model", file=sys.stderr)
+                sys.exit(1)
+            if cache:
+                cache.add(raw_text, plan, input_file.name, vector)
+            
+        with span("write"):
+            output_file.write_text(plan, encoding="utf-8")
+        if cache:
+            cache.save()
+        print(f"[OK] Project plan saved to {output_file}")
+    except Exception as e:
+        print(f"[ERROR] Project analysis failed: {e}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1 @@
+"""NoteBot - AI-powered note enhancement."""
@@ -0,0 +1,394 @@
+# note_index.py
+"""
+Incremental search index over noteBot's Markdown outputs.
+
+Each enhanced note is indexed when it is written. Notes are keyed by their
+content hash, so an unchanged note is never indexed twice. The index lives
+in <output folder>/.note_index/ and has two parts:
+
+  BM25     an inverted index: the vocabulary (term -> offset, count) in
+           index.json, and the postings as flat arrays of doc ids
+           (postings.u32) and term frequencies (freqs.u16), memory-mapped
+           for queries
+  vectors  optional embedding vectors from Ollama's /api/embed, one float32
+           row per doc id (vectors.f32), searched with NumPy when it is
+           installed
+
+A query with both parts fuses the two rankings (reciprocal rank fusion).
+
+Changing a note tombstones its old doc id and indexes the note again under a
+new one. New postings are merged into the arrays by save(). Tombstones are
+compacted away once they make up COMPACT_RATIO of the ids.
+
+The "Related notes" section comes from the same index. The note's most
+distinctive terms (and its vector) are the query, so no model call is needed.
+"""
+import array
+import hashlib
+import heapq
+import json
+import logging
+import math
+import mmap
+import os
+import re
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Optional
+
+INDEX_DIRNAME = ".note_index"
+BM25_K1 = 1.2
+BM25_B = 0.75
+RRF_K = 60            # Reciprocal rank fusion constant
+RELATED_TERMS = 24    # Most distinctive terms of a note used to find related notes
+COMPACT_RATIO = 0.2   # Share of tombstoned doc ids that triggers a compaction on save
+EMBED_CHARS = 8000    # Characters of a note sent for embedding
+EMBED_TIMEOUT = 120
+RELATED_HEADING = "## Related notes"
+
+_WORD = re.compile(r"[^\W_]{2,}")
+_RELATED_SECTION = re.compile(r"^## Related notes[ \t]*\n.*?(?=^#{1,2} |\Z)", re.M | re.S)
+STOPWORDS = frozenset("""
+a an and are as at be been but by can could did do does for from had has have he her his how i if in
+into is it its just may me might more most my no not of on or our out she should so some such than that
+the their them then there these they this those to too up us was we were what when where which while who
+why will with would you your
+""".split())
+
+
+def tokenize(text: str) -> list:
+    return [word for word in _WORD.findall(text.lower()) if word not in STOPWORDS]
+
+
+def strip_related(markdown: str) -> str:
+    """The note without its generated "Related notes" section (which is never indexed)."""
+    return _RELATED_SECTION.sub("", markdown).rstrip()
+
+
+def note_title(markdown: str, fallback: str) -> str:
+    match = re.search(r"^#\s+(.+)$", markdown, re.M)
+    return match.group(1).strip() if match else fallback
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def format_related(hits: list) -> str:
+    """Markdown section linking related notes (empty when there are none)."""
+    if not hits:
+        return ""
+    lines = [f"- [{hit['title']}](<{hit['name']}>)" for hit in hits]
+    return f"\n\n{RELATED_HEADING}\n" + "\n".join(lines) + "\n"
+
+
+def _map(path: Path, typecode: str):
+    """(mmap, memoryview of typecode items) for an array file; empty arrays are not mapped."""
+    if not path.exists() or path.stat().st_size == 0:
+        return None, memoryview(array.array(typecode))
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return mapped, memoryview(mapped).cast(typecode)
+
+
+class NoteIndex:
+    """BM25 + optional embedding index of the Markdown notes in one folder."""
+
+    def __init__(self, folder: Path, embed_model: Optional[str] = None):
+        self.folder = Path(folder)
+        self.dir = self.folder / INDEX_DIRNAME
+        self.embed_model = embed_model
+        self._lock = threading.RLock()
+        self.docs = []       # doc id -> {"name", "hash", "title", "mtime", "size"}, None once tombstoned
+        self.lengths = []    # doc id -> indexed tokens (parallel to docs)
+        self.by_name = {}    # note file name -> doc id
+        self.terms = {}      # term -> [offset, count] in the postings arrays
+        self.total_length = 0
+        self.dims = 0
+        self.vector_model = None
+        self._pending = {}   # term -> [(doc id, tf)] added since the last save
+        self._pending_vectors = {}  # doc id -> vector added since the last save
+        self._maps = []
+        self._postings = self._freqs = self._vectors = memoryview(b"")
+        self._dirty = False
+        self._numpy_warned = False
+        self._load()
+
+    # ----- Persistence -----
+    @property
+    def live(self) -> int:
+        return len(self.by_name)
+
+    def _load(self):
+        try:
+            meta = json.loads((self.dir / "index.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return  # no index yet (or a corrupt one): notes are indexed again by refresh()
+        self.docs = meta["docs"]
+        self.lengths = meta["lengths"]
+        self.terms = meta["terms"]
+        self.dims = meta.get("dims", 0)
+        self.vector_model = meta.get("vector_model")
+        self.by_name = {doc["name"]: i for i, doc in enumerate(self.docs) if doc is not None}
+        self.total_length = sum(n for n in self.lengths if n > 0)
+        self._open_arrays()
+
+    def _open_arrays(self):
+        maps = []
+        for attribute, filename, typecode in (("_postings", "postings.u32", "I"), ("_freqs", "freqs.u16", "H"),
+                                              ("_vectors", "vectors.f32", "f")):
+            mapped, view = _map(self.dir / filename, typecode)
+            setattr(self, attribute, view)
+            if mapped is not None:
+                maps.append(mapped)
+        self._maps = maps
+
+    def _close_arrays(self):
+        for view in (self._postings, self._freqs, self._vectors):
+            view.release()
+        for mapped in self._maps:
+            mapped.close()
+        self._maps = []
+
+    def save(self):
+        """Merge the pending postings and vectors into the array files (compacting tombstones if due)."""
+        with self._lock:
+            if not self._dirty:
+                return
+            remap = None
+            if len(self.docs) - self.live > COMPACT_RATIO * len(self.docs):
+                remap = {old: new for new, old in enumerate(i for i, doc in enumerate(self.docs) if doc is not None)}
+
+            postings, freqs, terms = array.array("I"), array.array("H"), {}
+            for term in self.terms.keys() | self._pending.keys():
+                start = len(postings)
+                offset, count = self.terms.get(term, (0, 0))
+                if remap is None:
+                    postings.frombytes(self._postings[offset:offset + count].tobytes())
+                    freqs.frombytes(self._freqs[offset:offset + count].tobytes())
+                    pending = self._pending.get(term, ())
+                else:
+                    saved = zip(self._postings[offset:offset + count], self._freqs[offset:offset + count])
+                    pending = [(remap[d], tf) for d, tf in (*saved, *self._pending.get(term, ())) if d in remap]
+                for doc_id, tf in pending:
+                    postings.append(doc_id)
+                    freqs.append(tf)
+                if len(postings) > start:
+                    terms[term] = [start, len(postings) - start]
+
+            vectors = array.array("f")
+            if self.dims:
+                keep = sorted(remap) if remap is not None else range(len(self.docs))
+                zeros = [0.0] * self.dims
+                for doc_id in keep:
+                    if doc_id in self._pending_vectors:
+                        vectors.extend(self._pending_vectors[doc_id])
+                    elif (doc_id + 1) * self.dims <= len(self._vectors):
+                        vectors.frombytes(self._vectors[doc_id * self.dims:(doc_id + 1) * self.dims].tobytes())
+                    else:
+                        vectors.extend(zeros)
+
+            if remap is not None:
+                self.docs = [doc for doc in self.docs if doc is not None]
+                self.lengths = [n for n in self.lengths if n >= 0]
+                self.by_name = {doc["name"]: i for i, doc in enumerate(self.docs)}
+            self.terms = terms
+            self._pending, self._pending_vectors = {}, {}
+
+            self.dir.mkdir(parents=True, exist_ok=True)
+            self._close_arrays()  # a mapped file cannot be replaced on Windows
+            for filename, data in (("postings.u32", postings), ("freqs.u16", freqs), ("vectors.f32", vectors)):
+                tmp = self.dir / f"{filename}.tmp"
+                with open(tmp, "wb") as f:
+                    data.tofile(f)
+                os.replace(tmp, self.dir / filename)
+            meta = {"docs": self.docs, "lengths": self.lengths, "terms": self.terms, "dims": self.dims,
+                    "vector_model": self.vector_model}
+            tmp = self.dir / "index.json.tmp"
+            tmp.write_text(json.dumps(meta, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+            os.replace(tmp, self.dir / "index.json")
+            self._open_arrays()
+            self._dirty = False
+
+    # ----- Embedding -----
+    def embed(self, text: str) -> Optional[list]:
+        """Unit-length embedding of a note, or None when embeddings are off or the call fails."""
+        if not self.embed_model:
+            return None
+        from ollamabots.common.pool import get_pool
+        try:
+            resp = get_pool().post("/api/embed", self.embed_model, timeout=EMBED_TIMEOUT,
+                                   json={"model": self.embed_model, "input": strip_related(text)[:EMBED_CHARS]})
+            resp.raise_for_status()
+            vector = [float(x) for x in resp.json()["embeddings"][0]]
+        except Exception as e:
+            logging.warning(f"Note index: embedding failed ({e}); indexed for BM25 only")
+            return None
+        norm = math.sqrt(sum(x * x for x in vector))
+        return [x / norm for x in vector] if norm else vector
+
+    # ----- Updates -----
+    def add(self, name: str, text: str, path: Path = None, vector: list = None) -> bool:
+        """Index a note (skipped when its content is unchanged); returns whether it was (re)indexed."""
+        body = strip_related(text)
+        digest = content_hash(body)
+        stat = path.stat() if path is not None and path.exists() else None
+        with self._lock:
+            old = self.by_name.get(name)
+            if old is not None and self.docs[old]["hash"] == digest:
+                if stat is not None:
+                    self.docs[old].update(mtime=stat.st_mtime, size=stat.st_size)
+                    self._dirty = True
+                return False
+        if vector is None:
+            vector = self.embed(body)
+        counts = Counter(tokenize(body))
+
+        with self._lock:
+            if name in self.by_name:
+                self._tombstone(self.by_name[name])
+            doc_id = len(self.docs)
+            self.docs.append({"name": name, "hash": digest, "title": note_title(body, Path(name).stem),
+                              "mtime": stat.st_mtime if stat else None, "size": stat.st_size if stat else None})
+            length = sum(counts.values())
+            self.lengths.append(length)
+            self.total_length += length
+            self.by_name[name] = doc_id
+            for term, tf in counts.items():
+                self._pending.setdefault(term, []).append((doc_id, min(tf, 0xFFFF)))
+            if vector is not None:
+                if self.dims and (len(vector) != self.dims or self.vector_model != self.embed_model):
+                    logging.warning("Note index: embedding model changed; dropping the old vectors")
+                    self._drop_vectors()
+                self.dims, self.vector_model = len(vector), self.embed_model
+                self._pending_vectors[doc_id] = vector
+            self._dirty = True
+        return True
+
+    def _drop_vectors(self):
+        self._close_arrays()
+        (self.dir / "vectors.f32").unlink(missing_ok=True)
+        self._open_arrays()
+        self._pending_vectors = {}
+        self.dims = 0
+
+    def _tombstone(self, doc_id: int):
+        self.by_name.pop(self.docs[doc_id]["name"], None)
+        self.total_length -= self.lengths[doc_id]
+        self.docs[doc_id] = None
+        self.lengths[doc_id] = -1
+        self._dirty = True
+
+    def remove(self, name: str) -> bool:
+        with self._lock:
+            if name not in self.by_name:
+                return False
+            self._tombstone(self.by_name[name])
+            return True
+
+    def refresh(self) -> tuple:
+        """Index notes added or edited outside noteBot and drop deleted ones; returns (indexed, removed)."""
+        indexed = removed = 0
+        present = set()
+        for path in sorted(self.folder.glob("*.md")):
+            present.add(path.name)
+            stat = path.stat()
+            with self._lock:
+                doc_id = self.by_name.get(path.name)
+                doc = self.docs[doc_id] if doc_id is not None else None
+            if doc is not None and doc["mtime"] == stat.st_mtime and doc["size"] == stat.st_size:
+                continue
+            indexed += self.add(path.name, path.read_text(encoding="utf-8", errors="replace"), path)
+        with self._lock:
+            for name in [n for n in self.by_name if n not in present]:
+                removed += self.remove(name)
+        return indexed, removed
+
+    # ----- Queries -----
+    def _postings_of(self, term: str):
+        offset, count = self.terms.get(term, (0, 0))
+        saved = zip(self._postings[offset:offset + count], self._freqs[offset:offset + count])
+        pending = self._pending.get(term, ())
+        return saved, count + len(pending), pending
+
+    def bm25(self, terms, exclude: str = None) -> dict:
+        """doc id -> BM25 score for the query terms (an iterable, or term -> weight)."""
+        weights = terms if isinstance(terms, dict) else Counter(terms)
+        if not self.live:
+            return {}
+        average = max(self.total_length / self.live, 1.0)
+        skip = self.by_name.get(exclude)
+        scores = {}
+        for term, weight in weights.items():
+            saved, df, pending = self._postings_of(term)
+            if not df:
+                continue
+            idf = math.log(1 + (self.live - df + 0.5) / (df + 0.5))
+            for postings in (saved, pending):
+                for doc_id, tf in postings:
+                    length = self.lengths[doc_id]
+                    if length < 0 or doc_id == skip:
+                        continue
+                    norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * length / average)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + weight * idf * tf * (BM25_K1 + 1) / norm
+        return scores
+
+    def nearest(self, vector: list, k: int, exclude: str = None) -> dict:
+        """doc id -> cosine similarity of the k nearest vectors (empty without NumPy or vectors)."""
+        if not self.dims or vector is None or len(vector) != self.dims:
+            return {}
+        try:
+            import numpy as np
+        except ImportError:
+            if not self._numpy_warned:
+                logging.warning("Note index: NumPy is not installed; searching without embeddings")
+                self._numpy_warned = True
+            return {}
+        query = np.asarray(vector, dtype=np.float32)
+        rows = np.frombuffer(self._vectors, dtype=np.float32).reshape(-1, self.dims)
+        scores = rows @ query
+        found = {int(i): float(scores[i]) for i in np.argsort(-scores)[:k + len(self.docs) - self.live + 1]}
+        for doc_id, pending in self._pending_vectors.items():
+            found[doc_id] = float(np.asarray(pending, dtype=np.float32) @ query)
+        skip = self.by_name.get(exclude)
+        live = {d: s for d, s in found.items() if d < len(self.docs) and self.docs[d] is not None and d != skip}
+        return dict(heapq.nlargest(k, live.items(), key=lambda item: item[1]))
+
+    def _fuse(self, rankings: list, k: int) -> list:
+        if len(rankings) == 1:
+            return heapq.nlargest(k, rankings[0].items(), key=lambda item: item[1])
+        fused = {}
+        for scores in rankings:
+            for rank, (doc_id, _) in enumerate(sorted(scores.items(), key=lambda item: -item[1])):
+                fused[doc_id] = fused.get(doc_id, 0.0) + 1 / (RRF_K + rank + 1)
+        return heapq.nlargest(k, fused.items(), key=lambda item: item[1])
+
+    def _hits(self, ranked: list) -> list:
+        return [{"name": self.docs[d]["name"], "title": self.docs[d]["title"], "score": round(s, 4)}
+                for d, s in ranked]
+
+    def search(self, query: str, k: int = 10, use_vectors: bool = True) -> list:
+        """Best k notes for a query: [{"name", "title", "score"}]."""
+        vector = self.embed(query) if use_vectors and self.dims else None
+        with self._lock:
+            rankings = [self.bm25(tokenize(query))]
+            if vector is not None:
+                rankings.append(self.nearest(vector, max(k, 50)))
+            return self._hits(self._fuse([r for r in rankings if r] or [{}], k))
+
+    def related(self, text: str, k: int = 5, exclude: str = None, vector: list = None) -> list:
+        """Notes related to a note, from its most distinctive terms (and its vector); no model call."""
+        counts = Counter(tokenize(strip_related(text)))
+        with self._lock:
+            if not self.live:
+                return []
+            weights = {}
+            for term, tf in counts.items():
+                _, df, _ = self._postings_of(term)
+                weights[term] = tf * math.log(1 + self.live / (df + 1))
+            top = dict(heapq.nlargest(RELATED_TERMS, weights.items(), key=lambda item: item[1]))
+            rankings = [self.bm25({term: 1.0 for term in top}, exclude=exclude)]
+            if vector is not None:
+                rankings.append(self.nearest(vector, max(k, 50), exclude=exclude))
+            return self._hits(self._fuse([r for r in rankings if r] or [{}], k))
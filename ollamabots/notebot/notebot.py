@@ -0,0 +1,620 @@
+#!/usr/bin/env python3
+"""
+NoteBot - AI-Powered Note Enhancement Tool
+
+Converts raw text notes into beautifully formatted Markdown with AI assistance.
+Can process single files or entire folders of notes.
+
+Usage:
+  # Process a single note
+  ollamabots notebot "path/to/note.txt" "path/to/output.md"
+  
+  # Process all notes in the default folder ($NOTEBOT_INPUT, or ./Notes)
+  ollamabots notebot
+  
+  # Process all notes in a specific folder
+  ollamabots notebot "path/to/notes_folder"
+
+  # Spread a folder over several Ollama hosts (one note in flight per host by default)
+  OLLAMA_HOSTS=http://box1:11434,http://box2:11434 ollamabots notebot "path/to/notes_folder"
+
+  # Search the enhanced notes (indexed as they are written)
+  ollamabots notebot search "invoice export timeout" --folder "path/to/notes_folder/Markdown Outputs"
+"""
+
+import subprocess
+import os
+import time
+import logging
+import argparse
+from datetime import datetime
+from pathlib import Path
+import sys
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from ollamabots.common.compaction import CompactionReport, compact_notes
+from ollamabots.common.config import OLLAMA_PATH
+from ollamabots.common.pool import get_pool
+from ollamabots.common.profiling import model_spans, parse_verbose_timings, span, tracing
+from ollamabots.common.streaming import MAX_DEADLINE, GenerationAborted, predict_timeout, stream_generate
+from ollamabots.common.thinking import apply_thinking, cli_flags, format_metrics, parse_thinking, thinking_metrics
+from ollamabots.notebot.note_index import NoteIndex, format_related
+
+# === Global Configs ===
+DEFAULT_INPUT_FOLDER = Path(os.environ.get("NOTEBOT_INPUT", "Notes"))
+DEFAULT_OUTPUT_FOLDER = DEFAULT_INPUT_FOLDER / "Markdown Outputs"
+MODEL_NAME = "qwen3:4b"   # 👈 change model name here globally
+THINKING = "off"  # Reasoning: "off" (formatting needs none), "on", or a token budget like "512"
+SEMANTIC_CACHE_DIR = None  # e.g. DEFAULT_OUTPUT_FOLDER / ".semantic_cache" (set with --semantic-cache)
+SEMANTIC_CACHE_THRESHOLD = 0.97  # Cosine similarity needed to reuse a previous note
+WORKERS = None  # Notes processed at once in folder mode; None = the tuned parallelism of each Ollama host (1 untuned)
+COMPACT_NOTES = True  # Collapse whitespace and truncate long pasted logs before prompting
+NOTE_INDEX = True  # Index each output for `notebot search` (BM25 in <output folder>/.note_index)
+INDEX_EMBED_MODEL = None  # e.g. "nomic-embed-text" to add embedding vectors to the index (searched with numpy)
+RELATED_NOTES = 0  # Related notes linked at the end of each output, found in the index; 0 = no section
+compaction_report = CompactionReport()  # Estimated prompt tokens saved per note in this run
+
+# Model quality reference (higher = better quality but slower)
+MODEL_QUALITY = {
+    "qwen3:4b": 8,
+    "qwen3:8b": 9,
+    "mistral:latest": 7,
+    "gemma3:1b": 5
+}
+
+# Setup logging
+def setup_logging(input_path):
+    """Configure logging based on input path to keep logs organized"""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    log_dir = Path(input_path).parent / "Logs"
+    log_dir.mkdir(parents=True, exist_ok=True)
+    
+    log_file = log_dir / f"{timestamp}_notebot.log"
+    logging.basicConfig(
+        filename=log_file,
+        level=logging.INFO,
+        format='[%(asctime)s] %(levelname)s: %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+    return log_file
+
+_model_ready = None
+
+def ensure_model():
+    """Check if a model exists on the Ollama hosts (or locally); if not, pull it."""
+    global _model_ready
+    if _model_ready == MODEL_NAME:
+        return True
+
+    # Hosts in the pool are checked over the API, pulling the model where it is missing
+    status = get_pool().ensure_model(MODEL_NAME)
+    if any(state != "unreachable" for state in status.values()):
+        for host, state in status.items():
+            logging.info(f"Model '{MODEL_NAME}' on {host}: {state}")
+            print(f"{'⚠️' if state == 'unreachable' else '✅'} Model '{MODEL_NAME}' on {host}: {state}")
+        _model_ready = MODEL_NAME
+        return True
+
+    logging.info(f"Checking if model '{MODEL_NAME}' exists locally...")
+    print(f"🔍 Checking if model '{MODEL_NAME}' exists locally...")
+    try:
+        result = subprocess.run([OLLAMA_PATH, "list"], capture_output=True, text=True, check=True)
+        
+        # Parse model list - handle different Ollama output formats
+        models = []
+        for line in result.stdout.strip().splitlines()[1:]:  # Skip header
+            parts = line.split()
+            if parts:
+                # Handle both "NAME ID SIZE MODIFIED" and "NAME SHORT_ID SIZE MODIFIED" formats
+                if len(parts) >= 1:
+                    models.append(parts[0])
+        
+        if MODEL_NAME not in models:
+            logging.info(f"Model '{MODEL_NAME}' not found. Downloading...")
+            print(f"📥 Model '{MODEL_NAME}' not found. Downloading...")
+            pull_result = subprocess.run(
+                [OLLAMA_PATH, "pull", MODEL_NAME], 
+                capture_output=True, 
+                text=True,
+                check=True
+            )
+            
+            # Check if pull was successful
+            if "pulling manifest" in pull_result.stdout.lower() or "pulled" in pull_result.stdout.lower():
+                logging.info(f"Model '{MODEL_NAME}' downloaded successfully.")
+                print(f"✅ Model '{MODEL_NAME}' downloaded successfully.")
+            else:
+                logging.error(f"Model download may have failed: {pull_result.stdout}")
+                print(f"⚠️ Model download may have incomplete: Check logs")
+                return False
+        else:
+            logging.info(f"Model '{MODEL_NAME}' is already available.")
+            print(f"✅ Model '{MODEL_NAME}' is already available.")
+        
+        _model_ready = MODEL_NAME
+        return True
+    except subprocess.CalledProcessError as e:
+        error_msg = f"Error checking/downloading model: {e}\n{e.stderr}"
+        logging.error(error_msg)
+        print(f"❌ Error checking/downloading model: {e}")
+        return False
+    except Exception as e:
+        logging.error(f"Unexpected error checking model: {str(e)}")
+        print(f"❌ Unexpected error checking model: {str(e)}")
+        return False
+
+_semantic_cache = None
+
+def get_semantic_cache():
+    """Return the semantic cache if enabled (numpy is only needed when it is)."""
+    global _semantic_cache
+    if SEMANTIC_CACHE_DIR is None:
+        return None
+    if _semantic_cache is None:
+        from ollamabots.common.semantic_cache import SemanticCache
+        _semantic_cache = SemanticCache(SEMANTIC_CACHE_DIR, f"noteBot-{MODEL_NAME}",
+                                        threshold=SEMANTIC_CACHE_THRESHOLD)
+    return _semantic_cache
+
+_note_indexes = {}
+_note_indexes_lock = threading.Lock()
+
+def get_note_index(folder: Path):
+    """Return the search index of an output folder if indexing is enabled."""
+    if not NOTE_INDEX:
+        return None
+    folder = Path(folder).resolve()
+    with _note_indexes_lock:
+        if folder not in _note_indexes:
+            _note_indexes[folder] = NoteIndex(folder, embed_model=INDEX_EMBED_MODEL)
+        return _note_indexes[folder]
+
+def save_note_indexes():
+    for index in _note_indexes.values():
+        index.save()
+
+def ollama_query(prompt: str, timeout: int = MAX_DEADLINE) -> str:
+    """
+    Send a prompt to Ollama and return the response with enhanced error handling.
+
+    The call streams under deadlines predicted for the model (timeout is only
+    the upper bound) and is retried if it stalls or starts looping.
+    """
+    logging.info(f"Querying model '{MODEL_NAME}'...")
+    print(f"🤖 Querying model '{MODEL_NAME}' (quality: {MODEL_QUALITY.get(MODEL_NAME, 'N/A')}/10)...")
+    start_time = time.time()
+    
+    try:
+        # Use API directly for more reliable response parsing
+        import requests
+        payload = {
+            "model": MODEL_NAME,
+            "prompt": prompt,
+            "options": {"temperature": 0.1}
+        }
+        apply_thinking(payload, parse_thinking(THINKING))
+        result = stream_generate(payload, ceiling=timeout)
+        
+        elapsed = time.time() - start_time
+        metrics = format_metrics(thinking_metrics(result))
+        logging.info(f"Model responded in {elapsed:.2f}s ({metrics})")
+        print(f"✅ Model responded in {elapsed:.2f}s ({metrics})")
+        return result.get("response", "").strip()
+        
+    except GenerationAborted as e:
+        logging.error(f"Model query aborted: {e.reason}")
+        print(f"❌ Model query aborted: {e.reason}")
+        return f"⚠️ Model query aborted: {e.reason}"
+    except requests.exceptions.RequestException as e:
+        # Fallback to CLI if API fails
+        logging.warning(f"API failed ({str(e)}), trying CLI method...")
+        print(f"⚠️ API failed, trying CLI method...")
+        
+        try:
+            verbose = ["--verbose"] if tracing() else []
+            with span("model", model=MODEL_NAME, via="cli"):
+                result = subprocess.run(
+                    [OLLAMA_PATH, "run", MODEL_NAME, *cli_flags(parse_thinking(THINKING)), *verbose],
+                    input=prompt.encode(),
+                    capture_output=True,
+                    timeout=predict_timeout(payload, ceiling=timeout)
+                )
+                result.check_returncode()
+                if verbose:
+                    model_spans(parse_verbose_timings(result.stderr.decode(errors="replace")), model=MODEL_NAME)
+            elapsed = time.time() - start_time
+            logging.info(f"Model responded via CLI in {elapsed:.2f}s")
+            print(f"✅ Model responded via CLI in {elapsed:.2f}s")
+            return result.stdout.decode().strip()
+        except Exception as cli_e:
+            logging.error(f"CLI method also failed: {str(cli_e)}")
+            print(f"❌ Both API and CLI methods failed")
+            return "⚠️ Model query failed with all methods."
+    except Exception as e:
+        logging.error(f"Unexpected error during model query: {str(e)}")
+        print(f"❌ Unexpected error: {str(e)}")
+        return f"⚠️ Unexpected error: {str(e)}"
+
+def build_prompt(notes: str) -> str:
+    """Build a prompt that forces clean, direct Markdown output without any thinking text."""
+    
+    # Qwen-specific formatting for best results
+    return f"""<|im_start|>system
+You are a professional note formatter with expertise in technical documentation.
+Your ONLY task is to convert raw notes into clean, well-structured Markdown.
+Follow these rules EXACTLY:
+- NEVER include thinking text, explanations, or commentary
+- ALWAYS start with the content immediately - no greetings or introductions
+- Output ONLY valid Markdown with no extra text before or after
+- Use proper Markdown syntax (headers, lists, code blocks when appropriate)
+- Structure content logically with clear sections
+- Include a brief summary at the top if appropriate
+- Add a "Next Steps" section with actionable items
+- Fix spelling/grammar but preserve the original meaning
+- If information is unclear, make minimal professional assumptions
+<|im_end|>
+
+<|im_start|>user
+Enhance these raw notes into professional Markdown format:
+
+{notes}
+
+IMPORTANT: Output ONLY the enhanced notes in Markdown format. Begin with content immediately.
+<|im_end|>
+
+<|im_start|>assistant
+"""
+
+def clean_model_output(output: str) -> str:
+    """
+    Clean the model output to ensure it's pure Markdown with no AI thinking text.
+    Handles multiple potential issue patterns.
+    """
+    # Remove common thinking patterns
+    patterns = [
+        r'(?i)thinking.*?:.*?(?=\n[#=])',  # "Thinking: ..." before headers
+        r'(?i)thinking.*?$',
+        r'(?i)here.*?is.*?the.*?enhanced.*?version',
+        r'(?i)i will now.*?enhance.*?these.*?notes',
+        r'(?i)as requested.*?converting',
+        r'(?i)enhanced notes:',
+        r'(?i)output:',
+        r'<\|im_start\|>.*?<\|im_end\|>',
+        r'```markdown.*?```',
+        r'```.*?```'  # Any code blocks around the content
+    ]
+    
+    cleaned = output
+    for pattern in patterns:
+        cleaned = re.sub(pattern, '', cleaned, flags=re.DOTALL | re.IGNORECASE)
+    
+    # Remove any leading/trailing whitespace and non-Markdown content
+    cleaned = cleaned.strip()
+    
+    # Ensure we have proper Markdown structure
+    if not re.search(r'#{1,6}\s', cleaned) and len(cleaned.split()) > 20:
+        # If no headers but substantial content, add a default header
+        cleaned = f"# Notes\n\n{cleaned}"
+    
+    # Ensure Next Steps section exists
+    if "Next Steps" not in cleaned and "Action Items" not in cleaned:
+        cleaned += "\n\n## Next Steps\n- Review and refine these notes\n- Take action on key points identified"
+    
+    return cleaned.strip()
+
+def process_notes(input_path: Path, output_path: Path):
+    """Process one note file into Markdown output."""
+    with span("file", cat="file", file=Path(input_path).name):
+        return _process_notes(input_path, output_path)
+
+def _process_notes(input_path: Path, output_path: Path):
+    start_total = time.time()
+    input_path = Path(input_path)
+    output_path = Path(output_path)
+    
+    # Ensure model exists
+    if not ensure_model():
+        print("❌ Cannot proceed without model. Exiting.")
+        logging.error("Model check failed. Exiting.")
+        return False
+
+    # Read notes
+    try:
+        with span("read"), input_path.open("r", encoding="utf-8") as f:
+            notes = f.read()
+        logging.info(f"Loaded {len(notes)} characters from {input_path}")
+        print(f"✅ Loaded {len(notes)} characters from {input_path.name}")
+    except Exception as e:
+        error_msg = f"❌ Failed to read {input_path}: {str(e)}"
+        logging.error(error_msg)
+        print(error_msg)
+        return False
+
+    # Near-duplicate notes (templated meetings etc.) reuse an earlier result
+    cache = get_semantic_cache()
+    with span("cache lookup"):
+        hit, vector = cache.lookup(notes) if cache else (None, None)
+
+    if hit:
+        from ollamabots.common.semantic_cache import cache_note
+        print(f"♻️ Reusing enhanced notes of '{hit['source']}' (similarity {hit['score']:.3f})")
+        enhanced_notes = f"{cache_note(hit)}\n{hit['result']}"
+    else:
+        # Build prompt
+        logging.info("Building prompt...")
+        print("📝 Building prompt...")
+        with span("build prompt"):
+            if COMPACT_NOTES:
+                compacted = compact_notes(notes)
+                compaction_report.add(input_path.name, compacted.original_tokens, compacted.tokens)
+                logging.info(f"Notes compacted from ~{compacted.original_tokens} to ~{compacted.tokens} tokens")
+                print(f"🗜️ Notes compacted: ~{compacted.original_tokens} → ~{compacted.tokens} tokens")
+                prompt = build_prompt(compacted.text)
+            else:
+                prompt = build_prompt(notes)
+        logging.info(f"Prompt built ({len(prompt)} characters)")
+        print(f"✅ Prompt built ({len(prompt)} characters)")
+
+        # Query model
+        raw_output = ollama_query(prompt)
+        
+        # Clean output
+        logging.info("Cleaning model output...")
+        print("🧹 Cleaning model output...")
+        with span("postprocess"):
+            enhanced_notes = clean_model_output(raw_output)
+
+        if cache and enhanced_notes.strip() and not raw_output.startswith("⚠️"):
+            cache.add(notes, enhanced_notes, input_path.name, vector)
+    
+    if not enhanced_notes.strip():
+        error_msg = "❌ Model returned empty content after cleaning"
+        logging.error(error_msg)
+        print(error_msg)
+        return False
+
+    # Related notes come from the search index (the note's own embedding is reused for indexing)
+    index = get_note_index(output_path.parent)
+    note_vector = index.embed(enhanced_notes) if index else None
+    related = index.related(enhanced_notes, RELATED_NOTES, exclude=output_path.name, vector=note_vector) \
+        if index and RELATED_NOTES else []
+
+    # Save output
+    try:
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with span("write"), output_path.open("w", encoding="utf-8") as f:
+            f.write(enhanced_notes + format_related(related))
+        logging.info(f"Enhanced notes saved to {output_path}")
+        print(f"✅ Enhanced notes saved to {output_path}")
+        if index:
+            with span("index"):
+                index.add(output_path.name, enhanced_notes, output_path, vector=note_vector)
+    except Exception as e:
+        error_msg = f"❌ Failed to write output file: {str(e)}"
+        logging.error(error_msg)
+        print(error_msg)
+        return False
+
+    total_elapsed = time.time() - start_total
+    logging.info(f"Processed {input_path.name} in {total_elapsed:.2f}s")
+    print(f"🎉 Completed processing in {total_elapsed:.2f}s")
+    
+    # Show preview of first few lines
+    preview_lines = enhanced_notes.split('\n')[:5]
+    preview = '\n'.join(preview_lines) + ("..." if len(enhanced_notes.split('\n')) > 5 else "")
+    print("\n📄 Output preview:")
+    print(preview)
+    print()
+    
+    return True
+
+def process_folder(input_folder: Path, output_folder: Path):
+    """Process all unprocessed .txt files in a folder."""
+    input_folder = Path(input_folder)
+    output_folder = Path(output_folder)
+    
+    start_all = time.time()
+    processed = 0
+    skipped = 0
+    
+    # Create output folder if it doesn't exist
+    output_folder.mkdir(parents=True, exist_ok=True)
+
+    # Pick up outputs written before indexing was enabled, edited by hand, or deleted
+    index = get_note_index(output_folder)
+    if index:
+        indexed, removed = index.refresh()
+        if indexed or removed:
+            print(f"🔎 Search index: {indexed} note(s) indexed, {removed} removed")
+    
+    pending = []
+    for txt_file in input_folder.glob("*.txt"):
+        output_file = output_folder / (txt_file.stem + ".md")
+        
+        if output_file.exists():
+            msg = f"⏩ Skipping {txt_file.name} (already processed)"
+            print(msg)
+            logging.info(msg)
+            skipped += 1
+            continue
+        pending.append((txt_file, output_file))
+
+    workers = min(WORKERS or get_pool().parallelism(MODEL_NAME), len(pending))
+    if workers > 1 and ensure_model():
+        # Each request goes to the least busy host, so notes run in parallel across hosts
+        print(f"\n🚀 Processing {len(pending)} notes with {workers} workers "
+              f"across {len(get_pool().hosts)} Ollama host(s)")
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            processed = sum(bool(ok) for ok in pool.map(lambda paths: process_notes(*paths), pending))
+    else:
+        for txt_file, output_file in pending:
+            print(f"\n📌 Processing {txt_file.name}...")
+            if process_notes(txt_file, output_file):
+                processed += 1
+    
+    if compaction_report.rows:
+        table = compaction_report.format()
+        logging.info(f"Prompt tokens saved by compaction (estimated):\n{table}")
+        print(f"\n🗜️ Prompt tokens saved by compaction (estimated):\n{table}")
+
+    if index:
+        index.save()
+        print(f"🔎 Search index: {index.live} notes in {index.dir}")
+
+    total_all = time.time() - start_all
+    summary = f"\n✅ Summary: {processed} processed, {skipped} skipped | Total time: {total_all:.2f}s"
+    print(summary)
+    logging.info(summary.strip())
+    
+    return processed > 0
+
+def search_cli(argv):
+    """`ollamabots notebot search QUERY`: rank the enhanced notes of a folder."""
+    parser = argparse.ArgumentParser(prog="ollamabots notebot search",
+                                     description="Search the enhanced notes of an output folder")
+    parser.add_argument('query', nargs='+')
+    parser.add_argument('--folder', default=DEFAULT_OUTPUT_FOLDER,
+                        help='Output folder whose notes are searched (default: %(default)s)')
+    parser.add_argument('-k', '--limit', type=int, default=10, help='Results shown (default: %(default)s)')
+    parser.add_argument('--embed-model', default=INDEX_EMBED_MODEL,
+                        help='Embedding model of the index vectors (default: the one the index was built with)')
+    parser.add_argument('--no-vectors', action='store_true', help='Rank with BM25 only (no model call)')
+    parser.add_argument('--reindex', action='store_true',
+                        help='Index new, edited and deleted notes in the folder before searching')
+    args = parser.parse_args(argv)
+
+    folder = Path(args.folder)
+    if not folder.is_dir():
+        print(f"❌ Output folder '{folder}' does not exist")
+        return 1
+    index = NoteIndex(folder)
+    index.embed_model = args.embed_model or index.vector_model
+    if args.reindex or not index.live:
+        indexed, removed = index.refresh()
+        index.save()
+        print(f"🔎 Indexed {indexed} note(s), removed {removed}")
+
+    query = " ".join(args.query)
+    start = time.perf_counter()
+    hits = index.search(query, args.limit, use_vectors=not args.no_vectors)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"🔎 {len(hits)} result(s) for \"{query}\" among {index.live} notes in {elapsed:.1f} ms")
+    for rank, hit in enumerate(hits, 1):
+        print(f"{rank:3}. {hit['title']}  ({hit['name']}, score {hit['score']})")
+    return 0
+
+def main(argv=None):
+    global MODEL_NAME, SEMANTIC_CACHE_DIR, SEMANTIC_CACHE_THRESHOLD, THINKING, WORKERS, COMPACT_NOTES
+    global NOTE_INDEX, INDEX_EMBED_MODEL, RELATED_NOTES
+
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv and argv[0] == "search" and not Path("search").exists():
+        sys.exit(search_cli(argv[1:]))
+
+    parser = argparse.ArgumentParser(
+        prog="ollamabots notebot",
+        description='Enhance raw notes into professional Markdown using AI',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    
+    parser.add_argument('input', nargs='?', default=None,
+                        help='Path to a note file or folder of notes (default: %(default)s)',
+                        metavar='INPUT')
+    parser.add_argument('output', nargs='?', default=None,
+                        help='Path for output file or folder (default: %(default)s)',
+                        metavar='OUTPUT')
+    parser.add_argument('-m', '--model', default=MODEL_NAME,
+                        help='Ollama model to use (default: %(default)s)')
+    parser.add_argument('-f', '--force', action='store_true',
+                        help='Process even if output file exists')
+    parser.add_argument('-v', '--verbose', action='store_true',
+                        help='Show detailed processing information')
+    parser.add_argument('--think', default=THINKING, metavar='off|on|N',
+                        help='Model reasoning: off, on, or a thinking token budget (default: %(default)s)')
+    parser.add_argument('--semantic-cache', metavar='DIR', default=None,
+                        help='Reuse results for near-duplicate notes, caching embeddings in DIR')
+    parser.add_argument('--cache-threshold', type=float, default=SEMANTIC_CACHE_THRESHOLD,
+                        help='Cosine similarity required for a cache hit (default: %(default)s)')
+    parser.add_argument('-w', '--workers', type=int, default=WORKERS,
+                        help='Notes processed at once in folder mode (default: one per host in OLLAMA_HOSTS, or its tuned parallelism)')
+    parser.add_argument('--no-compact', action='store_true',
+                        help='Send notes verbatim (no whitespace collapsing or log truncation)')
+    parser.add_argument('--no-index', action='store_true',
+                        help='Do not keep the search index of the output folder up to date')
+    parser.add_argument('--embed-model', default=INDEX_EMBED_MODEL,
+                        help='Also store embedding vectors from this model in the search index (e.g. nomic-embed-text)')
+    parser.add_argument('--related', type=int, default=RELATED_NOTES, metavar='N',
+                        help='End each output with links to its N most related notes (default: %(default)s)')
+    
+    args = parser.parse_args(argv)
+    
+    # Set global model if specified
+    MODEL_NAME = args.model
+    if args.semantic_cache:
+        SEMANTIC_CACHE_DIR = Path(args.semantic_cache)
+    SEMANTIC_CACHE_THRESHOLD = args.cache_threshold
+    THINKING = args.think
+    WORKERS = args.workers
+    COMPACT_NOTES = not args.no_compact
+    NOTE_INDEX = not args.no_index
+    INDEX_EMBED_MODEL = args.embed_model
+    RELATED_NOTES = args.related
+    
+    # Determine input and output paths
+    if args.input:
+        input_path = Path(args.input)
+        
+        if input_path.is_file():
+            # Single file processing
+            if args.output:
+                output_path = Path(args.output)
+            else:
+                # Default output in same folder with .md extension
+                output_path = input_path.with_suffix('.md')
+            
+            # Setup logging specific to this file
+            log_file = setup_logging(input_path)
+            print(f"📝 Logging to: {log_file}")
+            
+            # Process the single file
+            success = process_notes(input_path, output_path)
+            
+        elif input_path.is_dir():
+            # Folder processing
+            if args.output:
+                output_folder = Path(args.output)
+            else:
+                output_folder = input_path / "Markdown Outputs"
+            
+            # Setup logging for folder processing
+            log_file = setup_logging(input_path)
+            print(f"📝 Logging to: {log_file}")
+            
+            # Process the folder
+            success = process_folder(input_path, output_folder)
+            
+        else:
+            print(f"❌ Input path '{input_path}' is neither a file nor a directory")
+            sys.exit(1)
+            
+    else:
+        # Default behavior - process default folders
+        log_file = setup_logging(DEFAULT_INPUT_FOLDER)
+        print(f"📝 Logging to: {log_file}")
+        print(f"📁 Processing default folders:")
+        print(f"   Input: {DEFAULT_INPUT_FOLDER}")
+        print(f"   Output: {DEFAULT_OUTPUT_FOLDER}")
+        success = process_folder(DEFAULT_INPUT_FOLDER, DEFAULT_OUTPUT_FOLDER)
+    
+    save_note_indexes()
+    if _semantic_cache is not None:
+        _semantic_cache.save()
+
+    # Exit with appropriate code
+    sys.exit(0 if success else 1)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
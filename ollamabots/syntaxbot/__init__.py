@@ -0,0 +1 @@
+"""syntaxBot - SQL syntax and logic checker for stored procedures."""
@@ -0,0 +1,192 @@
+# call_graph.py
+"""
+Procedure call graph of a syntaxBot folder, for impact-based re-review.
+
+Each .sql file is parsed for the procedures it defines (CREATE / ALTER
+PROCEDURE; a file with no definition is a procedure body named after the
+file) and the procedures it calls (EXEC / EXECUTE). Files are parsed again
+only when their content hash changes. The graph is saved as JSON next to the
+reports.
+
+A file needs review when its review key changes. The key is a hash of the
+review context (rules, models and review settings) plus the content of every file the file
+reaches through calls, so it changes when the file itself changes and when
+any procedure it calls changes. Only the changed files and their transitive
+callers are reviewed.
+
+Files that need review are grouped for batched prompts. Files that call each
+other, or that make mostly the same calls (e.g. a bfsp_* family using the same
+cp_* helpers), form one group and share a context header.
+"""
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+
+COUPLING_THRESHOLD = 0.5  # Jaccard similarity of two files' callees that groups them for one prompt
+
+_COMMENT_OR_STRING = re.compile(r"--[^\n]*|/\*.*?\*/|N?'(?:[^']|'')*'", re.S)
+_NAME = r"((?:\[?\w+\]?\.){0,2}\[?\w+\]?)"  # [database.][schema.]procedure, brackets optional
+_DEFINES = re.compile(rf"\b(?:CREATE(?:\s+OR\s+ALTER)?|ALTER)\s+PROC(?:EDURE)?\s+{_NAME}", re.I)
+_CALLS = re.compile(rf"\bEXEC(?:UTE)?\s+(?:@\w+\s*=\s*)?{_NAME}", re.I)
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def procedure_key(name: str) -> str:
+    """Case-insensitive procedure name without brackets, database or schema."""
+    return name.replace("[", "").replace("]", "").split(".")[-1].lower()
+
+
+def parse_procedures(sql_text: str, filename: str) -> tuple:
+    """(procedures defined, procedures called) by one file, ignoring comments and string literals."""
+    code = _COMMENT_OR_STRING.sub(" ", sql_text)
+    defines = sorted({procedure_key(m.group(1)) for m in _DEFINES.finditer(code)}) or [Path(filename).stem.lower()]
+    calls = sorted({procedure_key(m.group(1)) for m in _CALLS.finditer(code)} - set(defines))
+    return defines, calls
+
+
+class CallGraph:
+    """Files, the procedures they define and call, and the key of each file's last review."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            data = {}
+        self.files = data.get("files", {})        # file -> {"hash", "defines", "calls"}
+        self.reviewed = data.get("reviewed", {})  # file -> {"hash", "key"} of its last full or triage review
+        self._index()
+
+    def _index(self):
+        self.owner = {}  # procedure -> file defining it
+        for file, entry in sorted(self.files.items()):
+            for procedure in entry["defines"]:
+                self.owner.setdefault(procedure, file)
+        self.callees = {file: sorted({self.owner[p] for p in entry["calls"] if p in self.owner} - {file})
+                        for file, entry in self.files.items()}
+        self.call_sets = {file: set(entry["calls"]) for file, entry in self.files.items()}
+        self.callers = {file: [] for file in self.files}
+        for file, callees in self.callees.items():
+            for callee in callees:
+                self.callers[callee].append(file)
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"files": self.files, "reviewed": self.reviewed}, indent=1), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    def refresh(self, folder: Path) -> int:
+        """Parse new and changed .sql files and forget deleted ones; returns the number parsed."""
+        parsed = 0
+        present = {}
+        for sql_file in sorted(Path(folder).glob("*.sql")):
+            text = sql_file.read_text(encoding="utf-8")
+            digest = content_hash(text)
+            present[sql_file.name] = self.files.get(sql_file.name)
+            if present[sql_file.name] is None or present[sql_file.name]["hash"] != digest:
+                defines, calls = parse_procedures(text, sql_file.name)
+                present[sql_file.name] = {"hash": digest, "defines": defines, "calls": calls}
+                parsed += 1
+        self.files = present
+        self.reviewed = {file: entry for file, entry in self.reviewed.items() if file in present}
+        self._index()
+        return parsed
+
+    # ----- Impact -----
+    def reachable(self, file: str) -> list:
+        """The file and every file it reaches through calls."""
+        seen, stack = {file}, [file]
+        while stack:
+            for callee in self.callees.get(stack.pop(), ()):
+                if callee not in seen:
+                    seen.add(callee)
+                    stack.append(callee)
+        return sorted(seen)
+
+    def review_key(self, file: str, context: str) -> str:
+        closure = "\n".join(f"{f}:{self.files[f]['hash']}" for f in self.reachable(file))
+        return content_hash(f"{context}\n{closure}")
+
+    def changed(self, file: str) -> bool:
+        return self.reviewed.get(file, {}).get("hash") != self.files[file]["hash"]
+
+    def pending(self, context: str) -> dict:
+        """file -> reason, for every file whose review key changed since its last review."""
+        pending = {}
+        for file in sorted(self.files):
+            if self.reviewed.get(file, {}).get("key") == self.review_key(file, context):
+                continue
+            if file not in self.reviewed:
+                pending[file] = "not reviewed yet"
+            elif self.changed(file):
+                pending[file] = "changed"
+            else:
+                changed = [f for f in self.reachable(file) if f != file and self.changed(f)]
+                pending[file] = f"calls {', '.join(changed)}" if changed else "rules or settings changed since its last review"
+        return pending
+
+    def mark_reviewed(self, file: str, context: str):
+        self.reviewed[file] = {"hash": self.files[file]["hash"], "key": self.review_key(file, context)}
+
+    # ----- Batching -----
+    def coupled(self, a: str, b: str) -> bool:
+        if b in self.callees[a] or a in self.callees[b]:
+            return True
+        union = len(self.call_sets[a] | self.call_sets[b])
+        return union > 0 and len(self.call_sets[a] & self.call_sets[b]) / union >= COUPLING_THRESHOLD
+
+    def groups(self, files: list) -> list:
+        """Files split into groups of coupled files (connected components), each in file order."""
+        parent = {file: file for file in files}
+
+        def root(file):
+            while parent[file] != file:
+                parent[file] = parent[parent[file]]
+                file = parent[file]
+            return file
+
+        for i, a in enumerate(files):
+            for b in files[i + 1:]:
+                if root(a) != root(b) and self.coupled(a, b):
+                    parent[root(b)] = root(a)
+        groups = {}
+        for file in files:
+            groups.setdefault(root(file), []).append(file)
+        return list(groups.values())
+
+    def shared_context(self, files: list) -> list:
+        """Context lines for a batch: calls between its files, calls they share, and calls to other files."""
+        batch = set(files)
+        lines = []
+        for file in files:
+            inside = [callee for callee in self.callees[file] if callee in batch]
+            if inside:
+                lines.append(f"- {file} calls {', '.join(inside)}")
+        shared = {}
+        for file in files:
+            for procedure in self.files[file]["calls"]:
+                shared.setdefault(procedure, []).append(file)
+        for procedure, callers in sorted(shared.items()):
+            owner = self.owner.get(procedure)
+            if owner in batch:
+                continue
+            where = f" (defined in {owner})" if owner else ""
+            if len(callers) > 1:
+                lines.append(f"- {procedure}{where} is called by {', '.join(callers)}")
+            elif owner:
+                lines.append(f"- {callers[0]} calls {procedure}{where}")
+        return lines
+
+    def describe(self, file: str) -> str:
+        entry = self.files[file]
+        internal = [f"{p} ({self.owner[p]})" for p in entry["calls"] if p in self.owner]
+        external = [p for p in entry["calls"] if p not in self.owner]
+        return (f"{file}: defines {', '.join(entry['defines'])}\n"
+                f"  calls {', '.join(internal) or '-'}; outside the folder: {', '.join(external) or '-'}\n"
+                f"  called by {', '.join(self.callers[file]) or '-'}")
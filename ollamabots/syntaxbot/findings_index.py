@@ -0,0 +1,148 @@
+# findings_index.py
+"""
+SQLite index of syntaxBot findings.
+
+Static findings from analyze_sql (and, optionally, the bullet points of the
+"Syntax Errors / Warnings" and "Logic or Rule Violations" report sections) are
+stored per file with line, rule, severity and run id. Files are re-indexed
+only when their content hash changes, so the index can be refreshed after
+every run and queried across the whole repository.
+"""
+import hashlib
+import re
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id      TEXT PRIMARY KEY,
+    started_at  TEXT,
+    model       TEXT
+);
+CREATE TABLE IF NOT EXISTS files (
+    file          TEXT NOT NULL,
+    source        TEXT NOT NULL,      -- 'static' or 'llm'
+    content_hash  TEXT NOT NULL,
+    run_id        TEXT,
+    indexed_at    TEXT,
+    PRIMARY KEY (file, source)
+);
+CREATE TABLE IF NOT EXISTS findings (
+    id        INTEGER PRIMARY KEY,
+    file      TEXT NOT NULL,
+    line      INTEGER,
+    rule      TEXT NOT NULL,
+    severity  TEXT NOT NULL,
+    message   TEXT,
+    source    TEXT NOT NULL,
+    run_id    TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_findings_rule ON findings(rule);
+CREATE INDEX IF NOT EXISTS idx_findings_file ON findings(file);
+"""
+
+SEVERITIES = ("error", "warning", "info")
+
+# Report sections whose bullet points are indexed as LLM findings
+LLM_SECTIONS = {
+    "syntax errors": "llm_syntax",
+    "logic or rule violations": "llm_logic",
+}
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def parse_report_findings(report: str) -> list:
+    """Extract bullet points from the findings sections of a Markdown report."""
+    findings = []
+    rule = None
+    for raw in report.splitlines():
+        line = raw.strip()
+        heading = re.match(r"#{1,6}\s*(.+?):?\s*$", line)
+        if heading:
+            title = heading.group(1).lower()
+            rule = next((r for key, r in LLM_SECTIONS.items() if key in title), None)
+            continue
+        bullet = re.match(r"(?:[*\-+]|\d+\.)\s+(.+)", line)
+        if rule and bullet:
+            message = bullet.group(1).strip()
+            line_ref = re.search(r"\bline\s+(\d+)", message, re.I)
+            findings.append({
+                "line": int(line_ref.group(1)) if line_ref else None,
+                "rule": rule,
+                "severity": "warning",
+                "message": message,
+            })
+    return findings
+
+
+class FindingsIndex:
+    """Thin wrapper around the findings database."""
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path))
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def start_run(self, run_id: str, model: str):
+        with self.conn:
+            self.conn.execute("INSERT OR IGNORE INTO runs VALUES (?, ?, ?)",
+                              (run_id, datetime.now().isoformat(timespec="seconds"), model))
+
+    def is_current(self, file: str, text: str, source: str = "static") -> bool:
+        row = self.conn.execute("SELECT content_hash FROM files WHERE file = ? AND source = ?",
+                                (file, source)).fetchone()
+        return row is not None and row["content_hash"] == content_hash(text)
+
+    def update_file(self, file: str, text: str, findings: list, run_id: str, source: str = "static"):
+        """Replace the findings of one file/source (text is what they were derived from)."""
+        with self.conn:
+            self.conn.execute("DELETE FROM findings WHERE file = ? AND source = ?", (file, source))
+            self.conn.executemany(
+                "INSERT INTO findings (file, line, rule, severity, message, source, run_id) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(file, f.get("line"), f["rule"], f["severity"], f.get("message"), source, run_id)
+                 for f in findings],
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)",
+                (file, source, content_hash(text), run_id, datetime.now().isoformat(timespec="seconds")),
+            )
+
+    def query(self, rule=None, file=None, severity=None, run_id=None, source=None) -> list:
+        clauses, params = [], []
+        for column, value in (("rule", rule), ("file", file), ("severity", severity),
+                              ("run_id", run_id), ("source", source)):
+            if value:
+                clauses.append(f"{column} LIKE ?" if column in ("rule", "file") else f"{column} = ?")
+                params.append(value)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return self.conn.execute(
+            f"SELECT file, line, rule, severity, message, source, run_id FROM findings {where} "
+            "ORDER BY file, line", params).fetchall()
+
+    def files_without(self, rule: str) -> list:
+        """Indexed files that have no finding matching rule (e.g. procs that never set a ResultCode)."""
+        return [row["file"] for row in self.conn.execute(
+            "SELECT DISTINCT file FROM files WHERE source = 'static' AND file NOT IN "
+            "(SELECT file FROM findings WHERE rule LIKE ?) ORDER BY file", (rule,))]
+
+    def summary(self) -> list:
+        """Finding counts per rule, with the number of files affected."""
+        return self.conn.execute(
+            "SELECT rule, severity, COUNT(*) AS findings, COUNT(DISTINCT file) AS files "
+            "FROM findings GROUP BY rule, severity ORDER BY files DESC, rule").fetchall()
@@ -0,0 +1,369 @@
+# rule_engine.py
+"""
+Deterministic ResultCode rule checks compiled from prompt.txt.
+
+prompt.txt describes each process as a header such as "Under Review (34022)"
+followed by its result codes ("Cancelled (950)") and one action per line
+("Update Folder Status: Cancelled", "Set Process End Date: Current date", ...).
+compile_rules() turns the actions it recognises into expectations that are
+checked against the matching `IF @ResultCode = N` block of a procedure, with
+comments stripped. Actions it cannot check mechanically are kept as advisory
+notes for the report.
+
+Status expectations also check the value that is set. The SQL passes numeric
+StatusCodes, so the status name is read from the statement's comment
+("@StatusCode = 15 -- cancelled"). A statement whose comment names another
+status fails; one without a readable name is inconclusive. A procedure passes
+only when every expectation passes; advisory or inconclusive items leave it
+inconclusive so the model still reviews it.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Optional
+
+# Action line in prompt.txt -> expectation kinds it implies (first match wins)
+ACTION_PATTERNS = [
+    (r"update (?:the )?(?:folder (?:and|&) process|process (?:and|&) folder) status", ["folder_status", "process_status"]),
+    (r"update folder status", ["folder_status"]),
+    (r"update (?:process status|initiated process)|updates process", ["process_status"]),
+    (r"end date", ["end_date"]),
+    (r"^validate(?!:\s*any user)", ["validation"]),
+    (r"\bemail\b|notification", ["email"]),
+    (r"^insert '", ["insert_process"]),
+    (r"removes? (?:the )?(?:default )?assigned|removes assigned", ["clear_assignment"]),
+]
+# Compound lines also imply an end date ("Update Process Status: Closed, set end date")
+END_DATE_HINT = re.compile(r"set end dates?|end date", re.I)
+
+# Expectation kind -> pattern that satisfies it inside a ResultCode block
+CHECKS = {
+    "folder_status": r"cp_UpdateFolder\b(?!Process)|UPDATE\s+Folder\s+SET[^;]*StatusCode",
+    "process_status": r"cp_UpdateFolderProcess\b|UPDATE\s+FolderProcess\s+SET[^;]*StatusCode",
+    "end_date": r"@?(?:End|Final)Date\s*=",
+    "validation": r"\bRAISERROR\b|\bTHROW\b",
+    "email": r"Send_Templated_Mail|sp_send_dbmail",
+    "insert_process": r"Insert\w*Process|INSERT\s+INTO\s+FolderProcess\b",
+    "clear_assignment": r"@AssignedUserIsNULL\s*=\s*1|AssignedUser\s*=\s*NULL",
+}
+
+# "Update Folder Status: Pending Additional Information / Under Review" -> "Pending Additional Information"
+STATUS_VALUE = re.compile(r"status:\s*([A-Za-z][A-Za-z ]*?)\s*(?:$|[,(/→.])", re.I)
+STATUS_KINDS = ("folder_status", "process_status")
+MAX_STATUS_WORDS = 4  # longer values ("Last status before ...") describe a rule, not a status name
+
+CODE_LINE = re.compile(r"^(?P<name>[^()]+?)\s*\((?P<codes>\d+(?:\s*/\s*\d+)*)(?:\s*[–-][^)]*)?\)\s*$")
+PROCESS_IN_PARENS = re.compile(r"\(Process\s+(\d+)")
+
+
+@dataclass
+class Expectation:
+    kind: str          # key of CHECKS, or "advisory"
+    text: str          # the prompt.txt line it came from
+
+
+@dataclass
+class CodeRule:
+    code: str
+    name: str
+    expectations: list = field(default_factory=list)
+
+
+@dataclass
+class ProcessRules:
+    name: str
+    process_codes: list
+    codes: dict = field(default_factory=dict)  # ResultCode -> CodeRule
+
+
+@dataclass
+class CheckOutcome:
+    code: str
+    kind: str
+    text: str
+    status: str        # "pass", "fail", "inconclusive" or "advisory"
+    line: Optional[int] = None
+
+
+@dataclass
+class RuleCheckResult:
+    status: str        # "pass", "fail" or "inconclusive"
+    process: Optional[ProcessRules]
+    outcomes: list = field(default_factory=list)
+    reason: str = ""
+
+    @property
+    def failed_codes(self) -> list:
+        return sorted({o.code for o in self.outcomes if o.status == "fail"}, key=int)
+
+    @property
+    def review_codes(self) -> list:
+        """ResultCodes the model has to look at: failed, inconclusive or advisory ones."""
+        return sorted({o.code for o in self.outcomes if o.status != "pass"}, key=int)
+
+
+# ===== Compilation =====
+def _is_process_header(lines: list, i: int) -> Optional[list]:
+    line = lines[i]
+    inside = PROCESS_IN_PARENS.search(line)
+    if inside:
+        return [inside.group(1)]
+    match = CODE_LINE.match(line)
+    if not match:
+        return None
+    following = next((l for l in lines[i + 1:i + 4] if l), "")
+    if "process" in match.group("name").lower() or following.lower().startswith("default assigned user"):
+        return re.findall(r"\d+", match.group("codes"))
+    return None
+
+
+def classify_action(line: str) -> list:
+    """Expectation kinds implied by one action line (empty if none are checkable)."""
+    text = line.strip().lower()
+    if text.startswith(("optional", "example", "default assign", "auto assign", "inserted",
+                        "confirm", "next step")):
+        return []
+    for pattern, kinds in ACTION_PATTERNS:
+        if re.search(pattern, text):
+            kinds = list(kinds)
+            if "end_date" not in kinds and END_DATE_HINT.search(text):
+                kinds.append("end_date")
+            return kinds
+    return []
+
+
+def compile_rules(prompt_text: str) -> list:
+    """Compile prompt.txt into ProcessRules with per-ResultCode expectations."""
+    lines = [line.strip() for line in prompt_text.splitlines()]
+    processes = []
+    current_process = None
+    current_code = None
+
+    for i, line in enumerate(lines):
+        if not line:
+            continue
+        header_codes = _is_process_header(lines, i)
+        if header_codes:
+            current_process = ProcessRules(line, header_codes)
+            processes.append(current_process)
+            current_code = None
+            continue
+        if current_process is None:
+            continue
+        match = CODE_LINE.match(line)
+        if match:
+            code = re.findall(r"\d+", match.group("codes"))[0]
+            current_code = CodeRule(code, match.group("name").strip())
+            current_process.codes[code] = current_code
+            continue
+        if current_code is None:
+            continue  # process-level description before the first result code
+        kinds = classify_action(line)
+        if kinds:
+            current_code.expectations.extend(Expectation(kind, line) for kind in kinds)
+        elif not line.endswith(":"):
+            current_code.expectations.append(Expectation("advisory", line))
+
+    # Processes without result codes (e.g. a parent request process) have nothing to check
+    return [process for process in processes if process.codes]
+
+
+def resultcode_descriptions(processes: list) -> dict:
+    """ResultCode -> description, the mapping load_resultcode_rules() returns."""
+    return {code: f"{rule.name} ({process.name})"
+            for process in processes for code, rule in process.codes.items()}
+
+
+# ===== Checking =====
+def strip_comments(sql_text: str) -> str:
+    """Blank out -- and /* */ comments and string literals, keeping line numbers."""
+    def blank(match):
+        return re.sub(r"[^\n]", " ", match.group(0))
+    return re.sub(r"/\*.*?\*/|--[^\n]*|'(?:[^']|'')*'", blank, sql_text, flags=re.S)
+
+
+def split_resultcode_blocks(sql_text: str) -> dict:
+    """ResultCode -> (first line, last line, code) of each `IF @ResultCode = N` block."""
+    code_only = strip_comments(sql_text)
+    lines = code_only.splitlines()
+    starts = [(i, m.group(1)) for i, line in enumerate(lines)
+              for m in [re.search(r"\bIF\s+@ResultCode\s*=\s*(\d+)", line, re.I)] if m]
+    blocks = {}
+    for n, (start, code) in enumerate(starts):
+        end = starts[n + 1][0] if n + 1 < len(starts) else len(lines)
+        blocks.setdefault(code, (start + 1, end, "\n".join(lines[start:end])))
+    return blocks
+
+
+def status_name(text: str) -> Optional[str]:
+    """The status an expectation asks for, normalised, or None when it is not a plain status name."""
+    match = STATUS_VALUE.search(text)
+    if not match:
+        return None
+    name = _words(match.group(1))
+    return name if 0 < len(name.split()) <= MAX_STATUS_WORDS else None
+
+
+def _words(text: str) -> str:
+    return " ".join(re.findall(r"[a-z0-9]+", text.lower()))
+
+
+def _statements(pattern: str, block: str, raw_lines: list, start: int):
+    """(line, raw text) of each statement in a block matching pattern, from the comment line just
+    above it through the end of the line holding its ';', so a comment naming the status is included."""
+    for found in re.finditer(pattern, block, re.I):
+        first = block[:found.start()].count("\n")
+        end = block.find(";", found.end())
+        last = block[:end].count("\n") if end != -1 else len(raw_lines) - 1
+        above = first - 1 if first and raw_lines[first - 1].strip().startswith("--") else first
+        yield start + first, "\n".join(raw_lines[above:last + 1])
+
+
+def check_status(expectation: Expectation, block: str, raw_lines: list, start: int, known: set) -> tuple:
+    """(status, line) of a status expectation: the call must be there and set the expected status."""
+    statements = list(_statements(CHECKS[expectation.kind], block, raw_lines, start))
+    if not statements:
+        return "fail", start
+    expected = status_name(expectation.text)
+    if expected is None:
+        return "inconclusive", statements[0][0]
+    wrong = None
+    for line, statement in statements:
+        words = f" {_words(statement)} "
+        if f" {expected} " in words:
+            return "pass", line
+        others = [name for name in known if name != expected and expected not in name and f" {name} " in words]
+        if not others:
+            return "inconclusive", line
+        wrong = wrong or line
+    return "fail", wrong
+
+
+def match_process(sql_text: str, processes: list) -> Optional[ProcessRules]:
+    """Find the process a procedure implements: a process code in its header comments,
+    else the process whose result codes it handles best."""
+    header = "\n".join(sql_text.splitlines()[:15])
+    header_numbers = set(re.findall(r"\b\d{5}\b", "\n".join(re.findall(r"--[^\n]*", header))))
+    for process in processes:
+        if header_numbers & set(process.process_codes):
+            return process
+
+    handled = set(split_resultcode_blocks(sql_text))
+    best, best_overlap = None, 0
+    for process in processes:
+        overlap = len(handled & set(process.codes))
+        if overlap > best_overlap:
+            best, best_overlap = process, overlap
+    if best and best_overlap * 2 >= len(best.codes):
+        return best
+    return None
+
+
+def check_sql(sql_text: str, processes: list) -> RuleCheckResult:
+    """Evaluate the compiled expectations against a procedure."""
+    process = match_process(sql_text, processes)
+    if process is None:
+        return RuleCheckResult("inconclusive", None, reason="no matching process in prompt.txt")
+
+    blocks = split_resultcode_blocks(sql_text)
+    raw_lines = sql_text.splitlines()
+    known = {name for p in processes for rule in p.codes.values() for e in rule.expectations
+             if e.kind in STATUS_KINDS for name in [status_name(e.text)] if name}
+    outcomes = []
+    for code, rule in process.codes.items():
+        if code not in blocks:
+            outcomes.append(CheckOutcome(code, "handler", f"{rule.name} ({code}) is not handled", "fail"))
+            continue
+        start, end, block = blocks[code]
+        for expectation in rule.expectations:
+            if expectation.kind == "advisory":
+                outcomes.append(CheckOutcome(code, "advisory", expectation.text, "advisory", start))
+                continue
+            if expectation.kind in STATUS_KINDS:
+                status, line = check_status(expectation, block, raw_lines[start - 1:end], start, known)
+                outcomes.append(CheckOutcome(code, expectation.kind, expectation.text, status, line))
+                continue
+            found = re.search(CHECKS[expectation.kind], block, re.I)
+            line = start + block[:found.start()].count("\n") if found else start
+            outcomes.append(CheckOutcome(code, expectation.kind, expectation.text,
+                                         "pass" if found else "fail", line))
+
+    if any(o.status == "fail" for o in outcomes):
+        return RuleCheckResult("fail", process, outcomes)
+    unverified = sum(1 for o in outcomes if o.status != "pass")
+    if unverified:
+        return RuleCheckResult("inconclusive", process, outcomes,
+                               reason=f"{unverified} expectations could not be verified from the SQL")
+    return RuleCheckResult("pass", process, outcomes)
+
+
+def rule_findings(result: RuleCheckResult) -> list:
+    """Failed expectations as findings for the findings index."""
+    return [{"line": o.line, "rule": f"rule_{o.kind}", "severity": "error",
+             "message": f"ResultCode {o.code}: {o.text}"}
+            for o in result.outcomes if o.status == "fail"]
+
+
+def focus_ranges(sql_text: str, result: RuleCheckResult) -> Optional[list]:
+    """(first, last, ResultCode) line ranges of the preamble and the ResultCode blocks that did not
+    pass every check, or None when the whole procedure should be shown."""
+    if result.process is None or not result.review_codes:
+        return None
+    blocks = split_resultcode_blocks(sql_text)
+    first_block = min((start for start, _, _ in blocks.values()), default=len(sql_text.splitlines()) + 1)
+    ranges = [(1, first_block - 1, None)]
+    for code in result.review_codes:
+        if code in blocks:
+            start, end, _ = blocks[code]
+            ranges.append((start, end, code))
+    return ranges
+
+
+def focus_sections(sql_text: str, result: RuleCheckResult) -> str:
+    """The procedure preamble plus only the ResultCode blocks that did not pass, tagged with
+    their original line numbers so the model's references stay valid."""
+    ranges = focus_ranges(sql_text, result)
+    if ranges is None:
+        return sql_text
+    lines = sql_text.splitlines()
+    parts = []
+    for start, end, code in ranges:
+        parts.append(f"-- [lines {start}-{end}]" + (f" (ResultCode {code})" if code else ""))
+        parts.extend(lines[start - 1:end])
+    return "\n".join(parts)
+
+
+# ===== Reporting =====
+def format_outcomes(result: RuleCheckResult, include_passed: bool = False) -> str:
+    """One bullet per checked expectation, grouped by ResultCode."""
+    if result.process is None:
+        return f"- Rule check inconclusive: {result.reason}"
+    lines = []
+    for code, rule in result.process.codes.items():
+        mine = [o for o in result.outcomes if o.code == code and (include_passed or o.status != "pass")]
+        for o in mine:
+            mark = {"pass": "✅", "fail": "❌", "inconclusive": "❔", "advisory": "ℹ️"}[o.status]
+            where = f"block at line {o.line}: " if o.line and o.status in ("fail", "inconclusive") else ""
+            lines.append(f"- {mark} ResultCode {code} ({rule.name}): {where}{o.text}")
+    return "\n".join(lines) or "- All rule checks passed"
+
+
+def render_report(filename: str, result: RuleCheckResult, static_analysis: dict) -> str:
+    """Markdown report for a procedure that passed every deterministic check (no model call)."""
+    warnings = static_analysis["unused_blocks"] + static_analysis["best_practices"]
+    warning_lines = "\n".join(f"- {w}" for w in warnings) or "- None"
+    checked = sum(1 for o in result.outcomes if o.status == "pass")
+    return f"""# {filename}
+_Generated by the deterministic rule engine: {checked} expectations for {len(result.process.codes)} ResultCodes of {result.process.name} passed, so the model was not called._
+
+## Syntax Errors / Warnings
+{warning_lines}
+
+## Logic or Rule Violations
+- None found by the rule checks
+
+## Rule Checks
+{format_outcomes(result, include_passed=True)}
+
+## Suggested Fixes
+- None
+"""
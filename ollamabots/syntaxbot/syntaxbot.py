@@ -0,0 +1,854 @@
+import argparse
+import os
+import subprocess
+import time
+import logging
+from pathlib import Path
+from datetime import datetime
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from ollamabots.common.compaction import (CompactionReport, compact_notes, compact_sql, estimate_tokens, group_lines,
+                                          group_messages)
+from ollamabots.common.config import OLLAMA_PATH
+from ollamabots.common.pool import get_pool
+from ollamabots.common.profiling import model_spans, parse_verbose_timings, span, tracing
+from ollamabots.common.streaming import MAX_DEADLINE, GenerationAborted, predict_timeout, stream_generate
+from ollamabots.common.thinking import apply_thinking, cli_flags, parse_thinking
+from ollamabots.syntaxbot.call_graph import CallGraph, content_hash
+from ollamabots.syntaxbot.findings_index import FindingsIndex, parse_report_findings
+from ollamabots.syntaxbot.rule_engine import (check_sql, compile_rules, focus_ranges, focus_sections,
+                                              format_outcomes, render_report, resultcode_descriptions, rule_findings)
+from ollamabots.syntaxbot.triage import (TRIAGE_SCHEMA, build_triage_prompt, chunk_sql, combine, failed_verdict,
+                                         parse_verdict, render_triage_report, tier_note)
+
+# ====== Configuration ======
+PROJECT_PROMPT_FILE = Path(os.environ.get("SYNTAXBOT_PROMPT", Path(__file__).with_name("prompt.txt")))
+INPUT_FOLDER = Path(os.environ.get("SYNTAXBOT_INPUT", "SQL"))
+OUTPUT_FOLDER = INPUT_FOLDER / "SyntaxReports"
+MODEL_NAME = "codellama:7b-instruct"  # Change model as needed
+THINKING = None  # Reasoning: None for models without it (codellama), else "off", "on" or a token budget
+SEMANTIC_CACHE_DIR = None  # e.g. OUTPUT_FOLDER / ".semantic_cache" to reuse reports of cloned procedures (set with --semantic-cache)
+SEMANTIC_CACHE_THRESHOLD = 0.98  # Cosine similarity needed to reuse a previous report
+FINDINGS_DB = OUTPUT_FOLDER / "findings.sqlite"  # Queryable index of findings (ollamabots syntaxbot query)
+INDEX_LLM_FINDINGS = True  # Also index bullet points from the model's report sections
+RULE_ENGINE = True  # Only call the model for procedures failing the rules compiled from prompt.txt
+WORKERS = None  # Files reviewed at once; None = the tuned parallelism of each Ollama host (1 untuned)
+COMPACT_PROMPT = True  # Abbreviate comments/whitespace and group static findings (see common/compaction.py)
+TRIAGE_MODEL = None  # Small model screening files first, e.g. "qwen3:4b" or "gemma3:1b"; None = no cascade
+TRIAGE_THRESHOLD = 0.5  # Suspicion (0-1) at which a file escalates to MODEL_NAME
+TRIAGE_THINKING = "off"  # Reasoning for the triage model (None for models without it, e.g. gemma3)
+CALL_GRAPH_FILE = OUTPUT_FOLDER / "call_graph.json"  # EXEC / CREATE PROCEDURE graph and the last review of each file
+IMPACT_ONLY = True  # Only review files changed since their last review and their transitive callers (--all: every file)
+BATCH_PROMPTS = True  # Review coupled procedures together in one prompt with a shared context header
+BATCH_MAX_FILES = 4  # Files per batched prompt
+BATCH_NUM_CTX = 12288  # Context window requested for batched prompts (prompt + one report per file)
+BATCH_REPORT_TOKENS = 800  # Output tokens allowed per file in a batched answer
+
+# Set per run by configure()
+timestamp = None
+log_file = None
+compaction_report = CompactionReport()
+
+# ====== Logging Setup ======
+def configure(input_folder: Path):
+    """Point outputs at <input_folder>/SyntaxReports and start a run log there."""
+    global INPUT_FOLDER, OUTPUT_FOLDER, FINDINGS_DB, CALL_GRAPH_FILE, timestamp, log_file, compaction_report
+    INPUT_FOLDER = Path(input_folder)
+    OUTPUT_FOLDER = INPUT_FOLDER / "SyntaxReports"
+    FINDINGS_DB = OUTPUT_FOLDER / "findings.sqlite"
+    CALL_GRAPH_FILE = OUTPUT_FOLDER / "call_graph.json"
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    log_file = OUTPUT_FOLDER / f"{timestamp}.log"
+    compaction_report = CompactionReport()
+    OUTPUT_FOLDER.mkdir(parents=True, exist_ok=True)
+
+    logging.basicConfig(
+        filename=log_file,
+        level=logging.INFO,
+        format='[%(asctime)s] %(levelname)s: %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+
+# ====== Rule Loader ======
+def load_project_prompt() -> str:
+    if PROJECT_PROMPT_FILE.exists():
+        return PROJECT_PROMPT_FILE.read_text(encoding="utf-8")
+    else:
+        logging.error(f"Project prompt file {PROJECT_PROMPT_FILE} not found.")
+        return ""
+
+def load_process_rules() -> list:
+    """Compile prompt.txt into per-process, per-ResultCode expectations (see rule_engine.py)."""
+    try:
+        return compile_rules(PROJECT_PROMPT_FILE.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        logging.error(f"{PROJECT_PROMPT_FILE} not found. Skipping rule checks.")
+        return []
+
+def load_resultcode_rules(processes: list = None) -> dict:
+    """Extract expected ResultCode mappings from prompt.txt."""
+    rules = {}
+    try:
+        text = PROJECT_PROMPT_FILE.read_text(encoding="utf-8")
+        for line in text.splitlines():
+            match = re.match(r"ResultCode\s*=\s*(\d+)\s*->\s*(.+)", line.strip(), re.I)
+            if match:
+                code, desc = match.groups()
+                rules[code] = desc.strip()
+        # Codes described in prose ("Completed (23004)") come from the compiled rules
+        for code, desc in resultcode_descriptions(processes if processes is not None else compile_rules(text)).items():
+            rules.setdefault(code, desc)
+        logging.info(f"Loaded {len(rules)} ResultCode rules from {PROJECT_PROMPT_FILE}")
+    except FileNotFoundError:
+        logging.error(f"{PROJECT_PROMPT_FILE} not found. Skipping ResultCode validation.")
+    return rules
+
+# ====== Ollama Helpers ======
+def ensure_model(model: str):
+    """Ensure the Ollama model exists on the Ollama hosts, or locally when none answers."""
+    status = get_pool().ensure_model(model)
+    if any(state != "unreachable" for state in status.values()):
+        for host, state in status.items():
+            logging.info(f"Model '{model}' on {host}: {state}")
+            print(f"{'⚠️' if state == 'unreachable' else '✅'} Model '{model}' on {host}: {state}")
+        return
+
+    print(f"🔍 Checking if model '{model}' exists locally...")
+    try:
+        result = subprocess.run([OLLAMA_PATH, "list"], capture_output=True, text=True, check=True)
+        models = [line.split()[0] for line in result.stdout.strip().splitlines()]
+        if model not in models:
+            print(f"📥 Model '{model}' not found. Downloading...")
+            subprocess.run([OLLAMA_PATH, "pull", model], check=True)
+            print(f"✅ Model '{model}' downloaded.")
+        else:
+            print(f"✅ Model '{model}' is already available.")
+    except subprocess.CalledProcessError as e:
+        print(f"⚠️ Error checking/downloading model: {e}")
+
+def ollama_query(model: str, prompt: str, timeout: int = MAX_DEADLINE, options: dict = None) -> str:
+    """Query Ollama model through the host pool as a guarded stream and return output (CLI if no host answers)."""
+    import requests
+    start = time.time()
+    payload = {"model": model, "prompt": prompt}
+    if options:
+        payload["options"] = dict(options)
+    apply_thinking(payload, parse_thinking(THINKING))
+    try:
+        data = stream_generate(payload, ceiling=timeout)
+        logging.info(f"Model responded in {time.time() - start:.2f}s")
+        return data.get("response", "").strip()
+    except GenerationAborted as e:
+        logging.warning(f"Model query aborted: {e.reason}")
+        return f"⚠️ Model query aborted: {e.reason}"
+    except requests.exceptions.RequestException as e:
+        logging.warning(f"API failed ({e}), trying CLI...")
+        return ollama_cli_query(model, prompt, timeout)
+
+def ollama_cli_query(model: str, prompt: str, timeout: int = MAX_DEADLINE) -> str:
+    """Query Ollama model through the local CLI and return output."""
+    start = time.time()
+    timeout = predict_timeout({"model": model, "prompt": prompt}, ceiling=timeout)
+    # --verbose prints Ollama's timings to stderr, giving the trace its prefill/decode split
+    verbose = ["--verbose"] if tracing() else []
+    try:
+        with span("model", model=model):
+            result = subprocess.run(
+                [OLLAMA_PATH, "run", model, *cli_flags(parse_thinking(THINKING)), *verbose],
+                input=prompt.encode(),
+                capture_output=True,
+                timeout=timeout
+            )
+            result.check_returncode()
+            if verbose:
+                model_spans(parse_verbose_timings(result.stderr.decode(errors="replace")))
+        elapsed = time.time() - start
+        logging.info(f"Model responded in {elapsed:.2f}s")
+        return result.stdout.decode().strip()
+    except subprocess.TimeoutExpired:
+        logging.warning("Model query timed out.")
+        return "⚠️ Model query timed out."
+    except subprocess.CalledProcessError as e:
+        logging.warning(f"Ollama failed: {e.stderr.decode().strip()}")
+        return f"⚠️ Ollama failed: {e.stderr.decode().strip()}"
+
+# ====== Triage Tier ======
+def triage_file(filename: str, sql_code: str, project_logic: str, static_analysis: dict, ranges: list = None):
+    """Ask TRIAGE_MODEL for a pass/suspect verdict per chunk of the (first, last) line ranges; any failure escalates."""
+    import requests
+    known = [f for f in static_analysis["findings"] if f["severity"] != "info"]
+    chunks = chunk_sql(sql_code, ranges=ranges)
+    verdicts = []
+    try:
+        for first_line, chunk in chunks:
+            payload = {
+                "model": TRIAGE_MODEL,
+                "prompt": build_triage_prompt(project_logic, filename, chunk, first_line, len(chunks), known),
+                "format": TRIAGE_SCHEMA,
+                "options": {"temperature": 0, "num_predict": 512},
+            }
+            apply_thinking(payload, parse_thinking(TRIAGE_THINKING))
+            with span("triage", model=TRIAGE_MODEL, line=first_line):
+                data = stream_generate(payload)
+            verdicts.append(parse_verdict(data.get("response", ""), TRIAGE_MODEL))
+    except (GenerationAborted, requests.exceptions.RequestException, ValueError) as e:
+        logging.warning(f"{filename}: triage failed ({e}), escalating")
+        return failed_verdict(TRIAGE_MODEL, e)
+    return combine(verdicts, [first_line for first_line, _ in chunks])
+
+_semantic_cache = None
+
+def get_semantic_cache():
+    """Return the semantic cache if enabled (numpy is only needed when it is)."""
+    global _semantic_cache
+    if SEMANTIC_CACHE_DIR is None:
+        return None
+    if _semantic_cache is None:
+        from ollamabots.common.semantic_cache import SemanticCache
+        _semantic_cache = SemanticCache(SEMANTIC_CACHE_DIR, f"syntaxBot-{MODEL_NAME}",
+                                        threshold=SEMANTIC_CACHE_THRESHOLD)
+    return _semantic_cache
+
+def adapt_cached_report(report: str, entry: dict, filename: str) -> str:
+    """Point a report reused from a cloned procedure at the new file name."""
+    source = entry["source"]
+    report = report.replace(source, filename)
+    return report.replace(Path(source).stem, Path(filename).stem)
+
+# ====== SQL Analysis ======
+def analyze_sql(sql_text: str, rules: dict) -> dict:
+    """Static SQL analysis: ResultCodes, status changes, redundancy, best practices.
+
+    Besides the per-category lists used in the prompt, every check is also
+    recorded in "findings" as {line, rule, severity, message} for the index.
+    """
+    analysis = {
+        "resultcodes_found": [],
+        "missing_resultcodes": [],
+        "status_changes": [],
+        "unused_blocks": [],
+        "best_practices": [],
+        "findings": []
+    }
+
+    def finding(rule, severity, message, line=None):
+        analysis["findings"].append({"line": line, "rule": rule, "severity": severity, "message": message})
+
+    lines = sql_text.splitlines()
+
+    # ---- ResultCodes ----
+    for i, line in enumerate(lines, start=1):
+        if re.search(r"@ResultCode\s*=\s*(\w+\.)?ResultCode\b", line, re.I):
+            finding("resultcode_read", "info", line.strip(), i)
+        elif re.search(r"\b(IF|WHEN|WHERE|AND|OR)\b[^=]*@ResultCode\s*=", line, re.I):
+            finding("resultcode_check", "info", line.strip(), i)
+        elif re.search(r"(@|\bSET\s+)ResultCode\s*=", line, re.I):
+            finding("resultcode_set", "info", line.strip(), i)
+        for match in re.finditer(r"=\s*(\d{3,5})", line):
+            code = match.group(1)
+            analysis["resultcodes_found"].append((i, code))
+            finding("resultcode_found", "info", f"ResultCode {code}", i)
+            if code not in rules:
+                analysis["best_practices"].append(f"⚠️ Line {i}: Unexpected ResultCode {code} (not in rules)")
+                finding("unexpected_resultcode", "warning", f"Unexpected ResultCode {code} (not in rules)", i)
+
+    # Check missing rules
+    for expected in rules.keys():
+        if expected not in [c for _, c in analysis["resultcodes_found"]] and \
+                not re.search(rf"@ResultCode\s*=\s*{expected}\b", sql_text, re.I):
+            analysis["missing_resultcodes"].append(expected)
+            finding("missing_resultcode", "warning", f"Expected ResultCode {expected} not handled")
+
+    # ---- Status updates ----
+    for i, line in enumerate(lines, start=1):
+        if re.search(r"UPDATE\s+Folder.*StatusCode\s*=", line, re.I):
+            analysis["status_changes"].append(f"Line {i}: Folder status updated")
+            finding("folder_status_update", "info", "Folder status updated", i)
+        if re.search(r"UPDATE\s+Process.*StatusCode\s*=", line, re.I):
+            analysis["status_changes"].append(f"Line {i}: Process status updated")
+            finding("process_status_update", "info", "Process status updated", i)
+
+    # ---- Redundant / Unused blocks ----
+    if "BEGIN" in sql_text and "END" not in sql_text:
+        analysis["unused_blocks"].append("⚠️ BEGIN without END detected")
+        finding("begin_without_end", "error", "BEGIN without END detected")
+    if "IF EXISTS" in sql_text and "DROP" not in sql_text:
+        analysis["unused_blocks"].append("⚠️ IF EXISTS without DROP usage")
+        finding("if_exists_without_drop", "info", "IF EXISTS without DROP usage")
+
+    # ---- Best practices ----
+    if not re.search(r"TRY\s+BEGIN", sql_text, re.I):
+        analysis["best_practices"].append("⚠️ Missing TRY/CATCH error handling")
+        finding("missing_try_catch", "warning", "Missing TRY/CATCH error handling")
+    if "DECLARE @" not in sql_text:
+        analysis["best_practices"].append("⚠️ Missing variable declarations")
+        finding("missing_declarations", "warning", "Missing variable declarations")
+    if "SELECT *" in sql_text.upper():
+        analysis["best_practices"].append("⚠️ Avoid SELECT * (use explicit columns)")
+        finding("select_star", "warning", "Avoid SELECT * (use explicit columns)")
+    if len(re.findall(r"\bUPDATE\b", sql_text, re.I)) > 3:
+        analysis["best_practices"].append("⚠️ Too many UPDATEs – consider DRY principle")
+        finding("too_many_updates", "info", "Too many UPDATEs – consider DRY principle")
+
+    return analysis
+
+# ====== Prompt Builder ======
+def file_details(sql_code: str, filename: str, static_analysis: dict, rule_check=None, compact: bool = None) -> str:
+    """The per-file part of a review prompt: SQL code, static analysis and rule checks."""
+    compact = COMPACT_PROMPT if compact is None else compact
+    rule_section = ""
+    if rule_check is not None:
+        rule_section = f"""
+Deterministic Rule Checks (compiled from the project rules; passing ResultCode sections are omitted above):
+{format_outcomes(rule_check)}
+"""
+    if compact:
+        ranges = focus_ranges(sql_code, rule_check) if rule_check is not None else None
+        sql_code = compact_sql(sql_code, [(first, last) for first, last, _ in ranges] if ranges else None).text
+        return f"""SQL file: {filename}
+SQL code (each line starts with its line number in the file; comments and whitespace are abbreviated):
+{sql_code}
+
+Static Analysis Results:
+- ResultCodes Found: {group_lines((line, code) for line, code in static_analysis['resultcodes_found'])}
+- Missing ResultCodes: {', '.join(static_analysis['missing_resultcodes']) or 'none'}
+- Status Changes: {group_messages(static_analysis['status_changes'])}
+- Unused Blocks: {group_messages(static_analysis['unused_blocks'])}
+- Best Practices: {group_messages(static_analysis['best_practices'])}
+{rule_section}"""
+    if rule_check is not None:
+        sql_code = focus_sections(sql_code, rule_check)
+    return f"""SQL file: {filename}
+SQL code:
+{sql_code}
+
+Static Analysis Results:
+- ResultCodes Found: {static_analysis['resultcodes_found']}
+- Missing ResultCodes: {static_analysis['missing_resultcodes']}
+- Status Changes: {static_analysis['status_changes']}
+- Unused Blocks: {static_analysis['unused_blocks']}
+- Best Practices: {static_analysis['best_practices']}
+{rule_section}"""
+
+def build_prompt(project_logic: str, sql_code: str, filename: str, static_analysis: dict,
+                 rule_check=None, compact: bool = None) -> str:
+    compact = COMPACT_PROMPT if compact is None else compact
+    details = file_details(sql_code, filename, static_analysis, rule_check, compact)
+    if compact:
+        project_logic = compact_notes(project_logic, keep_blank_lines=False).text
+        return f"""
+You are a SQL syntax and logic checker for a city project.
+
+Project rules and assumptions:
+{project_logic}
+
+{details}
+Tasks:
+- Verify correctness of ResultCodes vs rules.
+- Identify missing ResultCodes and logic issues.
+- Check Process/Folder status update logic.
+- Detect unused/redundant code blocks.
+- Recommend SQL best practices (naming, DRY, error handling, variable declarations).
+- Suggest corrections if needed, citing line numbers.
+
+Output as structured Markdown:
+# {filename}
+## Syntax Errors / Warnings
+## Logic or Rule Violations
+## Suggested Fixes
+"""
+    return f"""
+You are a SQL syntax and logic checker for a city project.
+
+Project rules and assumptions:
+{project_logic}
+
+{details}
+Tasks:
+- Verify correctness of ResultCodes vs rules.
+- Identify missing ResultCodes and logic issues.
+- Check Process/Folder status update logic.
+- Detect unused/redundant code blocks.
+- Recommend SQL best practices (naming, DRY, error handling, variable declarations).
+- Suggest corrections if needed.
+
+Output as structured Markdown:
+# {filename}
+## Syntax Errors / Warnings
+## Logic or Rule Violations
+## Suggested Fixes
+"""
+
+def build_batch_prompt(project_logic: str, jobs: list, context_lines: list, compact: bool = None) -> str:
+    """One prompt reviewing coupled files: rules, tasks and the call context are sent once for all of them."""
+    compact = COMPACT_PROMPT if compact is None else compact
+    if compact:
+        project_logic = compact_notes(project_logic, keep_blank_lines=False).text
+    names = [job.file_path.name for job in jobs]
+    reasons = [f"{job.file_path.name} ({job.reason})" for job in jobs if job.reason]
+    details = "\n".join(f"--- File {i} of {len(jobs)} ---\n"
+                        + file_details(job.sql_code, job.file_path.name, job.static_analysis, job.rule_check, compact)
+                        for i, job in enumerate(jobs, 1))
+    reports = "\n\n".join(f"# {name}\n## Syntax Errors / Warnings\n## Logic or Rule Violations\n## Suggested Fixes"
+                          for name in names)
+    return f"""
+You are a SQL syntax and logic checker for a city project.
+
+Project rules and assumptions:
+{project_logic}
+
+The {len(jobs)} stored procedures below are coupled and are reviewed together.
+Calls between them and to shared procedures:
+{chr(10).join(context_lines) or '- they make mostly the same calls'}
+{f"Reviewed because: {', '.join(reasons)}" if reasons else ""}
+
+{details}
+Tasks, for each SQL file:
+- Verify correctness of ResultCodes vs rules.
+- Identify missing ResultCodes and logic issues.
+- Check Process/Folder status update logic, including what the procedures it calls already update.
+- Detect unused/redundant code blocks.
+- Recommend SQL best practices (naming, DRY, error handling, variable declarations).
+- Suggest corrections if needed, citing line numbers.
+
+Output one structured Markdown report per file, in this order, each starting with the file name as its heading:
+{reports}
+"""
+
+def split_batch_report(output: str, filenames: list) -> dict:
+    """filename -> its report, from an answer to build_batch_prompt (files without a heading are left out)."""
+    wanted = {name.lower(): name for name in filenames}
+    headings = [(match.start(), wanted.get(match.group(1).lower()))
+                for match in re.finditer(r"^#\s+[^\n]*?([\w.\-]+\.sql)\b[^\n]*$", output, re.M)]
+    headings = [(start, name) for start, name in headings if name]
+    reports = {}
+    for (start, name), (end, _) in zip(headings, headings[1:] + [(len(output), None)]):
+        reports.setdefault(name, output[start:end].strip())
+    return reports
+
+# ====== File Processor ======
+def check_rules(sql_code: str, rules: dict, processes: list):
+    """Run the deterministic rule checks; returns (rule_check, rules scoped to the matched process)."""
+    if not (RULE_ENGINE and processes):
+        return None, rules
+    rule_check = check_sql(sql_code, processes)
+    if rule_check.process is not None:
+        rules = {code: rules.get(code, rule.name) for code, rule in rule_check.process.codes.items()}
+    return rule_check, rules
+
+def process_sql_file(file_path: Path, project_logic: str, rules: dict, index: FindingsIndex = None,
+                     processes: list = None):
+    with span("file", cat="file", file=file_path.name):
+        sql_code, findings, output = review_sql_file(file_path, project_logic, rules, processes)
+        if index is not None:
+            update_index(index, file_path.name, sql_code, findings, output)
+
+@dataclass
+class ReviewJob:
+    """One file on its way through the review tiers; output stays None while it needs the full model."""
+    file_path: Path
+    sql_code: str
+    static_analysis: dict
+    rule_check: object = None
+    verdict: object = None   # TriageVerdict when the cascade is on
+    vector: object = None    # Semantic cache embedding of the SQL
+    reason: str = None       # Why it is reviewed in this run (changed, calls a changed file, ...)
+    output: str = None
+    reviewed: bool = False   # Whether MODEL_NAME or the triage tier wrote the report (only these count for impact-only runs)
+
+def review_sql_file(file_path: Path, project_logic: str, rules: dict, processes: list = None):
+    """Check one file and write its report; returns (sql_code, findings, report) for the index."""
+    job = prepare_review(file_path, project_logic, rules, processes)
+    if job.output is None:
+        job.output = full_review(job, project_logic)
+    return finish_review(job)
+
+def prepare_review(file_path: Path, project_logic: str, rules: dict, processes: list = None,
+                   reason: str = None) -> ReviewJob:
+    """Static checks, rule engine, semantic cache and triage; the job's output is set unless it needs the full model."""
+    logging.info(f"Processing {file_path.name}" + (f" ({reason})" if reason else ""))
+    print(f"📂 Checking {file_path.name}...")
+
+    with span("read"):
+        sql_code = file_path.read_text(encoding="utf-8")
+    with span("static analysis"):
+        rule_check, rules = check_rules(sql_code, rules, processes)
+        static_analysis = analyze_sql(sql_code, rules)
+        if rule_check is not None:
+            static_analysis["findings"] += rule_findings(rule_check)
+
+    # Procedures cloned from each other reuse the earlier report
+    cache = get_semantic_cache()
+    hit, vector = None, None
+    if cache and not (rule_check and rule_check.status == "pass"):
+        with span("cache lookup"):
+            hit, vector = cache.lookup(
+                sql_code, adapt=lambda report, entry: adapt_cached_report(report, entry, file_path.name))
+
+    job = ReviewJob(file_path, sql_code, static_analysis, rule_check, vector=vector, reason=reason)
+    if rule_check is not None and rule_check.status == "pass":
+        logging.info(f"{file_path.name}: all rule checks passed, model skipped")
+        print("✅ All rule checks passed – model not needed")
+        with span("render report"):
+            job.output = render_report(file_path.name, rule_check, static_analysis)
+    elif hit:
+        from ollamabots.common.semantic_cache import cache_note
+        print(f"♻️ Reusing report of '{hit['source']}' (similarity {hit['score']:.3f})")
+        job.output = f"{cache_note(hit)}\n{hit['result']}"
+    else:
+        if rule_check is not None:
+            logging.info(f"{file_path.name}: rule check {rule_check.status} "
+                         f"(ResultCodes {', '.join(rule_check.failed_codes) or '-'}), asking model")
+        if TRIAGE_MODEL and rule_check is not None and rule_check.status == "fail":
+            # A failure the rules proved goes to the full review; triage only weighs what they could not decide
+            print(f"🟠 Rule checks failed – skipping triage, escalating to {MODEL_NAME}")
+        elif TRIAGE_MODEL:
+            ranges = focus_ranges(sql_code, rule_check) if rule_check is not None else None
+            job.verdict = verdict = triage_file(file_path.name, sql_code, project_logic, static_analysis,
+                                                [(first, last) for first, last, _ in ranges] if ranges else None)
+            logging.info(f"{file_path.name}: triage {verdict.verdict} (suspicion {verdict.suspicion:.2f})")
+
+            if not verdict.escalate(TRIAGE_THRESHOLD):
+                print(f"🟢 Triage ({TRIAGE_MODEL}): {verdict.verdict}, suspicion {verdict.suspicion:.2f} "
+                      f"– full review not needed")
+                with span("render report"):
+                    outcomes = format_outcomes(rule_check, include_passed=True) if rule_check else None
+                    job.output = render_triage_report(file_path.name, verdict, TRIAGE_THRESHOLD, static_analysis,
+                                                      outcomes)
+                # Kept until the file or its callees change; the review key covers the triage model and threshold
+                job.reviewed = True
+            else:
+                print(f"🟠 Triage ({TRIAGE_MODEL}): {verdict.verdict}, suspicion {verdict.suspicion:.2f} "
+                      f"– escalating to {MODEL_NAME}")
+    return job
+
+def finish_full_review(job: ReviewJob, output: str) -> str:
+    """Cache a full-model report and note its tier."""
+    cache = get_semantic_cache()
+    if cache and output and not output.startswith("⚠️"):
+        cache.add(job.sql_code, output, job.file_path.name, job.vector)
+    if job.verdict is not None and not output.startswith("⚠️"):
+        output = f"{tier_note('full', job.verdict, TRIAGE_THRESHOLD, MODEL_NAME)}\n{output}"
+    job.reviewed = bool(output) and not output.startswith("⚠️")
+    return output
+
+def full_review(job: ReviewJob, project_logic: str) -> str:
+    """Review one file with MODEL_NAME."""
+    filename = job.file_path.name
+    with span("build prompt"):
+        prompt = build_prompt(project_logic, job.sql_code, filename, job.static_analysis, job.rule_check)
+        if COMPACT_PROMPT:
+            raw_tokens = estimate_tokens(build_prompt(project_logic, job.sql_code, filename,
+                                                      job.static_analysis, job.rule_check, compact=False))
+            compaction_report.add(filename, raw_tokens, estimate_tokens(prompt))
+            logging.info(f"{filename}: prompt compacted from ~{raw_tokens} to ~{estimate_tokens(prompt)} tokens")
+
+    return finish_full_review(job, ollama_query(MODEL_NAME, prompt))
+
+def batch_review(jobs: list, project_logic: str, graph: CallGraph):
+    """Review coupled files with MODEL_NAME in one prompt; files missing from the answer are reviewed alone."""
+    names = [job.file_path.name for job in jobs]
+    with span("build prompt"):
+        prompt = build_batch_prompt(project_logic, jobs, graph.shared_context(names))
+        raw_tokens = sum(estimate_tokens(build_prompt(project_logic, job.sql_code, job.file_path.name,
+                                                      job.static_analysis, job.rule_check, compact=False))
+                         for job in jobs)
+        logging.info(f"{', '.join(names)}: one batched prompt of ~{estimate_tokens(prompt)} tokens "
+                     f"instead of ~{raw_tokens}")
+
+    print(f"📦 Reviewing {', '.join(names)} together in one prompt")
+    output = ollama_query(MODEL_NAME, prompt,
+                          options={"num_ctx": BATCH_NUM_CTX, "num_predict": BATCH_REPORT_TOKENS * len(jobs)})
+    reports = {} if output.startswith("⚠️") else split_batch_report(output, names)
+    if reports:
+        compaction_report.add(f"{names[0]} +{len(names) - 1}", raw_tokens, estimate_tokens(prompt))
+    for job in jobs:
+        report = reports.get(job.file_path.name)
+        if report is None:
+            logging.warning(f"{job.file_path.name}: no report in the batched answer, reviewing it alone")
+            job.output = full_review(job, project_logic)
+        else:
+            job.output = finish_full_review(job, report)
+
+def batch_jobs(jobs: list, project_logic: str, graph: CallGraph) -> list:
+    """Split the jobs of a coupled group into batches that fit BATCH_MAX_FILES and BATCH_NUM_CTX."""
+    batches = []
+    for job in jobs:
+        if batches and len(batches[-1]) < BATCH_MAX_FILES:
+            candidate = batches[-1] + [job]
+            tokens = estimate_tokens(build_batch_prompt(project_logic, candidate,
+                                                        graph.shared_context([j.file_path.name for j in candidate])))
+            if tokens + BATCH_REPORT_TOKENS * len(candidate) <= BATCH_NUM_CTX:
+                batches[-1] = candidate
+                continue
+        batches.append([job])
+    return batches
+
+def finish_review(job: ReviewJob):
+    """Write the report; returns (sql_code, findings, report) for the index."""
+    report_file = OUTPUT_FOLDER / (job.file_path.stem + "_report.md")
+    with span("write"):
+        report_file.write_text(job.output, encoding="utf-8")
+
+    logging.info(f"Report saved to {report_file}")
+    print(f"✅ Report saved to {report_file.name}")
+
+    return job.sql_code, job.static_analysis["findings"], job.output
+
+def review_group(sql_files: list, project_logic: str, rules: dict, processes: list, graph: CallGraph,
+                 reasons: dict) -> list:
+    """Review a group of coupled files, batching those that need the full model; returns the finished jobs."""
+    jobs = []
+    for sql_file in sql_files:
+        with span("file", cat="file", file=sql_file.name):
+            jobs.append(prepare_review(sql_file, project_logic, rules, processes, reasons.get(sql_file.name)))
+    for batch in batch_jobs([job for job in jobs if job.output is None], project_logic, graph):
+        if len(batch) == 1:
+            with span("file", cat="file", file=batch[0].file_path.name):
+                batch[0].output = full_review(batch[0], project_logic)
+        else:
+            with span("batch", cat="file", files=", ".join(job.file_path.name for job in batch)):
+                batch_review(batch, project_logic, graph)
+    for job in jobs:
+        finish_review(job)
+    return jobs
+
+def update_index(index: FindingsIndex, filename: str, sql_code: str, findings: list, output: str):
+    with span("index"):
+        index.update_file(filename, sql_code, findings, timestamp)
+        if INDEX_LLM_FINDINGS and not output.startswith("⚠️"):
+            index.update_file(filename, output, parse_report_findings(output), timestamp, source="llm")
+
+# ====== Findings Index ======
+def _index_file(index: FindingsIndex, sql_file: Path, all_rules: dict, processes: list) -> int:
+    updated = 0
+    with span("read"):
+        sql_code = sql_file.read_text(encoding="utf-8")
+    if not index.is_current(sql_file.name, sql_code):
+        with span("static analysis"):
+            rule_check, rules = check_rules(sql_code, all_rules, processes)
+            findings = analyze_sql(sql_code, rules)["findings"]
+            if rule_check is not None:
+                findings += rule_findings(rule_check)
+        with span("index"):
+            index.update_file(sql_file.name, sql_code, findings, timestamp)
+        updated += 1
+    report_file = OUTPUT_FOLDER / (sql_file.stem + "_report.md")
+    if INDEX_LLM_FINDINGS and report_file.exists():
+        report = report_file.read_text(encoding="utf-8")
+        if not index.is_current(sql_file.name, report, source="llm"):
+            with span("index"):
+                index.update_file(sql_file.name, report, parse_report_findings(report), timestamp, source="llm")
+            updated += 1
+    return updated
+
+def index_folder(input_folder: Path) -> int:
+    """Refresh the findings index for changed files without calling the model."""
+    configure(input_folder)
+    processes = load_process_rules()
+    all_rules = load_resultcode_rules(processes)
+    updated = 0
+    with FindingsIndex(FINDINGS_DB) as index:
+        index.start_run(timestamp, "static")
+        for sql_file in sorted(input_folder.glob("*.sql")):
+            with span("file", cat="file", file=sql_file.name):
+                updated += _index_file(index, sql_file, all_rules, processes)
+    print(f"✅ Findings index updated ({updated} changed) at {FINDINGS_DB}")
+    return updated
+
+def query_index(args):
+    """Print findings (or files lacking a rule) from the index."""
+    with FindingsIndex(FINDINGS_DB) as index:
+        if args.summary:
+            for row in index.summary():
+                print(f"{row['rule']:<24} {row['severity']:<8} {row['findings']:>5} findings in {row['files']} file(s)")
+        elif args.missing_rule:
+            for file in index.files_without(args.missing_rule):
+                print(file)
+        else:
+            for row in index.query(args.rule, args.file, args.severity, args.run, args.source):
+                line = row["line"] if row["line"] is not None else "-"
+                print(f"{row['file']}:{line}  [{row['severity']}] {row['rule']}: {row['message']} "
+                      f"({row['source']}, run {row['run_id']})")
+
+# ====== Call Graph ======
+def review_context(project_logic: str) -> str:
+    """Hash of what every report depends on besides the SQL: a change re-reviews every file."""
+    settings = [MODEL_NAME, THINKING, TRIAGE_MODEL, TRIAGE_THRESHOLD, TRIAGE_THINKING, RULE_ENGINE, COMPACT_PROMPT]
+    return content_hash("\n".join(map(str, settings)) + f"\n{project_logic}")
+
+def load_call_graph(input_folder: Path) -> CallGraph:
+    graph = CallGraph(CALL_GRAPH_FILE)
+    with span("call graph"):
+        parsed = graph.refresh(input_folder)
+    logging.info(f"Call graph: {len(graph.files)} files ({parsed} parsed), {len(graph.owner)} procedures")
+    return graph
+
+def show_call_graph(input_folder: Path):
+    """Print the call graph and what the next run would review, without calling the model."""
+    configure(input_folder)
+    graph = load_call_graph(input_folder)
+    graph.save()
+    for file in sorted(graph.files):
+        print(graph.describe(file))
+    pending = graph.pending(review_context(load_project_prompt()))
+    print(f"\n🕸️ Next run reviews {len(pending)} of {len(graph.files)} file(s)")
+    for file, reason in pending.items():
+        print(f"   {file} ({reason})")
+    for group in graph.groups(list(pending)):
+        if len(group) > 1:
+            print(f"📦 Reviewed together: {', '.join(group)}")
+
+# ====== Folder Processor ======
+def process_folder(input_folder: Path):
+    configure(input_folder)
+    start_all = time.time()
+    project_logic = load_project_prompt()
+    if not project_logic:
+        print("⚠️ Project prompt is empty. Aborting.")
+        return
+
+    processes = load_process_rules()
+    rules = load_resultcode_rules(processes)
+    ensure_model(MODEL_NAME)
+    if TRIAGE_MODEL:
+        ensure_model(TRIAGE_MODEL)
+
+    sql_files = sorted(input_folder.glob("*.sql"))
+    by_name = {sql_file.name: sql_file for sql_file in sql_files}
+
+    # Only files changed since their last review, and the procedures calling them, are reviewed again
+    graph = load_call_graph(input_folder)
+    context = review_context(project_logic)
+    reasons = graph.pending(context) if IMPACT_ONLY else {name: "--all" for name in by_name}
+    for name in by_name:
+        if not (OUTPUT_FOLDER / (Path(name).stem + "_report.md")).exists():
+            reasons.setdefault(name, "no report")
+    reasons = {name: reasons[name] for name in by_name if name in reasons}
+    if len(reasons) < len(sql_files):
+        print(f"⏩ {len(sql_files) - len(reasons)} file(s) unchanged since their last review, reports kept "
+              f"(--all reviews them again)")
+    for name, reason in reasons.items():
+        logging.info(f"{name}: to review ({reason})")
+        if reason not in ("not reviewed yet", "no report", "--all"):
+            print(f"🕸️ {name}: {reason}")
+
+    names = list(reasons)
+    groups = graph.groups(names) if BATCH_PROMPTS else [[name] for name in names]
+    groups = [[by_name[name] for name in group] for group in groups]
+    workers = min(WORKERS or get_pool().parallelism(MODEL_NAME), len(groups))
+    with FindingsIndex(FINDINGS_DB) as index:
+        index.start_run(timestamp, f"{TRIAGE_MODEL} > {MODEL_NAME}" if TRIAGE_MODEL else MODEL_NAME)
+
+        def review(group):
+            return review_group(group, project_logic, rules, processes, graph, reasons)
+
+        def record(jobs):
+            for job in jobs:
+                update_index(index, job.file_path.name, job.sql_code, job.static_analysis["findings"], job.output)
+                # Rule-engine and reused reports are produced again next run; full and triage reviews stick
+                if job.reviewed:
+                    graph.mark_reviewed(job.file_path.name, context)
+            graph.save()
+
+        if workers > 1:
+            # Model calls run in parallel across the host pool; the index is written from this thread
+            print(f"🚀 Reviewing {len(names)} files in {len(groups)} group(s) with {workers} workers "
+                  f"across {len(get_pool().hosts)} Ollama host(s)")
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                for jobs in pool.map(review, groups):
+                    record(jobs)
+        else:
+            for group in groups:
+                record(review(group))
+        graph.save()
+    if _semantic_cache is not None:
+        _semantic_cache.save()
+
+    if compaction_report.rows:
+        table = compaction_report.format()
+        logging.info(f"Prompt tokens saved by compaction (estimated):\n{table}")
+        print(f"🗜️ Prompt tokens saved by compaction (estimated):\n{table}")
+
+    elapsed_all = time.time() - start_all
+    logging.info(f"All files processed in {elapsed_all:.2f}s")
+    print(f"🎉 All files processed in {elapsed_all:.2f}s")
+    print(f"📝 Logs saved at {log_file}")
+
+# ====== Main Execution ======
+def main(argv=None):
+    global MODEL_NAME, PROJECT_PROMPT_FILE, FINDINGS_DB, WORKERS, TRIAGE_MODEL, TRIAGE_THRESHOLD, COMPACT_PROMPT
+    global IMPACT_ONLY, BATCH_PROMPTS, SEMANTIC_CACHE_DIR, SEMANTIC_CACHE_THRESHOLD
+
+    parser = argparse.ArgumentParser(prog="ollamabots syntaxbot", description="SQL syntax and logic checker")
+    commands = parser.add_subparsers(dest="command")
+
+    run = commands.add_parser("run", help="Review every .sql file in a folder (default command)")
+    run.add_argument("folder", nargs="?", type=Path, default=INPUT_FOLDER)
+    run.add_argument("-w", "--workers", type=int, default=WORKERS,
+                     help="Files reviewed at once (default: one per host in OLLAMA_HOSTS, or its tuned parallelism)")
+    run.add_argument("--no-compact", action="store_true",
+                     help="Send the SQL and static analysis to the model verbatim")
+    run.add_argument("--triage-model", default=TRIAGE_MODEL,
+                     help="Small model that screens files first; only suspect files get the full review")
+    run.add_argument("--triage-threshold", type=float, default=TRIAGE_THRESHOLD,
+                     help="Suspicion (0-1) at which a file escalates to the full model (default: %(default)s)")
+    run.add_argument("--all", action="store_true",
+                     help="Review every file, not only the changed ones and their callers")
+    run.add_argument("--no-batch", action="store_true",
+                     help="One prompt per file, even for coupled procedures")
+    run.add_argument("--semantic-cache", metavar="DIR", type=Path, default=SEMANTIC_CACHE_DIR,
+                     help="Reuse reports of near-duplicate procedures, caching embeddings in DIR")
+    run.add_argument("--cache-threshold", type=float, default=SEMANTIC_CACHE_THRESHOLD,
+                     help="Cosine similarity required for a cache hit (default: %(default)s)")
+
+    index = commands.add_parser("index", help="Refresh the findings index without calling the model")
+    index.add_argument("folder", nargs="?", type=Path, default=INPUT_FOLDER)
+
+    graph = commands.add_parser("graph", help="Show the procedure call graph and which files the next run reviews")
+    graph.add_argument("folder", nargs="?", type=Path, default=INPUT_FOLDER)
+
+    for sub in (run, index, graph):
+        sub.add_argument("-m", "--model", default=MODEL_NAME, help="Ollama model (default: %(default)s)")
+        sub.add_argument("--prompt", type=Path, default=PROJECT_PROMPT_FILE,
+                         help="Project rules file (default: bundled prompt.txt or $SYNTAXBOT_PROMPT)")
+
+    query = commands.add_parser("query", help="Search the findings index",
+                                epilog="e.g. procs that never set a ResultCode: query --missing-rule resultcode_set")
+    query.add_argument("--db", type=Path, default=FINDINGS_DB, help="Findings index (default: %(default)s)")
+    query.add_argument("--rule", help="Rule name (SQL LIKE pattern, e.g. 'llm_%%')")
+    query.add_argument("--file", help="File name (SQL LIKE pattern)")
+    query.add_argument("--severity", choices=["error", "warning", "info"])
+    query.add_argument("--run", help="Run id (timestamp)")
+    query.add_argument("--source", choices=["static", "llm"])
+    query.add_argument("--missing-rule", metavar="RULE", help="List indexed files with no finding for RULE")
+    query.add_argument("--summary", action="store_true", help="Finding counts per rule")
+
+    args = parser.parse_args(argv)
+    if args.command in ("run", "index", "graph"):
+        MODEL_NAME = args.model
+        PROJECT_PROMPT_FILE = args.prompt
+    if args.command == "run":
+        WORKERS = args.workers
+        TRIAGE_MODEL = args.triage_model
+        TRIAGE_THRESHOLD = args.triage_threshold
+        COMPACT_PROMPT = not args.no_compact
+        IMPACT_ONLY = not args.all
+        BATCH_PROMPTS = not args.no_batch
+        SEMANTIC_CACHE_DIR = args.semantic_cache
+        SEMANTIC_CACHE_THRESHOLD = args.cache_threshold
+
+    if args.command == "index":
+        index_folder(args.folder)
+    elif args.command == "graph":
+        show_call_graph(args.folder)
+    elif args.command == "query":
+        FINDINGS_DB = args.db
+        query_index(args)
+    else:
+        process_folder(getattr(args, "folder", INPUT_FOLDER))
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,157 @@
+# triage.py
+"""
+First tier of syntaxbot's review cascade.
+
+A small, fast model reads each procedure (in chunks of at most
+CHUNK_LINES lines) and answers with a structured verdict constrained by
+TRIAGE_SCHEMA: "pass" or "suspect", its confidence, and a few one-line
+issues. The verdict becomes a suspicion score between 0 and 1; only
+procedures at or above the escalation threshold go to the full review model.
+The others get a short report from the triage verdict and the deterministic
+checks, and every report notes which tier produced it.
+
+The model call itself lives in syntaxbot.py; this module builds the prompts
+and interprets the answers.
+"""
+import json
+from dataclasses import dataclass, field
+
+CHUNK_LINES = 150  # Longer procedures are triaged in chunks; the most suspicious chunk decides
+MAX_ISSUES = 5     # Issues kept per chunk
+
+TRIAGE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "verdict": {"type": "string", "enum": ["pass", "suspect"]},
+        "confidence": {"type": "number", "minimum": 0, "maximum": 1},
+        "issues": {"type": "array", "items": {"type": "string"}, "maxItems": MAX_ISSUES},
+    },
+    "required": ["verdict", "confidence", "issues"],
+}
+
+
+@dataclass
+class TriageVerdict:
+    verdict: str           # "pass" or "suspect"
+    suspicion: float       # 0 = certainly clean, 1 = certainly needs the full review
+    model: str
+    issues: list = field(default_factory=list)
+    chunks: int = 1
+
+    def escalate(self, threshold: float) -> bool:
+        return self.suspicion >= threshold
+
+
+def chunk_sql(sql_code: str, max_lines: int = CHUNK_LINES, ranges: list = None) -> list:
+    """
+    Split SQL into (first_line, text) chunks of at most max_lines lines.
+
+    Chunks end at the last blank line in their second half where there is one,
+    so statements are rarely cut in two. ranges, if given, limits the chunks to
+    those (first, last) line ranges; first_line always counts from the top of
+    the file, so line references stay valid.
+    """
+    lines = sql_code.splitlines()
+    spans = []
+    for first, last in ranges or [(1, len(lines))]:
+        if spans and first == spans[-1][1] + 1:
+            spans[-1] = (spans[-1][0], last)  # adjacent ranges are read as one
+        else:
+            spans.append((first, last))
+    chunks = []
+    for first, last in spans:
+        start = first - 1
+        while start < last:
+            end = min(start + max_lines, last)
+            if end < last:
+                blank = next((i for i in range(end, start + max_lines // 2, -1) if not lines[i - 1].strip()), None)
+                end = blank or end
+            chunks.append((start + 1, "\n".join(lines[start:end])))
+            start = end
+    return chunks
+
+
+def build_triage_prompt(project_logic: str, filename: str, chunk: str, first_line: int, chunks: int,
+                        known_findings: list) -> str:
+    whole = chunks == 1 and first_line == 1
+    part = "" if whole else f" (lines {first_line}-{first_line + chunk.count(chr(10))} of the procedure)"
+    known = "\n".join(f"- {f['message']}" for f in known_findings) or "- None"
+    return f"""
+You are triaging SQL Server procedures for a city project before a detailed review.
+Decide quickly whether this code needs the detailed review.
+
+Project rules and assumptions:
+{project_logic}
+
+SQL file: {filename}{part}
+SQL code:
+{chunk}
+
+Already found by static checks:
+{known}
+
+Answer "suspect" if the code likely breaks a project rule (wrong or missing ResultCode handling,
+wrong Process/Folder status updates) or has a syntax or logic error; answer "pass" if it looks correct.
+Give your confidence in the verdict (0 to 1) and at most {MAX_ISSUES} one-line issues.
+"""
+
+
+def parse_verdict(response: str, model: str) -> TriageVerdict:
+    """Decode a structured answer; raises ValueError if it does not match TRIAGE_SCHEMA."""
+    data = json.loads(response)
+    if not isinstance(data, dict) or data.get("verdict") not in ("pass", "suspect"):
+        raise ValueError(f"unexpected triage answer: {response[:200]}")
+    confidence = min(max(float(data.get("confidence", 0.5)), 0.0), 1.0)
+    suspicion = confidence if data["verdict"] == "suspect" else 1.0 - confidence
+    issues = [str(issue).strip() for issue in data.get("issues", []) if str(issue).strip()][:MAX_ISSUES]
+    return TriageVerdict(data["verdict"], round(suspicion, 3), model, issues)
+
+
+def combine(verdicts: list, first_lines: list) -> TriageVerdict:
+    """One verdict per procedure: the most suspicious chunk, with every chunk's issues."""
+    worst = max(verdicts, key=lambda v: v.suspicion)
+    issues = []
+    for verdict, first_line in zip(verdicts, first_lines):
+        prefix = f"From line {first_line}: " if len(verdicts) > 1 else ""
+        issues += [prefix + issue for issue in verdict.issues]
+    return TriageVerdict(worst.verdict, worst.suspicion, worst.model, issues, len(verdicts))
+
+
+def failed_verdict(model: str, error) -> TriageVerdict:
+    """A triage call that failed escalates: the full review is the safe default."""
+    return TriageVerdict("suspect", 1.0, model, [f"Triage failed ({error}); escalated"])
+
+
+def tier_note(tier: str, verdict: TriageVerdict, threshold: float, model: str = None) -> str:
+    """Markdown comment recording which tier of the cascade produced a report."""
+    escalated = f"escalated to {model} " if tier == "full" else ""
+    return (f"<!-- review-tier: {tier} ({escalated}triage by {verdict.model}: {verdict.verdict}, "
+            f"suspicion {verdict.suspicion:.2f}, threshold {threshold:.2f}) -->")
+
+
+def render_triage_report(filename: str, verdict: TriageVerdict, threshold: float, static_analysis: dict,
+                         rule_outcomes: str = None) -> str:
+    """Markdown report for a procedure the triage tier cleared (no full review)."""
+    warnings = static_analysis["unused_blocks"] + static_analysis["best_practices"]
+    warning_lines = "\n".join(f"- {w}" for w in warnings) or "- None"
+    known = [f["message"] for f in static_analysis["findings"] if f["severity"] == "error"]
+    violation_lines = "\n".join(f"- {m}" for m in known) or "- None found by the static checks"
+    issue_lines = "\n".join(f"- {i}" for i in verdict.issues) or "- None"
+    chunks = f" in {verdict.chunks} chunks" if verdict.chunks > 1 else ""
+    rule_section = f"\n## Rule Checks\n{rule_outcomes}\n" if rule_outcomes else ""
+    return f"""{tier_note("triage", verdict, threshold)}
+# {filename}
+_Generated by the triage tier: {verdict.model} judged this procedure "{verdict.verdict}"{chunks} (suspicion {verdict.suspicion:.2f}, below the escalation threshold {threshold:.2f}), so the full review model was not called._
+
+## Syntax Errors / Warnings
+{warning_lines}
+
+## Logic or Rule Violations
+{violation_lines}
+{rule_section}
+## Triage Notes
+{issue_lines}
+
+## Suggested Fixes
+- Re-run with a lower --triage-threshold (or without --triage-model) for a full review
+"""
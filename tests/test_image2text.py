@@ -0,0 +1,16 @@
+# test_image2text.py
+"""Stitching of tiled OCR transcriptions (no models needed)."""
+from ollamabots.image2project.image2text import merge_row, stitch_tiles
+
+
+def test_merge_row_aligns_tiles_with_different_line_counts():
+    # "Meeting notes" ends before the right tile, so the right tile has one line fewer
+    left = ["Meeting notes", "Action: call Bob about the", "Budget review"]
+    right = ["about the invoice", "review for Q3"]
+    assert merge_row([left, right]) == ["Meeting notes", "Action: call Bob about the invoice",
+                                        "Budget review for Q3"]
+
+
+def test_stitch_tiles_joins_words_cut_at_the_tile_edge():
+    tiles = [(0, 0, "Meeting agenda f\nBudget review w"), (0, 1, "nda for Q3\nw with finance")]
+    assert stitch_tiles(tiles) == "Meeting agenda for Q3\nBudget review with finance"